@@ -79,6 +79,9 @@ class Waypoints:
     """
 
     lookahead: int = 32
+    incremental: bool = False
+    """If the waypoint paths found in previous steps should be advanced instead of
+    searched again while the vehicle stays in the same lane outside of junctions."""
 
 
 @dataclass
@@ -21,9 +21,9 @@ import heapq
 import logging
 import random
 import time
-from functools import cached_property, lru_cache
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Set, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
 
 import numpy as np
 from shapely.geometry import Point as SPoint
@@ -33,6 +33,8 @@ from smarts.core.coordinates import BoundingBox, Heading, Point, Pose, RefLinePo
 from smarts.core.lanepoints import LanePoint, LanePoints, LinkedLanePoint
 from smarts.core.road_map import RoadMap, RoadMapWithCaches, Waypoint
 from smarts.core.route_cache import RouteWithCache
+from smarts.core.utils.cache import cache
+from smarts.core.utils.geometry import ShapeIndex
 from smarts.core.utils.glb import make_map_glb, make_road_line_glb
 from smarts.core.utils.math import (
     inplace_unwrap,
@@ -429,7 +431,7 @@ class ArgoverseMap(RoadMapWithCaches):
         def speed_limit(self) -> Optional[float]:
             return ArgoverseMap.DEFAULT_LANE_SPEED
 
-        @lru_cache(maxsize=1024)
+        @cache(maxsize=16)
         def width_at_offset(self, lane_point_s: float) -> Tuple[float, float]:
             world_point = self.from_lane_coord(
                 RefLinePoint(lane_point_s, 0)
@@ -461,7 +463,7 @@ class ArgoverseMap(RoadMapWithCaches):
         def index(self) -> int:
             return self._index
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -499,7 +501,7 @@ class ArgoverseMap(RoadMapWithCaches):
         def outgoing_lanes(self) -> List[RoadMap.Lane]:
             return self._outgoing_lanes
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_lanes_at_offset(self, offset: float) -> List[RoadMap.Lane]:
             result = []
             radius = 1.1 * self.width_at_offset(offset)[0]
@@ -536,7 +538,7 @@ class ArgoverseMap(RoadMapWithCaches):
             }
             return list(foes)
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             assert type(point) == Point
             if (
@@ -622,7 +624,7 @@ class ArgoverseMap(RoadMapWithCaches):
                 neighboring_lanes.append((lane, d))
         return neighboring_lanes
 
-    @lru_cache(maxsize=1024)
+    @cache(maxsize=1024)
     def nearest_lanes(
         self,
         point: Point,
@@ -635,7 +637,22 @@ class ArgoverseMap(RoadMapWithCaches):
         candidate_lanes.sort(key=lambda lane_dist_tup: lane_dist_tup[1])
         return candidate_lanes
 
-    @lru_cache(maxsize=16)
+    @cached_property
+    def _lane_shape_index(self) -> ShapeIndex:
+        lanes = list(self._lanes.values())
+        return ShapeIndex(lanes, [lane.shape() for lane in lanes])
+
+    def nearest_lanes_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions: bool = False,
+    ) -> List[List[Tuple[RoadMapWithCaches.Lane, float]]]:
+        if radius is None:
+            radius = 5
+        return self._lane_shape_index.near_points(points, radius)
+
+    @cache(maxsize=16)
     def road_with_point(self, point: Point) -> Optional[RoadMap.Road]:
         radius = 5
         for nl, dist in self.nearest_lanes(point, radius):
@@ -714,7 +731,7 @@ class ArgoverseMap(RoadMapWithCaches):
                 }
             )
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_roads_at_point(self, point: Point) -> List[RoadMap.Road]:
             result = []
             for lane in self.lanes:
@@ -737,7 +754,7 @@ class ArgoverseMap(RoadMapWithCaches):
         def lane_at_index(self, index: int) -> RoadMap.Lane:
             return self.lanes[index]
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             if (
                 self._bbox.min_pt.x <= point[0] <= self._bbox.max_pt.x
@@ -748,7 +765,7 @@ class ArgoverseMap(RoadMapWithCaches):
                         return True
             return False
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -942,7 +959,9 @@ class ArgoverseMap(RoadMapWithCaches):
     @cached_property
     def _lanepoints(self):
         assert self._map_spec.lanepoint_spacing > 0
-        return LanePoints.from_argoverse(self, spacing=self._map_spec.lanepoint_spacing)
+        return LanePoints.from_cache(
+            self, self._map_spec.lanepoint_spacing, LanePoints.from_argoverse
+        )
 
     def _resolve_in_junction(self, junction_lane: RoadMap.Lane) -> List[List[str]]:
         # There are no paths we can trace back through the junction, so return
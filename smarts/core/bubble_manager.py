@@ -20,14 +20,15 @@
 import logging
 import math
 from collections import defaultdict
-from copy import deepcopy
 from dataclasses import dataclass
 from enum import Enum
 from functools import lru_cache
 from sys import maxsize
 from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
 
-from shapely.affinity import rotate, translate
+import numpy as np
+import shapely
+from shapely.affinity import affine_transform
 from shapely.geometry import CAP_STYLE, JOIN_STYLE, Point, Polygon
 
 from smarts.core.actor_capture_manager import ActorCaptureManager
@@ -237,6 +238,33 @@ class Bubble:
         in_bubble = position.within(self._cached_inner_geometry)
         return in_bubble, in_airlock and not in_bubble
 
+    def in_bubble_or_airlock_xy(
+        self, x: np.ndarray, y: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Test many positions at once, see :meth:`in_bubble_or_airlock`.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+                Boolean arrays of the positions within the bubble and of the positions
+                only within the airlock.
+        """
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        # Preparing is a no-op for geometries that are already prepared
+        shapely.prepare(self._cached_airlock_geometry)
+        in_airlock = shapely.contains_xy(self._cached_airlock_geometry, x, y)
+        in_bubble = np.zeros_like(in_airlock)
+        if in_airlock.any():
+            shapely.prepare(self._cached_inner_geometry)
+            in_bubble[in_airlock] = shapely.contains_xy(
+                self._cached_inner_geometry, x[in_airlock], y[in_airlock]
+            )
+        return in_bubble, in_airlock & ~in_bubble
+
+    @property
+    def reach(self) -> float:
+        """The radius of a circle around the centroid that contains the airlock."""
+        return self.radius + self._bubble.margin
+
     @property
     def is_travelling(self):
         """If the bubble is following an actor."""
@@ -251,23 +279,30 @@ class Bubble:
             return
 
         x, y, _ = vehicle.position
+        heading = float(vehicle.heading)
+
+        # The follow offset is given in "vehicle coordinate space"
+        offset_x, offset_y = self._bubble.follow_offset
+        target_x = x + math.cos(heading) * offset_x - math.sin(heading) * offset_y
+        target_y = y + math.sin(heading) * offset_x + math.cos(heading) * offset_y
+        cos = math.cos(heading - self._bubble_heading)
+        sin = math.sin(heading - self._bubble_heading)
 
         def _transform(geom):
+            # Rotate about the centroid by the change in heading and move the centroid
+            # to the target, as a single affine transform.
             centroid = geom.centroid
-
-            # Bring back to origin
-            geom = translate(geom, xoff=-centroid.x, yoff=-centroid.y)
-            geom = rotate(geom, -self._bubble_heading, "centroid", use_radians=True)
-
-            # Now apply new transformation in "vehicle coordinate space"
-            geom = translate(
+            return affine_transform(
                 geom,
-                xoff=self._bubble.follow_offset[0],
-                yoff=self._bubble.follow_offset[1],
+                [
+                    cos,
+                    -sin,
+                    sin,
+                    cos,
+                    target_x - (cos * centroid.x - sin * centroid.y),
+                    target_y - (sin * centroid.x + cos * centroid.y),
+                ],
             )
-            geom = rotate(geom, vehicle.heading, (0, 0), use_radians=True)
-            geom = translate(geom, xoff=x, yoff=y)
-            return geom
 
         self._cached_inner_geometry = _transform(self._cached_inner_geometry)
         self._cached_airlock_geometry = _transform(self._cached_airlock_geometry)
@@ -362,6 +397,43 @@ class Cursor:
                 A set of existing cursors.
         """
         in_bubble_zone, in_airlock_zone = bubble.in_bubble_or_airlock(pos)
+        return Cursor.from_zones(
+            in_bubble_zone,
+            in_airlock_zone,
+            vehicle_id,
+            bubble,
+            index,
+            vehicle_ids_per_bubble,
+            running_cursors,
+        )
+
+    @staticmethod
+    def from_zones(
+        in_bubble_zone: bool,
+        in_airlock_zone: bool,
+        vehicle_id: str,
+        bubble: Bubble,
+        index: VehicleIndex,
+        vehicle_ids_per_bubble: Dict[Bubble, Set[str]],
+        running_cursors: Set["Cursor"],
+    ) -> "Cursor":
+        """Generate a cursor from the zones of the bubble the vehicle is in.
+        Args:
+            in_bubble_zone (bool):
+                If the vehicle is within the bubble.
+            in_airlock_zone (bool):
+                If the vehicle is only within the airlock around the bubble.
+            vehicle (Vehicle):
+                The vehicle that is to be tracked.
+            bubble (Bubble):
+                The bubble that the vehicle is interacting with.
+            index (VehicleIndex):
+                The vehicle index the vehicle is in.
+            vehicle_ids_per_bubble (Dict[Bubble, Set[str]]):
+                Bubbles associated with vehicle ids.
+            running_cursors (Set["Cursor"]):
+                A set of existing cursors.
+        """
         is_social = vehicle_id in index.social_vehicle_ids()
         is_hijacked, is_shadowed = index.vehicle_is_hijacked_or_shadowed(vehicle_id)
         is_hijack_admissible, is_airlock_admissible = bubble.admissibility(
@@ -417,13 +489,73 @@ class Cursor:
         return hash((self.vehicle_id, self.state, self.transition, self.bubble.id))
 
 
+class _BubbleGrid:
+    """A spatial hash of the bounding circles of bubbles. Each bubble is hashed into
+    the grid cells its circle, padded by the largest vehicle radius, overlaps so that a
+    vehicle only needs to be tested against the bubbles in its own cell."""
+
+    def __init__(self, bubbles: Sequence[Bubble], padding: float):
+        self._padding = padding
+        self._centroids = np.array(
+            [b.centroid for b in bubbles], dtype=np.float64
+        ).reshape(-1, 2)
+        self._reaches = np.array([b.reach for b in bubbles], dtype=np.float64)
+        padded_reaches = (self._reaches + padding)[:, np.newaxis]
+        # Each bubble overlaps at most 2x2 cells
+        self._cell_size = max(2 * float(padded_reaches.max(initial=0)), 1e-6)
+        lows = np.floor((self._centroids - padded_reaches) / self._cell_size)
+        highs = np.floor((self._centroids + padded_reaches) / self._cell_size)
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, ((low_x, low_y), (high_x, high_y)) in enumerate(
+            zip(lows.astype(int).tolist(), highs.astype(int).tolist())
+        ):
+            for cell_x in range(low_x, high_x + 1):
+                for cell_y in range(low_y, high_y + 1):
+                    self._cells[(cell_x, cell_y)].append(i)
+
+    def overlapping(
+        self, positions: np.ndarray, radii: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the vehicles whose bounding circles overlap the bounding circle of a
+        bubble.
+
+        Args:
+            positions (np.ndarray): The `(n, 2)` positions of the vehicles.
+            radii (np.ndarray): The radii of the vehicles, at most the padding.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+                The vehicle indices and the bubble indices of the overlapping pairs.
+        """
+        cells = np.floor(positions / self._cell_size).astype(int).tolist()
+        vehicle_indices, bubble_indices = [], []
+        for i, cell in enumerate(cells):
+            for j in self._cells.get(tuple(cell), ()):
+                vehicle_indices.append(i)
+                bubble_indices.append(j)
+        vehicle_indices = np.array(vehicle_indices, dtype=np.int64)
+        bubble_indices = np.array(bubble_indices, dtype=np.int64)
+
+        sq_distances = np.sum(
+            np.square(positions[vehicle_indices] - self._centroids[bubble_indices]),
+            axis=1,
+        )
+        overlaps = sq_distances <= np.square(
+            radii[vehicle_indices] + self._reaches[bubble_indices]
+        )
+        return vehicle_indices[overlaps], bubble_indices[overlaps]
+
+
 class BubbleManager(ActorCaptureManager):
     """Manages bubble interactions."""
 
     def __init__(self, bubbles: Sequence[SSBubble], road_map: RoadMap):
         self._log = logging.getLogger(self.__class__.__name__)
         self._cursors: Set[Cursor] = set()
-        self._last_vehicle_index = VehicleIndex.identity()
+        # The simulation's vehicle index as of the end of the last step, followed
+        # through its change log rather than copied.
+        self._vehicle_index: Optional[VehicleIndex] = None
+        self._vehicle_index_position = 0
         self._bubbles = [Bubble(b, road_map) for b in bubbles]
 
     @property
@@ -438,17 +570,7 @@ class BubbleManager(ActorCaptureManager):
             if not bubble.is_travelling:
                 return True
 
-            vehicles = []
-            if bubble.follow_actor_id is not None:
-                vehicles += self._last_vehicle_index.vehicles_by_owner_id(
-                    bubble.follow_actor_id
-                )
-            if bubble.follow_vehicle_id is not None:
-                vehicle = self._last_vehicle_index.vehicle_by_id(
-                    bubble.follow_vehicle_id, None
-                )
-                if vehicle is not None:
-                    vehicles += [vehicle]
+            vehicles = self._follow_vehicles(bubble)
             if len(vehicles) > 1:
                 logging.error(
                     f"bubble `{bubble.id} follows multiple vehicles: {[v.id for v in vehicles]}"
@@ -464,6 +586,29 @@ class BubbleManager(ActorCaptureManager):
                 inactive_bubbles.append(bubble)
         return active_bubbles, inactive_bubbles
 
+    def _follow_vehicles(self, bubble: Bubble) -> List[Vehicle]:
+        """The vehicles the given travelling bubble follows, ignoring vehicles added to
+        the index since the last step."""
+        if self._vehicle_index is None:
+            return []
+
+        added_vehicle_ids = self._added_vehicle_ids()
+        vehicles = []
+        if bubble.follow_actor_id is not None:
+            vehicles += self._vehicle_index.vehicles_by_owner_id(bubble.follow_actor_id)
+        if bubble.follow_vehicle_id is not None:
+            vehicle = self._vehicle_index.vehicle_by_id(bubble.follow_vehicle_id, None)
+            if vehicle is not None:
+                vehicles += [vehicle]
+        return [v for v in vehicles if v.id not in added_vehicle_ids]
+
+    def _added_vehicle_ids(self) -> Set[str]:
+        """The vehicles added to the index since the end of the last step."""
+        changes = self._vehicle_index.changes_since(self._vehicle_index_position)
+        if changes is None:
+            return self._vehicle_index.vehicle_ids()
+        return changes.added
+
     @staticmethod
     @lru_cache(maxsize=2)
     def _vehicle_ids_divided_by_bubble_state(
@@ -500,23 +645,31 @@ class BubbleManager(ActorCaptureManager):
 
     def step(self, sim):
         """Update the associations between bubbles, actors, and agents"""
+        vehicle_index: VehicleIndex = sim.vehicle_index
+        if vehicle_index is not self._vehicle_index:
+            self._vehicle_index = vehicle_index
+            # Every vehicle counts as newly added
+            self._vehicle_index_position = -1
+
         self._move_travelling_bubbles(sim)
-        self._cursors = self._sync_cursors(self._last_vehicle_index, sim.vehicle_index)
+        self._cursors = self._sync_cursors(vehicle_index)
         self._handle_transitions(sim, self._cursors)
-        self._last_vehicle_index = deepcopy(sim.vehicle_index)
 
-    def _sync_cursors(self, last_vehicle_index, vehicle_index):
+        self._vehicle_index_position = vehicle_index.change_log_position
+
+    def _sync_cursors(self, vehicle_index: VehicleIndex):
         # TODO: Not handling newly added vehicles means we require an additional step
         #       before we trigger hijacking.
-        # Newly added vehicles
-        # add_index = vehicle_index - last_vehicle_index
         # TODO: Not handling deleted vehicles at this point should be fine because we're
         #       stateless.
-        # Recently terminated vehicles
-        # del_index = last_vehicle_index - vehicle_index
 
         # Vehicles that stuck around
-        persisted_vehicle_index = vehicle_index & last_vehicle_index
+        added_vehicle_ids = self._added_vehicle_ids()
+        persisted_vehicles = [
+            vehicle
+            for vehicle_id, vehicle in vehicle_index.vehicleitems()
+            if vehicle_id not in added_vehicle_ids
+        ]
 
         # Calculate latest cursors
         vehicle_ids_per_bubble = self.vehicle_ids_per_bubble()
@@ -528,11 +681,14 @@ class BubbleManager(ActorCaptureManager):
 
         if inactive_bubbles_to_run:
             for bubble in inactive_bubbles_to_run:
-                for _, vehicle in persisted_vehicle_index.vehicleitems():
+                # Only vehicles that were in the bubble can exit it
+                for vehicle in persisted_vehicles:
+                    if vehicle.id not in vehicle_ids_per_bubble[bubble]:
+                        continue
                     cursor = Cursor.for_removed(
                         vehicle_id=vehicle.id,
                         bubble=bubble,
-                        index=persisted_vehicle_index,
+                        index=vehicle_index,
                         vehicle_ids_per_bubble=vehicle_ids_per_bubble,
                     )
                     if cursor.transition not in (BubbleTransition.AirlockExited,):
@@ -542,33 +698,61 @@ class BubbleManager(ActorCaptureManager):
         if not active_bubbles:
             return cursors
 
-        for _, vehicle in persisted_vehicle_index.vehicleitems():
-            # XXX: Turns out Shapely Point(...) creation is very expensive (~0.02ms) which
-            #      when inside of a loop x large number of vehicles makes a big
-            #      performance hit.
-            point = vehicle.pose.point
-            v_radius = math.sqrt(
-                vehicle.width * vehicle.width + vehicle.length * vehicle.length
-            )
+        if not persisted_vehicles:
+            return cursors
 
-            for bubble in active_bubbles:
-                was_in_this_bubble = vehicle_ids_per_bubble[bubble]
-                sq_distance = (point.x - bubble.centroid[0]) * (
-                    point.x - bubble.centroid[0]
-                ) + (point.y - bubble.centroid[1]) * (point.y - bubble.centroid[1])
-
-                if vehicle.id in was_in_this_bubble or sq_distance <= pow(
-                    v_radius + bubble.radius + bubble._bubble.margin, 2
-                ):
-                    cursor = Cursor.from_pos(
-                        pos=point.as_shapely,
-                        vehicle_id=vehicle.id,
-                        bubble=bubble,
-                        index=persisted_vehicle_index,
-                        vehicle_ids_per_bubble=vehicle_ids_per_bubble,
-                        running_cursors=cursors,
-                    )
-                    cursors.add(cursor)
+        # XXX: Turns out Shapely Point(...) creation is very expensive (~0.02ms) which
+        #      when inside of a loop x large number of vehicles makes a big
+        #      performance hit. Positions are instead tested in batches.
+        positions = np.array(
+            [vehicle.position[:2] for vehicle in persisted_vehicles], dtype=np.float64
+        )
+        radii = np.array(
+            [math.hypot(v.width, v.length) for v in persisted_vehicles],
+            dtype=np.float64,
+        )
+        grid = _BubbleGrid(active_bubbles, padding=float(radii.max()))
+        vehicle_indices, bubble_indices = grid.overlapping(positions, radii)
+        pairs = set(zip(vehicle_indices.tolist(), bubble_indices.tolist()))
+
+        # Vehicles that were in a bubble are always tested so they can exit it
+        persisted_vehicle_indices = {
+            vehicle.id: i for i, vehicle in enumerate(persisted_vehicles)
+        }
+        for j, bubble in enumerate(active_bubbles):
+            for vehicle_id in vehicle_ids_per_bubble[bubble]:
+                i = persisted_vehicle_indices.get(vehicle_id)
+                if i is not None:
+                    pairs.add((i, j))
+
+        # Exact zone tests, batched per bubble
+        vehicle_indices_per_bubble = defaultdict(list)
+        for i, j in pairs:
+            vehicle_indices_per_bubble[j].append(i)
+        zones = {}
+        for j, indices in vehicle_indices_per_bubble.items():
+            in_bubble, in_airlock = active_bubbles[j].in_bubble_or_airlock_xy(
+                positions[indices, 0], positions[indices, 1]
+            )
+            for i, in_bubble_zone, in_airlock_zone in zip(
+                indices, in_bubble.tolist(), in_airlock.tolist()
+            ):
+                zones[(i, j)] = (in_bubble_zone, in_airlock_zone)
+
+        # Cursors are created in vehicle then bubble order because the admissibility
+        # of each depends on the cursors created before it.
+        for i, j in sorted(pairs):
+            in_bubble_zone, in_airlock_zone = zones[(i, j)]
+            cursor = Cursor.from_zones(
+                in_bubble_zone=in_bubble_zone,
+                in_airlock_zone=in_airlock_zone,
+                vehicle_id=persisted_vehicles[i].id,
+                bubble=active_bubbles[j],
+                index=vehicle_index,
+                vehicle_ids_per_bubble=vehicle_ids_per_bubble,
+                running_cursors=cursors,
+            )
+            cursors.add(cursor)
 
         return cursors
 
@@ -600,19 +784,7 @@ class BubbleManager(ActorCaptureManager):
             if not bubble.is_travelling:
                 continue
 
-            vehicles = []
-            # XXX: Using a vehicle reference through the `_last_vehicle_index` is a
-            # XXX clear error since it can reference out of date vehicles.
-            if bubble.follow_actor_id is not None:
-                vehicles += self._last_vehicle_index.vehicles_by_owner_id(
-                    bubble.follow_actor_id
-                )
-            if bubble.follow_vehicle_id is not None:
-                vehicle = self._last_vehicle_index.vehicle_by_id(
-                    bubble.follow_vehicle_id, None
-                )
-                if vehicle is not None:
-                    vehicles += [vehicle]
+            vehicles = self._follow_vehicles(bubble)
             assert (
                 len(vehicles) <= 1
             ), "Travelling bubbles only support pinning to a single vehicle"
@@ -757,3 +929,4 @@ class BubbleManager(ActorCaptureManager):
         """Clean up internal state."""
         self._cursors = set()
         self._bubbles = []
+        self._vehicle_index = None
@@ -22,7 +22,7 @@ import logging
 import math
 import os
 from functools import cached_property
-from typing import Optional, Sequence, Tuple
+from typing import Dict, Optional, Sequence, Set, Tuple
 
 import numpy as np
 import yaml
@@ -57,10 +57,15 @@ with open(controller_filepath, "r") as controller_file:
     DEFAULT_CONTROLLER_PARAMETERS = yaml.safe_load(controller_file)["sedan"]
 
 
+# Give 0.05 meter leeway
+_CONTACT_LEEWAY = 0.05
+# Extra margin for broadphase candidate pairs, these are confirmed by `getClosestPoints`
+_BROADPHASE_MARGIN = 0.5
+
+
 def _query_bullet_contact_points(bullet_client, bullet_id, link_index):
     contact_objects = set()
-    # Give 0.05 meter leeway
-    LEEWAY = 0.05
+    LEEWAY = _CONTACT_LEEWAY
 
     # `getContactPoints` does not pick up collisions well so we cast a fast box check on the physics
     min_, max_ = bullet_client.getAABB(bullet_id, link_index)
@@ -85,6 +90,52 @@ def _query_bullet_contact_points(bullet_client, bullet_id, link_index):
     return contact_points
 
 
+def contacting_bullet_ids(
+    bullet_client, chassis: Sequence["Chassis"]
+) -> Dict[int, Set[int]]:
+    """Find which of the given chassis are in contact with each other. Candidate pairs are
+    found with a single sweep over the bounding boxes of all of the chassis and then
+    confirmed with one closest point query per pair.
+
+    Args:
+        bullet_client: The physics client.
+        chassis (Sequence[Chassis]): The chassis to test against each other.
+
+    Returns:
+        Dict[int, Set[int]]:
+            The bullet ids of the chassis that each chassis is touching. Chassis without
+            contacts are not included.
+    """
+    contacts: Dict[int, Set[int]] = {}
+    if len(chassis) < 2:
+        return contacts
+
+    bullet_ids = [c.bullet_id for c in chassis]
+    aabbs = np.array([c.contact_aabb for c in chassis], dtype=np.float64)
+    mins = aabbs[:, 0] - _BROADPHASE_MARGIN
+    maxs = aabbs[:, 1] + _BROADPHASE_MARGIN
+
+    # Sweep along x: only boxes that start before this box ends can overlap it.
+    order = np.argsort(mins[:, 0], kind="stable")
+    sorted_min_x = mins[order, 0]
+    ends = np.searchsorted(sorted_min_x, maxs[order, 0], side="right")
+    for position, i in enumerate(order):
+        candidates = order[position + 1 : ends[position]]
+        if not len(candidates):
+            continue
+        overlapping = candidates[
+            np.all(mins[candidates, 1:] <= maxs[i, 1:], axis=1)
+            & np.all(maxs[candidates, 1:] >= mins[i, 1:], axis=1)
+        ]
+        for j in overlapping:
+            if bullet_client.getClosestPoints(
+                bullet_ids[i], bullet_ids[j], distance=_CONTACT_LEEWAY
+            ):
+                contacts.setdefault(bullet_ids[i], set()).add(bullet_ids[j])
+                contacts.setdefault(bullet_ids[j], set()).add(bullet_ids[i])
+    return contacts
+
+
 class Chassis:
     """Represents a vehicle chassis."""
 
@@ -110,6 +161,11 @@ class Chassis:
         """The contact point of the chassis."""
         raise NotImplementedError
 
+    @property
+    def contact_aabb(self) -> Tuple[Sequence[float], Sequence[float]]:
+        """The axis aligned bounding box, as (min, max), used to search for contacts."""
+        raise NotImplementedError
+
     @property
     def bullet_id(self) -> str:
         """The physics id of the chassis physics body."""
@@ -268,6 +324,10 @@ class BoxChassis(Chassis):
             for p in contact_points
         ]
 
+    @property
+    def contact_aabb(self):
+        return self._client.getAABB(self.bullet_id, -1)
+
     @property
     def bullet_id(self) -> str:
         return self._bullet_body._bullet_id
@@ -595,6 +655,10 @@ class AckermannChassis(Chassis):
             for p in contact_points
         ]
 
+    @property
+    def contact_aabb(self):
+        return self._client.getAABB(self._bullet_id, 0)
+
     @cached_property
     def mass_and_inertia(self):
         """The mass and inertia values of this chassis."""
@@ -0,0 +1,481 @@
+# Copyright (C) 2023. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import json
+import math
+import os
+import struct
+from operator import itemgetter
+from typing import Dict, Generator, Iterable, Optional, Tuple
+
+import numpy as np
+
+from smarts.core.traffic_history import TrafficHistory, TrafficHistoryBackend
+
+COLUMNAR_TRAFFIC_HISTORY_MAGIC = b"SMARTS-COLUMNAR\x00"
+"""The first bytes of a columnar traffic history file."""
+COLUMNAR_TRAFFIC_HISTORY_VERSION = 1
+"""The version of the columnar traffic history file format."""
+
+_HEADER_SIZE = struct.Struct("<Q")
+_ALIGNMENT = 64
+
+_TRAJECTORY_COLUMNS = TrafficHistory.TrajectoryColumns._fields
+_WINDOW_START_TIME = TrafficHistory.TrafficHistoryVehicleWindow._fields.index(
+    "start_time"
+)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _optional(value: float) -> Optional[float]:
+    """Null values are stored as `nan`."""
+    return None if math.isnan(value) else value
+
+
+class ColumnarTrafficHistoryBackend(TrafficHistoryBackend):
+    """A traffic history stored as columns in a single memory mapped file. Processes
+    replaying the same file share its pages through the operating system instead of
+    each keeping a database page cache.
+
+    The file starts with :data:`COLUMNAR_TRAFFIC_HISTORY_MAGIC`, the size of a JSON
+    header and the header, which holds the dataset specification and the dtype, shape,
+    and offset of every column. The columns follow, aligned to 64 bytes:
+
+    - vehicle columns sorted by vehicle id.
+    - a summary of each vehicle's trajectory sorted by vehicle id: the first and last
+      seen times, final position, average speed, the range of its rows in
+      `by_vehicle`, and the index of its vehicle columns.
+    - trajectory columns sorted by time and partitioned into `partition_seconds` long
+      time partitions, whose first rows are in `partition_offsets`.
+    - `by_vehicle`, the trajectory rows sorted by vehicle id and time.
+    - traffic light state columns sorted by time.
+
+    Use :meth:`write` to create a file from another backend.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._header: Optional[Dict] = None
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+
+    @staticmethod
+    def is_columnar_header(header: bytes) -> bool:
+        """If the first bytes of a file are those of a columnar traffic history."""
+        return header.startswith(COLUMNAR_TRAFFIC_HISTORY_MAGIC)
+
+    @staticmethod
+    def write(
+        source: TrafficHistoryBackend,
+        output_path: str,
+        partition_seconds: float = 10.0,
+    ):
+        """Write the traffic history of another backend to a columnar traffic history
+        file.
+
+        Args:
+            source (TrafficHistoryBackend): The traffic history to write.
+            output_path (str): The file to write.
+            partition_seconds (float): The history time covered by each partition.
+        """
+        assert partition_seconds > 0, "partition_seconds should be positive"
+        columns: Dict[str, np.ndarray] = {}
+
+        trajectories = source.trajectory_columns_between(-math.inf, math.inf)
+        by_time = np.lexsort((trajectories.vehicle_id, trajectories.sim_time))
+        for name, column in zip(_TRAJECTORY_COLUMNS, trajectories):
+            columns[name] = column[by_time]
+        sim_time = columns["sim_time"]
+        start_time = float(sim_time[0]) if len(sim_time) else 0.0
+        partitions = np.floor((sim_time - start_time) / partition_seconds)
+        partition_count = int(partitions[-1]) + 1 if len(sim_time) else 1
+        columns["partition_offsets"] = np.searchsorted(
+            partitions, np.arange(partition_count + 1), side="left"
+        )
+
+        by_vehicle = np.lexsort((sim_time, columns["vehicle_id"]))
+        columns["by_vehicle"] = by_vehicle
+        speed_sums = np.zeros(len(by_vehicle) + 1)
+        np.cumsum(columns["speed"][by_vehicle], out=speed_sums[1:])
+        columns["by_vehicle_speed_sum"] = speed_sums
+
+        attributes = sorted(source.vehicle_attributes())
+        ids = np.array([row[0] for row in attributes], dtype=np.int64)
+
+        def nullable(field: int) -> np.ndarray:
+            return np.array(
+                [np.nan if row[field] is None else row[field] for row in attributes],
+                dtype=np.float64,
+            )
+
+        columns["vehicles.id"] = ids
+        columns["vehicles.type"] = np.array(
+            [row[1] for row in attributes], dtype=np.int64
+        )
+        columns["vehicles.length"] = nullable(2)
+        columns["vehicles.width"] = nullable(3)
+        columns["vehicles.height"] = nullable(4)
+        columns["vehicles.is_ego"] = ids == source.ego_vehicle_id()
+
+        # A summary of each vehicle's trajectory, which may not have a vehicle row
+        summary_ids, first = np.unique(
+            columns["vehicle_id"][by_vehicle], return_index=True
+        )
+        end = np.append(first[1:], len(by_vehicle)).astype(first.dtype)
+        first_row, last_row = by_vehicle[first], by_vehicle[end - 1]
+        vehicle_indices = np.searchsorted(ids, summary_ids)
+        has_vehicle = vehicle_indices < len(ids)
+        has_vehicle[has_vehicle] = (
+            ids[vehicle_indices[has_vehicle]] == summary_ids[has_vehicle]
+        )
+        columns["summary.vehicle_id"] = summary_ids
+        columns["summary.vehicle_index"] = np.where(has_vehicle, vehicle_indices, -1)
+        columns["summary.rows_start"] = first
+        columns["summary.rows_end"] = end
+        columns["summary.first_seen"] = sim_time[first_row]
+        columns["summary.last_seen"] = sim_time[last_row]
+        columns["summary.final_position_x"] = columns["position_x"][last_row]
+        columns["summary.final_position_y"] = columns["position_y"][last_row]
+        columns["summary.average_speed"] = (speed_sums[end] - speed_sums[first]) / (
+            end - first
+        )
+
+        lights = list(source.traffic_light_states_between(-math.inf, math.inf))
+        light_columns = np.array(lights, dtype=np.float64).reshape(-1, 5).T
+        columns["lights.sim_time"] = light_columns[0]
+        columns["lights.state"] = light_columns[1].astype(np.int64)
+        columns["lights.stop_point_x"] = light_columns[2]
+        columns["lights.stop_point_y"] = light_columns[3]
+        columns["lights.lane"] = light_columns[4].astype(np.int64)
+
+        header = {
+            "version": COLUMNAR_TRAFFIC_HISTORY_VERSION,
+            "spec": source.spec(),
+            "start_time": start_time,
+            "partition_seconds": partition_seconds,
+            "columns": {},
+        }
+        offset = 0
+        for name, column in columns.items():
+            column = np.ascontiguousarray(column, dtype=column.dtype.newbyteorder("<"))
+            columns[name] = column
+            header["columns"][name] = {
+                "dtype": column.dtype.str,
+                "shape": column.shape,
+                "offset": offset,
+            }
+            offset = _aligned(offset + column.nbytes)
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = _aligned(
+            len(COLUMNAR_TRAFFIC_HISTORY_MAGIC) + _HEADER_SIZE.size + len(header_bytes)
+        )
+
+        with open(output_path, "wb") as output:
+            output.write(COLUMNAR_TRAFFIC_HISTORY_MAGIC)
+            output.write(_HEADER_SIZE.pack(len(header_bytes)))
+            output.write(header_bytes)
+            for name, column in columns.items():
+                output.seek(data_start + header["columns"][name]["offset"])
+                output.write(column.tobytes())
+            output.truncate(data_start + offset)
+
+    def _load(self):
+        if self._columns is not None:
+            return
+        buffer = np.memmap(os.fspath(self._path), dtype=np.uint8, mode="r")
+        magic_size = len(COLUMNAR_TRAFFIC_HISTORY_MAGIC)
+        (header_size,) = _HEADER_SIZE.unpack_from(buffer, magic_size)
+        header_start = magic_size + _HEADER_SIZE.size
+        header = json.loads(bytes(buffer[header_start : header_start + header_size]))
+        assert (
+            header["version"] <= COLUMNAR_TRAFFIC_HISTORY_VERSION
+        ), f"unsupported columnar traffic history version {header['version']}"
+        data_start = _aligned(header_start + header_size)
+        columns = {}
+        for name, column in header["columns"].items():
+            dtype = np.dtype(column["dtype"])
+            count = int(np.prod(column["shape"]))
+            columns[name] = np.frombuffer(
+                buffer, dtype, count=count, offset=data_start + column["offset"]
+            ).reshape(column["shape"])
+        self._header, self._columns = header, columns
+
+    @property
+    def _data(self) -> Dict[str, np.ndarray]:
+        self._load()
+        return self._columns
+
+    def _time_index(self, sim_time: float, side: str) -> int:
+        """The index of the first trajectory row at (`side="left"`) or after
+        (`side="right"`) the given time, searched within its time partition."""
+        offsets = self._data["partition_offsets"]
+        partition = (sim_time - self._header["start_time"]) / self._header[
+            "partition_seconds"
+        ]
+        partition = int(min(max(partition, 0), len(offsets) - 2))
+        start, end = int(offsets[partition]), int(offsets[partition + 1])
+        return start + int(
+            np.searchsorted(self._data["sim_time"][start:end], sim_time, side=side)
+        )
+
+    @staticmethod
+    def _index_of(ids: np.ndarray, vehicle_id) -> Optional[int]:
+        vehicle_id = int(vehicle_id)
+        index = int(np.searchsorted(ids, vehicle_id))
+        if index < len(ids) and ids[index] == vehicle_id:
+            return index
+        return None
+
+    def _vehicle_index(self, vehicle_id) -> Optional[int]:
+        return self._index_of(self._data["vehicles.id"], vehicle_id)
+
+    def _summary_index(self, vehicle_id) -> Optional[int]:
+        return self._index_of(self._data["summary.vehicle_id"], vehicle_id)
+
+    def _summary_rows(self, index: int) -> np.ndarray:
+        """The trajectory rows of a summarized vehicle in time order."""
+        c = self._data
+        start, end = c["summary.rows_start"][index], c["summary.rows_end"][index]
+        return c["by_vehicle"][start:end]
+
+    def _vehicle_rows(self, vehicle_id) -> np.ndarray:
+        """The trajectory rows of a vehicle in time order."""
+        index = self._summary_index(vehicle_id)
+        if index is None:
+            return self._data["by_vehicle"][:0]
+        return self._summary_rows(index)
+
+    def _vehicle_summary(self, vehicle_id, name: str) -> Optional[float]:
+        index = self._summary_index(vehicle_id)
+        if index is None:
+            return None
+        return float(self._data[f"summary.{name}"][index])
+
+    def _vehicle_fields(self, index: int) -> Tuple:
+        c = self._data
+        return (
+            int(c["vehicles.id"][index]),
+            int(c["vehicles.type"][index]),
+            _optional(float(c["vehicles.length"][index])),
+            _optional(float(c["vehicles.width"][index])),
+            _optional(float(c["vehicles.height"][index])),
+        )
+
+    def _window(self, index: int, rows: np.ndarray, average_speed: float) -> Tuple:
+        c = self._data
+        first, last = rows[0], rows[-1]
+        return (
+            *self._vehicle_fields(index),
+            float(c["position_x"][first]),
+            float(c["position_y"][first]),
+            float(c["heading_rad"][first]),
+            float(c["speed"][first]),
+            average_speed,
+            float(c["sim_time"][first]),
+            float(c["sim_time"][last]),
+            float(c["position_x"][last]),
+            float(c["position_y"][last]),
+            float(c["heading_rad"][last]),
+        )
+
+    def spec(self) -> Dict[str, str]:
+        self._load()
+        return dict(self._header["spec"])
+
+    def spec_value(self, key: str) -> Optional[str]:
+        self._load()
+        return self._header["spec"].get(key)
+
+    def all_vehicle_ids(self) -> Iterable[int]:
+        return iter(self._data["vehicles.id"].tolist())
+
+    def ego_vehicle_id(self) -> Optional[int]:
+        ego_ids = self._data["vehicles.id"][self._data["vehicles.is_ego"]]
+        return int(ego_ids[0]) if len(ego_ids) else None
+
+    def vehicle_attributes(self) -> Iterable[Tuple]:
+        return (self._vehicle_fields(i) for i in range(len(self._data["vehicles.id"])))
+
+    def vehicle_type(self, vehicle_id: str) -> Optional[int]:
+        index = self._vehicle_index(vehicle_id)
+        return None if index is None else int(self._data["vehicles.type"][index])
+
+    def vehicle_dims(self, vehicle_id: str) -> Optional[Tuple]:
+        index = self._vehicle_index(vehicle_id)
+        if index is None:
+            return None
+        _, vehicle_type, length, width, height = self._vehicle_fields(index)
+        return length, width, height, vehicle_type
+
+    def vehicle_initial_time(self, vehicle_id: str) -> Optional[float]:
+        return self._vehicle_summary(vehicle_id, "first_seen")
+
+    def vehicle_final_exit_time(self, vehicle_id: str) -> Optional[float]:
+        return self._vehicle_summary(vehicle_id, "last_seen")
+
+    def vehicle_final_position(self, vehicle_id: str) -> Optional[Tuple]:
+        x = self._vehicle_summary(vehicle_id, "final_position_x")
+        if x is None:
+            return None
+        return x, self._vehicle_summary(vehicle_id, "final_position_y")
+
+    def _passenger_cars_seen(self) -> np.ndarray:
+        """Which summarized vehicles are passenger cars."""
+        c = self._data
+        vehicle_index = c["summary.vehicle_index"]
+        return (vehicle_index >= 0) & (c["vehicles.type"][vehicle_index] == 2)
+
+    def first_seen_times(self) -> Iterable[Tuple]:
+        cars = self._passenger_cars_seen()
+        return zip(
+            self._data["summary.vehicle_id"][cars].tolist(),
+            self._data["summary.first_seen"][cars].tolist(),
+        )
+
+    def last_seen_vehicle_time(self) -> Optional[float]:
+        last_seen = self._data["summary.last_seen"][self._passenger_cars_seen()]
+        return float(last_seen.max()) if len(last_seen) else None
+
+    def vehicle_pose_at_time(self, vehicle_id: str, sim_time: float) -> Optional[Tuple]:
+        rows = self._vehicle_rows(vehicle_id)
+        times = self._data["sim_time"][rows]
+        index = int(np.searchsorted(times, sim_time))
+        if index == len(rows) or times[index] != sim_time:
+            return None
+        row = rows[index]
+        return tuple(
+            float(self._data[name][row])
+            for name in ("position_x", "position_y", "heading_rad", "speed")
+        )
+
+    def _vehicle_indices(
+        self, vehicle_ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The vehicle table indices of the given ids and which of the ids exist."""
+        ids = self._data["vehicles.id"]
+        if not len(ids):
+            return np.zeros_like(vehicle_ids), np.zeros(len(vehicle_ids), dtype=bool)
+        indices = np.minimum(np.searchsorted(ids, vehicle_ids), len(ids) - 1)
+        return indices, ids[indices] == vehicle_ids
+
+    def vehicle_ids_active_between(
+        self, start_time: float, end_time: float
+    ) -> Iterable[Tuple]:
+        start = self._time_index(start_time, "left")
+        end = self._time_index(end_time, "right")
+        vehicle_ids = np.unique(self._data["vehicle_id"][start:end])
+        indices, exists = self._vehicle_indices(vehicle_ids)
+        cars = exists & (self._data["vehicles.type"][indices] == 2)
+        return ((vehicle_id,) for vehicle_id in vehicle_ids[cars].tolist())
+
+    def vehicles_active_between(
+        self, start_time: float, end_time: float
+    ) -> Generator[Tuple, None, None]:
+        start = self._time_index(start_time, "right")
+        end = self._time_index(end_time, "right")
+        rows = np.arange(end - 1, start - 1, -1)
+        indices, exists = self._vehicle_indices(self._data["vehicle_id"][rows])
+        for row, index in zip(rows[exists].tolist(), indices[exists].tolist()):
+            yield (
+                *self._vehicle_fields(index),
+                float(self._data["position_x"][row]),
+                float(self._data["position_y"][row]),
+                float(self._data["heading_rad"][row]),
+                float(self._data["speed"][row]),
+            )
+
+    def trajectory_columns_between(
+        self, start_time: float, end_time: float
+    ) -> TrafficHistory.TrajectoryColumns:
+        start = self._time_index(start_time, "right")
+        end = self._time_index(end_time, "right")
+        return TrafficHistory.TrajectoryColumns(
+            *(self._data[name][start:end] for name in _TRAJECTORY_COLUMNS)
+        )
+
+    def traffic_light_states_between(
+        self, start_time: float, end_time: float
+    ) -> Iterable[Tuple]:
+        sim_time = self._data["lights.sim_time"]
+        start, end = np.searchsorted(sim_time, (start_time, end_time), side="right")
+        return zip(
+            sim_time[start:end].tolist(),
+            self._data["lights.state"][start:end].tolist(),
+            self._data["lights.stop_point_x"][start:end].tolist(),
+            self._data["lights.stop_point_y"][start:end].tolist(),
+            self._data["lights.lane"][start:end].tolist(),
+        )
+
+    def vehicle_window_by_id(self, vehicle_id: str) -> Optional[Tuple]:
+        index = self._summary_index(vehicle_id)
+        if index is None or self._data["summary.vehicle_index"][index] < 0:
+            return None
+        return self._window(
+            self._data["summary.vehicle_index"][index],
+            self._summary_rows(index),
+            float(self._data["summary.average_speed"][index]),
+        )
+
+    def vehicle_windows_in_range(
+        self,
+        exists_at_or_after: float,
+        ends_before: float,
+        minimum_vehicle_window: float,
+    ) -> Iterable[Tuple]:
+        c = self._data
+        candidates = np.flatnonzero(
+            (c["summary.last_seen"] >= exists_at_or_after)
+            & (c["summary.first_seen"] < ends_before)
+            & (c["summary.vehicle_index"] >= 0)
+        )
+        speed_sums = c["by_vehicle_speed_sum"]
+        windows = []
+        for index in candidates.tolist():
+            start = c["summary.rows_start"][index]
+            times = c["sim_time"][self._summary_rows(index)]
+            first, last = start + np.searchsorted(
+                times, (exists_at_or_after, ends_before), side="left"
+            )
+            if last <= first:
+                continue
+            rows = c["by_vehicle"][first:last]
+            if (
+                c["sim_time"][rows[-1]] - c["sim_time"][rows[0]]
+                < minimum_vehicle_window
+            ):
+                continue
+            average_speed = float(
+                (speed_sums[last] - speed_sums[first]) / (last - first)
+            )
+            windows.append(
+                self._window(c["summary.vehicle_index"][index], rows, average_speed)
+            )
+        windows.sort(key=itemgetter(_WINDOW_START_TIME))
+        return windows
+
+    def vehicle_trajectory(self, vehicle_id: str) -> Iterable[Tuple]:
+        rows = self._vehicle_rows(vehicle_id)
+        return zip(
+            *(
+                self._data[name][rows].tolist()
+                for name in ("position_x", "position_y", "heading_rad", "speed")
+            )
+        )
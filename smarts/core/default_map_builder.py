@@ -18,38 +18,170 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import gc
 import os
 import sys
-from typing import NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Tuple
 
+import numpy as np
+import psutil
+
+from smarts.core.coordinates import Point
 from smarts.core.road_map import RoadMap
 from smarts.core.utils.file import file_md5_hash, path2hash
 
-_existing_map = None
 
+class _RoadMapInfo(NamedTuple):
+    map_spec: Any
+    obj: RoadMap
+    map_hash: str
+    nbytes: int
+
+
+class RoadMapCacheStats(NamedTuple):
+    """Usage statistics of a :class:`RoadMapCache`."""
+
+    hits: int
+    """The number of lookups that found a cached road map."""
+    misses: int
+    """The number of lookups that did not find a cached road map."""
+    evictions: int
+    """The number of road maps that were dropped to stay within the bounds."""
+    size: int
+    """The number of cached road maps."""
+    nbytes: int
+    """The estimated memory used by the cached road maps in bytes."""
+
+
+class RoadMapCache:
+    """A least recently used cache of road maps which is bounded by both the number of
+    maps and their estimated memory use. The most recently used map is always kept.
+
+    Args:
+        max_maps (int): The maximum number of road maps to keep.
+        max_bytes (int): The maximum estimated memory use of the kept road maps.
+    """
 
-def _cache_result(map_spec, road_map, road_map_hash: str):
-    global _existing_map
-    from smarts.sstudio.types import MapSpec
+    def __init__(self, max_maps: int, max_bytes: int) -> None:
+        self._max_maps = max(1, max_maps)
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[int, _RoadMapInfo]" = OrderedDict()
+        self._next_key = 0
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
 
-    class _RoadMapInfo(NamedTuple):
-        map_spec: MapSpec  # pytype: disable=invalid-annotation
-        obj: RoadMap
-        map_hash: str
+    def get(self, map_class: type, map_spec) -> Optional[Tuple[RoadMap, str]]:
+        """Finds the cached road map of the given type that matches the map spec.
 
-    _existing_map = _RoadMapInfo(map_spec, road_map, road_map_hash)
+        Returns:
+            Optional[Tuple[RoadMap, str]]: The road map and its hash if it is cached.
+        """
+        for key, info in self._entries.items():
+            if isinstance(info.obj, map_class) and info.obj.is_same_map(map_spec):
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return info.obj, info.map_hash
+        self._misses += 1
+        return None
 
+    def put(self, map_spec, road_map: RoadMap, road_map_hash: str, nbytes: int):
+        """Adds a road map as the most recently used map, evicting the least recently
+        used maps that no longer fit."""
+        self._entries[self._next_key] = _RoadMapInfo(
+            map_spec, road_map, road_map_hash, nbytes
+        )
+        self._next_key += 1
+        self._nbytes += nbytes
 
-def _clear_cache():
-    global _existing_map
-    if _existing_map:
-        import gc
+        evicted = False
+        while len(self._entries) > 1 and (
+            len(self._entries) > self._max_maps or self._nbytes > self._max_bytes
+        ):
+            _, info = self._entries.popitem(last=False)
+            self._nbytes -= info.nbytes
+            self._evictions += 1
+            evicted = True
+        if evicted:
+            gc.collect()
 
-        # Try to only keep one map around at a time...
-        del _existing_map
-        _existing_map = None
+    def clear(self):
+        """Drops all cached road maps."""
+        if not self._entries:
+            return
+        self._entries.clear()
+        self._nbytes = 0
         gc.collect()
 
+    @property
+    def stats(self) -> RoadMapCacheStats:
+        """The usage statistics of this cache."""
+        return RoadMapCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=len(self._entries),
+            nbytes=self._nbytes,
+        )
+
+
+_road_map_cache: Optional[RoadMapCache] = None
+
+
+def road_map_cache() -> RoadMapCache:
+    """The road map cache used by :func:`get_road_map`. It is bounded by the engine
+    `core:map_cache_max_maps` and `core:map_cache_max_bytes` configuration."""
+    global _road_map_cache
+    if _road_map_cache is None:
+        from smarts.core import config
+
+        _road_map_cache = RoadMapCache(
+            max_maps=config()("core", "map_cache_max_maps", default=4, cast=int),
+            max_bytes=config()(
+                "core", "map_cache_max_bytes", default=2 * 1024**3, cast=int
+            ),
+        )
+    return _road_map_cache
+
+
+def compute_road_map_hash(source: str) -> str:
+    """Generates the hash that identifies the road map built from the given source.
+    The hash of a file is computed once per process until the file changes."""
+    if os.path.isfile(source):
+        stat = os.stat(source)
+        return _file_hash(os.path.abspath(source), stat.st_size, stat.st_mtime_ns)
+    return path2hash(source)
+
+
+@lru_cache(maxsize=64)
+def _file_hash(path: str, size: int, mtime_ns: int) -> str:
+    # The size and modification time are only part of the key so that changes to
+    # the file are hashed again.
+    return file_md5_hash(path)
+
+
+def _build_lazy_structures(road_map: RoadMap, map_spec):
+    # The query structures a road map builds on first use make up most of its memory,
+    # so they are built up front to be part of the size estimate.
+    origin = np.zeros((1, 2))
+    for include_junctions in (True, False):
+        road_map.nearest_lanes(Point(0, 0), include_junctions=include_junctions)
+        road_map.nearest_lanes_batch(origin, include_junctions=include_junctions)
+    if map_spec.lanepoint_spacing and hasattr(type(road_map), "_lanepoints"):
+        road_map._lanepoints
+
+
+def _estimate_nbytes(road_map: RoadMap, rss_before: int) -> int:
+    # The growth of the process while building the map and its query structures is a
+    # rough estimate of its size which is bounded below by the size of its source.
+    nbytes = psutil.Process().memory_info().rss - rss_before
+    if os.path.isfile(road_map.source):
+        nbytes = max(nbytes, os.path.getsize(road_map.source))
+    return max(nbytes, 0)
+
 
 _UNKNOWN_MAP = 0
 _SUMO_MAP = 1
@@ -99,7 +231,7 @@ def get_road_map(map_spec) -> Tuple[Optional[RoadMap], Optional[str]]:
     should signify that the map is different enough
     that map-related caches should be reloaded.
     If possible, the RoadMap object may be cached here
-    and re-used.
+    and re-used, see :func:`road_map_cache`.
     """
     assert map_spec, "A road map spec must be specified"
     assert map_spec.source, "A road map source must be specified"
@@ -149,21 +281,18 @@ def get_road_map(map_spec) -> Tuple[Optional[RoadMap], Optional[str]]:
     else:
         return None, None
 
-    if _existing_map:
-        if isinstance(_existing_map.obj, map_class) and _existing_map.obj.is_same_map(
-            map_spec
-        ):
-            return _existing_map.obj, _existing_map.map_hash
-        _clear_cache()
+    cache = road_map_cache()
+    cached = cache.get(map_class, map_spec)
+    if cached is not None:
+        return cached
 
+    rss_before = psutil.Process().memory_info().rss
     road_map = map_class.from_spec(map_spec)
     if road_map is None:
         return None, None
 
-    if os.path.isfile(road_map.source):
-        road_map_hash = file_md5_hash(road_map.source)
-    else:
-        road_map_hash = path2hash(road_map.source)
-    _cache_result(map_spec, road_map, road_map_hash)
+    _build_lazy_structures(road_map, map_spec)
+    road_map_hash = compute_road_map_hash(road_map.source)
+    cache.put(map_spec, road_map, road_map_hash, _estimate_nbytes(road_map, rss_before))
 
     return road_map, road_map_hash
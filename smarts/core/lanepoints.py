@@ -21,11 +21,16 @@
 # to allow for typing to refer to class being defined (LinkedLanePoint)
 from __future__ import annotations
 
+import json
+import logging
+import os
 import queue
-from collections import defaultdict
+import shutil
+import tempfile
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass
-from functools import lru_cache
-from typing import List, NamedTuple, Sequence, Tuple
+from functools import cached_property
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
 
 import numpy as np
 from scipy.spatial import KDTree
@@ -61,7 +66,7 @@ class LinkedLanePoint(NamedTuple):
 
     def __hash__(self):
         ## distinguish between different continuations here too
-        ## so the lru_cache on _lanepoint_paths_starting_at_lanepoint() below
+        ## so caches keyed on LinkedLanePoints below
         ## doesn't return the wrong set of LanePoints.
         return hash((self.lp, tuple(nlp.lp for nlp in self.nexts)))
 
@@ -69,31 +74,250 @@ class LinkedLanePoint(NamedTuple):
 class LanePoints:
     """A LanePoint utility class."""
 
+    _ARTIFACT_VERSION = 1
+    """The version of the compiled lane point format written by :meth:`save`."""
+
     def __init__(self, shape_lps: List[LinkedLanePoint], spacing: float):
         # XXX: for a big map, may not want to cache ALL of the potential LanePoints
         #      nor waste time here finding all of them.
         #      Lanepoints might be generated on demand based upon edges and lookahead.
-        self._linked_lanepoints = LanePoints._interpolate_shape_lanepoints(
-            shape_lps, spacing
+        self._index_linked_lanepoints(
+            LanePoints._interpolate_shape_lanepoints(shape_lps, spacing)
         )
-        self._lanepoints_kd_tree = LanePoints._build_kd_tree(self._linked_lanepoints)
+
+    def _index_linked_lanepoints(
+        self,
+        linked_lanepoints: List[LinkedLanePoint],
+        positions: Optional[np.ndarray] = None,
+    ):
+        self._linked_lanepoints = linked_lanepoints
+        if positions is None:
+            positions = np.array(
+                [l_lp.lp.pose.position for l_lp in linked_lanepoints], dtype=np.float64
+            ).reshape(-1, 3)
+        # The KD-trees are built from these positions when they are first queried.
+        self._positions = positions[:, :2]
 
         self._lanepoints_by_lane_id = defaultdict(list)
         self._lanepoints_by_edge_id = defaultdict(list)
-        for linked_lp in self._linked_lanepoints:
+        indices_by_lane_id = defaultdict(list)
+        indices_by_edge_id = defaultdict(list)
+        for i, linked_lp in enumerate(self._linked_lanepoints):
+            lp_lane_id = linked_lp.lp.lane.lane_id
             lp_edge_id = linked_lp.lp.lane.road.road_id
-            self._lanepoints_by_lane_id[linked_lp.lp.lane.lane_id].append(linked_lp)
+            self._lanepoints_by_lane_id[lp_lane_id].append(linked_lp)
             self._lanepoints_by_edge_id[lp_edge_id].append(linked_lp)
+            indices_by_lane_id[lp_lane_id].append(i)
+            indices_by_edge_id[lp_edge_id].append(i)
+        self._lanepoint_indices_by_lane_id = dict(indices_by_lane_id)
+        self._lanepoint_indices_by_edge_id = dict(indices_by_edge_id)
+        self._lanepoints_kd_tree_by_lane_id = {}
+        self._lanepoints_kd_tree_by_edge_id = {}
+
+        self._path_nodes = self._linked_lanepoints
+        self._path_node_indices = {
+            id(l_lp): i for i, l_lp in enumerate(self._path_nodes)
+        }
+        self._path_cache: OrderedDict = OrderedDict()
+        self._path_cache_size = LanePoints._configured_path_cache_size()
+
+    @cached_property
+    def _lanepoints_kd_tree(self) -> KDTree:
+        return LanePoints._build_kd_tree(self._positions)
+
+    def _lane_kd_tree(self, lane_id: str) -> KDTree:
+        tree = self._lanepoints_kd_tree_by_lane_id.get(lane_id)
+        if tree is None:
+            tree = LanePoints._build_kd_tree(
+                self._positions[self._lanepoint_indices_by_lane_id[lane_id]]
+            )
+            self._lanepoints_kd_tree_by_lane_id[lane_id] = tree
+        return tree
+
+    def _road_kd_tree(self, road_id: str) -> KDTree:
+        tree = self._lanepoints_kd_tree_by_edge_id.get(road_id)
+        if tree is None:
+            tree = LanePoints._build_kd_tree(
+                self._positions[self._lanepoint_indices_by_edge_id[road_id]]
+            )
+            self._lanepoints_kd_tree_by_edge_id[road_id] = tree
+        return tree
+
+    @staticmethod
+    def _configured_path_cache_size() -> int:
+        from smarts.core import config
 
-        self._lanepoints_kd_tree_by_lane_id = {
-            lane_id: LanePoints._build_kd_tree(l_lps)
-            for lane_id, l_lps in self._lanepoints_by_lane_id.items()
+        return config()("core", "lanepoint_path_cache_size", default=1024, cast=int)
+
+    def save(self, directory: str) -> bool:
+        """Writes the lane points as NumPy arrays that :meth:`load` restores them from.
+        The links between lane points are stored as compressed sparse rows.
+
+        Returns:
+            bool: If the lane points could be saved.
+        """
+        linked_lps = self._linked_lanepoints
+        indices = {id(l_lp): i for i, l_lp in enumerate(linked_lps)}
+        lane_ids = list({l_lp.lp.lane.lane_id: None for l_lp in linked_lps})
+        lane_indices = {lane_id: i for i, lane_id in enumerate(lane_ids)}
+
+        next_indices = []
+        next_offsets = [0]
+        for l_lp in linked_lps:
+            for next_lp in l_lp.nexts:
+                next_index = indices.get(id(next_lp))
+                if next_index is None:
+                    # Links out of the interpolated lane points cannot be restored.
+                    return False
+                next_indices.append(next_index)
+            next_offsets.append(len(next_indices))
+
+        arrays = {
+            "position": np.array(
+                [l_lp.lp.pose.position for l_lp in linked_lps], dtype=np.float64
+            ).reshape(-1, 3),
+            "orientation": np.array(
+                [l_lp.lp.pose.orientation for l_lp in linked_lps], dtype=np.float64
+            ).reshape(-1, 4),
+            "lane_width": np.array(
+                [l_lp.lp.lane_width for l_lp in linked_lps], dtype=np.float64
+            ),
+            "lane": np.array(
+                [lane_indices[l_lp.lp.lane.lane_id] for l_lp in linked_lps],
+                dtype=np.int64,
+            ),
+            "is_inferred": np.array(
+                [l_lp.is_inferred for l_lp in linked_lps], dtype=bool
+            ),
+            "next_offsets": np.array(next_offsets, dtype=np.int64),
+            "next_indices": np.array(next_indices, dtype=np.int64),
         }
+        os.makedirs(directory, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(os.path.join(directory, "lanes.json"), "w") as f:
+            json.dump({"version": self._ARTIFACT_VERSION, "lane_ids": lane_ids}, f)
+        return True
+
+    @classmethod
+    def load(cls, directory: str, road_map: RoadMap) -> LanePoints:
+        """Restores lane points written by :meth:`save` for the given road map.
 
-        self._lanepoints_kd_tree_by_edge_id = {
-            edge_id: LanePoints._build_kd_tree(l_lps)
-            for edge_id, l_lps in self._lanepoints_by_edge_id.items()
+        Raises:
+            ValueError: If the lane points were saved in a different format version.
+        """
+        with open(os.path.join(directory, "lanes.json")) as f:
+            header = json.load(f)
+        if header["version"] != cls._ARTIFACT_VERSION:
+            raise ValueError(
+                f"Expected lane points of version {cls._ARTIFACT_VERSION}, but got "
+                f"{header['version']}."
+            )
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"))
+            for name in (
+                "position",
+                "orientation",
+                "lane_width",
+                "lane",
+                "is_inferred",
+                "next_offsets",
+                "next_indices",
+            )
         }
+        lanes = [road_map.lane_by_id(lane_id) for lane_id in header["lane_ids"]]
+
+        linked_lps = [
+            LinkedLanePoint(
+                lp=LanePoint(
+                    lane=lanes[lane_index],
+                    pose=Pose(position=np.array(position), orientation=np.array(quat)),
+                    lane_width=float(lane_width),
+                ),
+                nexts=[],
+                is_inferred=bool(is_inferred),
+            )
+            for position, quat, lane_width, lane_index, is_inferred in zip(
+                arrays["position"],
+                arrays["orientation"],
+                arrays["lane_width"],
+                arrays["lane"].tolist(),
+                arrays["is_inferred"],
+            )
+        ]
+        next_offsets = arrays["next_offsets"].tolist()
+        next_indices = arrays["next_indices"].tolist()
+        for i, l_lp in enumerate(linked_lps):
+            start, end = next_offsets[i], next_offsets[i + 1]
+            l_lp.nexts.extend(linked_lps[j] for j in next_indices[start:end])
+
+        lanepoints = cls.__new__(cls)
+        lanepoints._index_linked_lanepoints(linked_lps, arrays["position"])
+        return lanepoints
+
+    @classmethod
+    def from_cache(
+        cls,
+        road_map: RoadMap,
+        spacing: float,
+        build: Callable[[RoadMap, float], LanePoints],
+    ) -> LanePoints:
+        """Loads the lane points of the road map from the compiled map cache, or builds
+        them and adds them to the cache. The cache is stored in the `core:map_cache_dir`
+        directory and is not used if that is not configured.
+
+        Args:
+            road_map (RoadMap): The road map the lane points are on.
+            spacing (float): The distance between interpolated lane points.
+            build (Callable[[RoadMap, float], LanePoints]):
+                Generates the lane points when they are not cached, for example
+                :meth:`from_sumo`.
+        """
+        directory = cls._cache_directory(road_map, spacing)
+        if directory is None:
+            return build(road_map, spacing)
+
+        logger = logging.getLogger(cls.__name__)
+        if os.path.isdir(directory):
+            try:
+                return cls.load(directory, road_map)
+            except (OSError, ValueError, KeyError) as err:
+                logger.warning("Rebuilding cached lane points `%s`: %s", directory, err)
+                shutil.rmtree(directory, ignore_errors=True)
+
+        lanepoints = build(road_map, spacing)
+        parent = os.path.dirname(directory)
+        try:
+            os.makedirs(parent, exist_ok=True)
+            staging = tempfile.mkdtemp(dir=parent)
+        except OSError as err:
+            logger.warning("Unable to cache lane points `%s`: %s", directory, err)
+            return lanepoints
+        try:
+            if lanepoints.save(staging):
+                # Other processes may be compiling the same map so the complete
+                # artifact is moved into place at once.
+                os.rename(staging, directory)
+        except OSError:
+            pass
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return lanepoints
+
+    @staticmethod
+    def _cache_directory(road_map: RoadMap, spacing: float) -> Optional[str]:
+        from smarts.core import config
+        from smarts.core.default_map_builder import compute_road_map_hash
+
+        cache_dir = config()("core", "map_cache_dir", default="")
+        if not cache_dir or not road_map.source:
+            return None
+        road_map_hash = compute_road_map_hash(road_map.source)
+        return os.path.join(
+            os.path.expanduser(cache_dir),
+            f"{type(road_map).__name__}-{road_map_hash}",
+            f"lanepoints-{spacing}-v{LanePoints._ARTIFACT_VERSION}",
+        )
 
     @classmethod
     def from_sumo(
@@ -611,11 +835,8 @@ class LanePoints:
         return cls(shape_lps, spacing)
 
     @staticmethod
-    def _build_kd_tree(linked_lps: Sequence[LinkedLanePoint]) -> KDTree:
-        return KDTree(
-            np.array([l_lp.lp.pose.point.as_np_array[:2] for l_lp in linked_lps]),
-            leafsize=50,
-        )
+    def _build_kd_tree(points: np.ndarray) -> KDTree:
+        return KDTree(points, leafsize=50)
 
     @staticmethod
     def _interpolate_shape_lanepoints(
@@ -891,7 +1112,7 @@ class LanePoints:
         self, point: Point, lane_id: str
     ) -> LinkedLanePoint:
         """Returns the closest linked lanepoint on the given lane."""
-        lane_kd_tree = self._lanepoints_kd_tree_by_lane_id[lane_id]
+        lane_kd_tree = self._lane_kd_tree(lane_id)
         return LanePoints._closest_linked_lp_in_kd_tree_batched(
             [point], self._lanepoints_by_lane_id[lane_id], lane_kd_tree, k=1
         )[0][0]
@@ -903,10 +1124,9 @@ class LanePoints:
         return LanePoints._closest_linked_lp_in_kd_tree_batched(
             [point],
             self._lanepoints_by_edge_id[road_id],
-            self._lanepoints_kd_tree_by_edge_id[road_id],
+            self._road_kd_tree(road_id),
         )[0][0]
 
-    @lru_cache(maxsize=32)
     def paths_starting_at_lanepoint(
         self, lanepoint: LinkedLanePoint, lookahead: int, filter_edge_ids: tuple
     ) -> List[List[LinkedLanePoint]]:
@@ -921,6 +1141,94 @@ class LanePoints:
         Returns:
             All branches(as lists) stemming from the lanepoint.
         """
+        paths = self._cached_path_indices(lanepoint, lookahead, filter_edge_ids)
+        if paths is None:
+            # the branches leave these lane points so they cannot be cached as indices
+            return self._compute_paths(lanepoint, lookahead, filter_edge_ids)
+        path_nodes = self._path_nodes
+        return [[path_nodes[i] for i in row[row >= 0]] for row in paths]
+
+    def path_indices_starting_at_lanepoint(
+        self, lanepoint: LinkedLanePoint, lookahead: int, filter_edge_ids: tuple
+    ) -> np.ndarray:
+        """The branches of :meth:`paths_starting_at_lanepoint` as rows of lane point
+        indices (see :meth:`linked_lanepoint_at`). Branches that end before the
+        lookahead are padded with `-1`.
+
+        The branches are kept in a bounded cache of the deepest lookahead requested
+        from each lanepoint so that shorter lookaheads are slices of it.
+
+        Raises:
+            ValueError: If a branch passes through lane points other than these.
+        """
+        paths = self._cached_path_indices(lanepoint, lookahead, filter_edge_ids)
+        if paths is None:
+            raise ValueError("The branches leave the indexed lane points.")
+        return paths
+
+    def _cached_path_indices(
+        self, lanepoint: LinkedLanePoint, lookahead: int, filter_edge_ids: tuple
+    ) -> Optional[np.ndarray]:
+        index = self._path_node_index(lanepoint)
+        if index is None:
+            return None
+        key = (index, filter_edge_ids)
+        paths = self._path_cache.get(key)
+        if paths is None or paths.shape[1] <= lookahead:
+            paths = self._compute_path_indices(lanepoint, lookahead, filter_edge_ids)
+            if paths is None:
+                return None
+            self._path_cache[key] = paths
+            if len(self._path_cache) > self._path_cache_size:
+                self._path_cache.popitem(last=False)
+        else:
+            self._path_cache.move_to_end(key)
+        if paths.shape[1] == lookahead + 1:
+            return paths
+        paths = paths[:, : lookahead + 1]
+        # branches that split beyond the lookahead are now duplicates of each other
+        distinct = np.ones(len(paths), dtype=bool)
+        distinct[1:] = np.any(paths[1:] != paths[:-1], axis=1)
+        return paths[distinct]
+
+    def linked_lanepoint_at(self, index: int) -> LinkedLanePoint:
+        """The linked lanepoint at the given index of a branch from
+        :meth:`path_indices_starting_at_lanepoint`."""
+        return self._path_nodes[index]
+
+    def _path_node_index(self, linked_lanepoint: LinkedLanePoint) -> Optional[int]:
+        index = self._path_node_indices.get(id(linked_lanepoint))
+        if index is not None:
+            return index
+        # An equal lane point that is not one of ours, such as a copy, resolves to the
+        # stored lane point at its position.
+        lane_id = linked_lanepoint.lp.lane.lane_id
+        if lane_id not in self._lanepoints_by_lane_id:
+            return None
+        stored = self.closest_linked_lanepoint_on_lane_to_point(
+            linked_lanepoint.lp.pose.point, lane_id
+        )
+        if stored.lp != linked_lanepoint.lp or [n.lp for n in stored.nexts] != [
+            n.lp for n in linked_lanepoint.nexts
+        ]:
+            return None
+        return self._path_node_indices[id(stored)]
+
+    def _compute_path_indices(
+        self, lanepoint: LinkedLanePoint, lookahead: int, filter_edge_ids: tuple
+    ) -> Optional[np.ndarray]:
+        lanepoint_paths = self._compute_paths(lanepoint, lookahead, filter_edge_ids)
+        indices = np.full((len(lanepoint_paths), lookahead + 1), -1, dtype=np.int32)
+        for row, path in zip(indices, lanepoint_paths):
+            path_indices = [self._path_node_index(l_lp) for l_lp in path]
+            if None in path_indices:
+                return None
+            row[: len(path)] = path_indices
+        return indices
+
+    def _compute_paths(
+        self, lanepoint: LinkedLanePoint, lookahead: int, filter_edge_ids: tuple
+    ) -> List[List[LinkedLanePoint]]:
         lanepoint_paths = [[lanepoint]]
         for _ in range(lookahead):
             next_lanepoint_paths = []
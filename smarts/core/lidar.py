@@ -17,30 +17,71 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import itertools
 import random
-from typing import List, Sequence, Tuple
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 import psutil
 
 from .lidar_sensor_params import SensorParams
 from .utils import pybullet
-from .utils.math import batches, rotate_quat
 from .utils.pybullet import bullet_client as bc
 
 
+@lru_cache(maxsize=16)
+def _base_ray_directions(
+    start_angle: float,
+    end_angle: float,
+    laser_angles: Tuple[float, ...],
+    angle_resolution: float,
+    max_distance: float,
+) -> np.ndarray:
+    """The end points of the rays of a lidar at the origin with no heading. Generated
+    with a single vectorized pass equivalent to rotating `(0, max_distance, 0)` by the
+    quaternion of each `(roll, 0, yaw)` laser orientation.
+
+    Returns:
+        A read-only array of shape `(n_rays, 3)`, ordered by laser angle first.
+    """
+    n_rays = int((end_angle - start_angle) / angle_resolution)
+    yaws = -1 * np.asarray(laser_angles, dtype=np.float64)
+    rolls = np.arange(n_rays) * angle_resolution
+    yaw, roll = (a.reshape(-1) for a in np.meshgrid(yaws, rolls, indexing="ij"))
+
+    # Components of `pybullet.getQuaternionFromEuler((roll, 0, yaw))`.
+    sr, cr = np.sin(roll / 2), np.cos(roll / 2)
+    sy, cy = np.sin(yaw / 2), np.cos(yaw / 2)
+    quat = np.stack((sr * cy, sr * sy, cr * sy, cr * cy), axis=-1)
+
+    # Same component order as `smarts.core.utils.math.rotate_quat`.
+    w, u = quat[:, :1], quat[:, 1:]
+    v = np.broadcast_to(np.array([0, max_distance, 0], dtype=np.float64), u.shape)
+    uv = np.cross(u, v)
+    directions = v + 2 * (w * uv + np.cross(u, uv))
+    directions.setflags(write=False)
+    return directions
+
+
 class Lidar:
     """Lidar utilities."""
 
-    def __init__(self, origin, sensor_params: SensorParams):
+    def __init__(self, origin, sensor_params: SensorParams, heading: float = 0.0):
         self._origin = origin
+        self._heading = heading
         self._sensor_params = sensor_params
         self._n_threads = psutil.cpu_count(logical=False)
 
-        # As an optimization we compute a set of "base rays" once and shift translate
-        # them to follow the user, and then trace for collisions.
-        self._base_rays = None
+        # As an optimization the "base rays" are computed once per set of sensor
+        # parameters and shared by all lidars. They are rotated and translated to follow
+        # the user, and then traced for collisions.
+        self._base_rays = _base_ray_directions(
+            float(sensor_params.start_angle),
+            float(sensor_params.end_angle),
+            tuple(float(a) for a in sensor_params.laser_angles),
+            float(sensor_params.angle_resolution),
+            float(sensor_params.max_distance),
+        )
         self._static_lidar_noise = self._compute_static_lidar_noise()
 
     def __eq__(self, __value: object) -> bool:
@@ -55,6 +96,15 @@ class Lidar:
     def origin(self, value):
         self._origin = value
 
+    @property
+    def heading(self) -> float:
+        """The rotation of the lasers around the vertical axis in radians."""
+        return self._heading
+
+    @heading.setter
+    def heading(self, value: float):
+        self._heading = value
+
     def _compute_static_lidar_noise(self):
         n_rays = int(
             (self._sensor_params.end_angle - self._sensor_params.start_angle)
@@ -73,65 +123,74 @@ class Lidar:
 
     def compute_point_cloud(
         self, bullet_client
-    ) -> Tuple[List[np.ndarray], List[int], List[Tuple[np.ndarray, np.ndarray]]]:
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """Generate a point cloud.
         Returns:
-            Point cloud of 3D points, a list of hit objects, a list of rays fired.
+            Point cloud of 3D points as a `(n_rays, 3)` array, a `(n_rays,)` array of
+            whether each ray hit an object, and the `(n_rays, 2, 3)` array of rays fired.
         """
-        rays = self._compute_rays()
-        point_cloud, hits = self._trace_rays(rays, bullet_client)
-        # point_cloud = self._apply_noise(point_cloud)
-        assert (
-            len(point_cloud) == len(hits) == len(rays) == len(self._static_lidar_noise)
-        )
-        return point_cloud, hits, rays
+        return self.compute_point_clouds([self], bullet_client)[0]
 
-    def _compute_rays(self):
-        if self._base_rays is None:
-            self._base_rays = []
-            n_rays = int(
-                (self._sensor_params.end_angle - self._sensor_params.start_angle)
-                / self._sensor_params.angle_resolution
-            )
+    @staticmethod
+    def compute_point_clouds(
+        lidars: Sequence["Lidar"], bullet_client
+    ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Generate the point clouds of several lidars. The rays of all of the lidars are
+        traced together in as few ray batches as possible.
 
-            yaws = -1 * self._sensor_params.laser_angles
-            rolls = np.arange(n_rays) * self._sensor_params.angle_resolution
-            for yaw, roll in itertools.product(yaws, rolls):
-                rot = pybullet.getQuaternionFromEuler((roll, 0, yaw))
-                origin = np.array([0, 0, 0])
+        Returns:
+            The `(point_cloud, hits, rays)` of each lidar as given by `compute_point_cloud`.
+        """
+        if not lidars:
+            return []
+        lidar_rays = [lidar._compute_rays() for lidar in lidars]
+        rays = np.concatenate(lidar_rays)
+        point_cloud, hits = Lidar._trace_rays(rays, bullet_client, lidars[0]._n_threads)
+        # point_cloud = self._apply_noise(point_cloud)
 
-                direction = rotate_quat(
-                    np.asarray(rot, dtype=float),
-                    np.asarray((0, self._sensor_params.max_distance, 0), dtype=float),
-                )
-                self._base_rays.append((origin, direction))
+        results = []
+        start = 0
+        for lidar, l_rays in zip(lidars, lidar_rays):
+            end = start + len(l_rays)
+            assert len(l_rays) == len(lidar._static_lidar_noise)
+            results.append((point_cloud[start:end], hits[start:end], l_rays))
+            start = end
+        return results
 
-        rays = [
-            (origin + self._origin, direction + self._origin)
-            for origin, direction in self._base_rays
-        ]
+    def _compute_rays(self):
+        directions = self._base_rays
+        if self._heading:
+            c, s = np.cos(self._heading), np.sin(self._heading)
+            rotation = np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]], dtype=np.float64)
+            directions = directions @ rotation.T
+
+        # rays are (n_rays, (origin, end), xyz)
+        rays = np.empty((len(directions), 2, 3), dtype=np.float64)
+        rays[:, 0] = self._origin
+        np.add(directions, self._origin, out=rays[:, 1])
         return rays
 
-    def _trace_rays(self, rays, bullet_client):
-        results = []
-        for batched_rays in batches(
-            rays, int(pybullet.MAX_RAY_INTERSECTION_BATCH_SIZE - 1)
-        ):
-            origins, directions = zip(*batched_rays)
-            results.extend(
-                bullet_client.rayTestBatch(origins, directions, self._n_threads)
+    @staticmethod
+    def _trace_rays(
+        rays: np.ndarray, bullet_client, n_threads: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if n_threads is None:
+            n_threads = psutil.cpu_count(logical=False)
+        point_cloud = np.empty((len(rays), 3), dtype=np.float64)
+        hit_ids = np.empty(len(rays), dtype=np.int64)
+        batch_size = int(pybullet.MAX_RAY_INTERSECTION_BATCH_SIZE - 1)
+        for start in range(0, len(rays), batch_size):
+            batched_rays = rays[start : start + batch_size]
+            results = bullet_client.rayTestBatch(
+                batched_rays[:, 0], batched_rays[:, 1], n_threads
             )
+            end = start + len(results)
+            hit_ids[start:end] = [r[0] for r in results]
+            point_cloud[start:end] = [r[3] for r in results]
 
-        hit_ids, _, _, positions, _ = zip(*results)
-        positions = list(positions)
-        hits = []
-        for i, position in enumerate(positions):
-            hit = hit_ids[i] != -1
-            hits.append(hit)
-            positions[i] = (
-                np.array(position) if hit else np.array([np.inf, np.inf, np.inf])
-            )
-        return positions, hits
+        hits = hit_ids != -1
+        point_cloud[~hits] = np.inf
+        return point_cloud, hits
 
     def _apply_noise(self, point_cloud):
         dynamic_noise = np.random.normal(
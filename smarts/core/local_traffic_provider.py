@@ -227,14 +227,23 @@ class LocalTrafficProvider(TrafficProvider):
     def _create_actor_caches(self):
         self._offsets_cache = dict()
         self._lane_bumpers_cache = dict()
-        for ovs in self._all_states:
+        all_states = self._all_states
+        # the back and front bumpers of all vehicles are looked up in one query
+        bumpers = np.empty((2 * len(all_states), 2), dtype=np.float64)
+        lengths = np.empty(2 * len(all_states), dtype=np.float64)
+        for i, ovs in enumerate(all_states):
             center = ovs.pose.point
             length = ovs.dimensions.length
             hhx, hhy = radians_to_vec(ovs.pose.heading) * (0.5 * length)
-            back = Point(center.x - hhx, center.y - hhy)
-            front = Point(center.x + hhx, center.y + hhy)
-            back_lane = self.road_map.nearest_lane(back, radius=length)
-            front_lane = self.road_map.nearest_lane(front, radius=length)
+            bumpers[2 * i] = (center.x - hhx, center.y - hhy)
+            bumpers[2 * i + 1] = (center.x + hhx, center.y + hhy)
+            lengths[2 * i : 2 * i + 2] = length
+        bumper_lanes = self.road_map.nearest_lane_batch(bumpers, radius=lengths)
+        for i, ovs in enumerate(all_states):
+            back = Point(*bumpers[2 * i].tolist())
+            front = Point(*bumpers[2 * i + 1].tolist())
+            back_lane = bumper_lanes[2 * i]
+            front_lane = bumper_lanes[2 * i + 1]
             if back_lane:
                 back_offset = back_lane.offset_along_lane(back)
                 lbc = self._lane_bumpers_cache.setdefault(back_lane, [])
@@ -215,11 +215,10 @@ class Observation(NamedTuple):
     via_data: Vias
     """Listing of nearby collectable ViaPoints and ViaPoints collected in the last step."""
     # TODO: Convert to `NamedTuple` or only return point cloud.
-    lidar_point_cloud: Optional[
-        Tuple[List[np.ndarray], List[bool], List[Tuple[np.ndarray, np.ndarray]]]
-    ] = None
-    """Lidar point cloud consisting of [points, hits, (ray_origin, ray_vector)]. 
-    Points missed (i.e., not hit) have `inf` value."""
+    lidar_point_cloud: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+    """Lidar point cloud consisting of [points, hits, (ray_origin, ray_vector)] with shapes
+    `(n_rays, 3)`, `(n_rays,)` and `(n_rays, 2, 3)`. Points missed (i.e., not hit) have
+    `inf` value."""
     drivable_area_grid_map: Optional[DrivableAreaGridMap] = None
     """Drivable area map."""
     occupancy_grid_map: Optional[OccupancyGridMap] = None
@@ -26,9 +26,9 @@ import random
 import time
 from bisect import bisect
 from dataclasses import dataclass
-from functools import cached_property, lru_cache
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, Generator, List, Optional, Sequence, Set, Tuple
+from typing import Dict, Generator, List, Optional, Sequence, Set, Tuple, Union
 
 import numpy as np
 
@@ -75,6 +75,8 @@ from shapely.geometry import Polygon
 
 from smarts.core.road_map import RoadMap, RoadMapWithCaches, Waypoint
 from smarts.core.route_cache import RouteWithCache
+from smarts.core.utils.cache import cache
+from smarts.core.utils.geometry import ShapeIndex
 from smarts.core.utils.key_wrapper import KeyWrapper
 from smarts.core.utils.math import (
     CubicPolynomial,
@@ -1083,13 +1085,13 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
                 point,
             )
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def project_along(
             self, start_offset: float, distance: float
         ) -> Set[Tuple[RoadMapWithCaches.Lane, float]]:
             return super().project_along(start_offset, distance)
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             if (
                 self._bounding_box.min_pt.x <= point.x <= self._bounding_box.max_pt.x
@@ -1108,7 +1110,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
                 )
             return False
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_lanes_at_offset(
             self, offset: float
         ) -> List[RoadMapWithCaches.Lane]:
@@ -1136,11 +1138,11 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
                     result.append(lane)
             return result
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def center_at_point(self, point: Point) -> Point:
             return super().center_at_point(point)
 
-        @lru_cache(8)
+        @cache(maxsize=8)
         def _edges_at_point(
             self, point: Point
         ) -> Tuple[Optional[Point], Optional[Point]]:
@@ -1173,17 +1175,17 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
             right_edge = position_at_shape_offset(right_edge_shape, right_offset)
             return left_edge, right_edge
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def center_pose_at_point(self, point: Point) -> Pose:
             return super().center_pose_at_point(point)
 
-        @lru_cache(maxsize=1024)
+        @cache(maxsize=16)
         def curvature_radius_at_offset(
             self, offset: float, lookahead: int = 5
         ) -> float:
             return super().curvature_radius_at_offset(offset, lookahead)
 
-        @lru_cache(maxsize=1024)
+        @cache(maxsize=16)
         def width_at_offset(self, lane_point_s: float) -> Tuple[float, float]:
             start_pos = self.road._start_pos
             if self._lane_elem_index < 0:
@@ -1199,7 +1201,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
             )
             return abs(t_outer - t_inner), 1.0
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -1297,7 +1299,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
             # XXX: This shouldn't be public.
             self._bounding_box = value
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             if (
                 self._bounding_box.min_pt.x <= point.x <= self._bounding_box.max_pt.x
@@ -1310,7 +1312,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
                         return True
             return False
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def _edges_at_point(self, point: Point) -> Tuple[Point, Point]:
             """Get the boundary points perpendicular to the center of the road closest to the given
              world coordinate.
@@ -1329,7 +1331,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
 
             return left_edge, right_edge
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_roads_at_point(self, point: Point) -> List[RoadMap.Road]:
             result = []
             for lane in self.lanes:
@@ -1374,7 +1376,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
 
             return leftmost_edge_shape, rightmost_edge_shape
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -1437,7 +1439,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
                 neighboring_lanes.append((lane, d))
         return neighboring_lanes
 
-    @lru_cache(maxsize=1024)
+    @cache(maxsize=1024)
     def nearest_lanes(
         self, point: Point, radius: Optional[float] = None, include_junctions=False
     ) -> List[Tuple[RoadMapWithCaches.Lane, float]]:
@@ -1447,6 +1449,21 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
         candidate_lanes.sort(key=lambda lane_dist_tup: lane_dist_tup[1])
         return candidate_lanes
 
+    @cached_property
+    def _lane_shape_index(self) -> ShapeIndex:
+        simple_lanes = self._simple_lanes
+        return ShapeIndex(simple_lanes, [lane.shape() for lane in simple_lanes])
+
+    def nearest_lanes_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions: bool = False,
+    ) -> List[List[Tuple[RoadMapWithCaches.Lane, float]]]:
+        if radius is None:
+            radius = max(10, 2 * self._default_lane_width)
+        return self._lane_shape_index.near_points(points, radius)
+
     def nearest_lane(
         self,
         point: Point,
@@ -1454,6 +1471,26 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
         include_junctions: bool = False,
     ) -> Optional[RoadMapWithCaches.Lane]:
         nearest_lanes = self.nearest_lanes(point, radius, include_junctions)
+        return self._nearest_containing_lane(point, nearest_lanes)
+
+    def nearest_lane_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions: bool = False,
+    ) -> List[Optional[RoadMapWithCaches.Lane]]:
+        points = np.asarray(points, dtype=np.float64)
+        return [
+            self._nearest_containing_lane(Point(*point.tolist()), nearest_lanes)
+            for point, nearest_lanes in zip(
+                points, self.nearest_lanes_batch(points, radius, include_junctions)
+            )
+        ]
+
+    @staticmethod
+    def _nearest_containing_lane(
+        point: Point, nearest_lanes: List[Tuple[RoadMapWithCaches.Lane, float]]
+    ) -> Optional[RoadMapWithCaches.Lane]:
         for lane, dist in nearest_lanes:
             if lane.contains_point(point):
                 # Since OpenDRIVE has lanes of varying width, a point can be closer to a lane it does not lie in
@@ -1462,7 +1499,7 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
                 return lane
         return nearest_lanes[0][0] if nearest_lanes else None
 
-    @lru_cache(maxsize=16)
+    @cache(maxsize=16)
     def road_with_point(self, point: Point) -> Optional[RoadMap.Road]:
         radius = max(5, 2 * self._default_lane_width)
         for nl, dist in self.nearest_lanes(point, radius):
@@ -1647,7 +1684,9 @@ class OpenDriveRoadNetwork(RoadMapWithCaches):
     @cached_property
     def _lanepoints(self):
         assert self._map_spec.lanepoint_spacing > 0
-        return LanePoints.from_opendrive(self, spacing=self._map_spec.lanepoint_spacing)
+        return LanePoints.from_cache(
+            self, self._map_spec.lanepoint_spacing, LanePoints.from_opendrive
+        )
 
     def waypoint_paths(
         self,
@@ -22,18 +22,16 @@
 from __future__ import annotations
 
 import math
-from bisect import bisect
 from dataclasses import dataclass
 from enum import IntEnum
-from functools import cached_property, lru_cache
-from typing import Any, List, Optional, Sequence, Set, Tuple
+from typing import Any, List, Optional, Sequence, Set, Tuple, Union
 
 import numpy as np
-from shapely.geometry import LineString
-from shapely.geometry import Point as SPoint
 from shapely.geometry import Polygon
 
 from smarts.core.coordinates import BoundingBox, Heading, Point, Pose, RefLinePoint
+from smarts.core.utils.cache import cache
+from smarts.core.utils.geometry import PolylineSegments
 from smarts.core.utils.math import (
     fast_quaternion_from_angle,
     min_angles_difference_signed,
@@ -135,6 +133,46 @@ class RoadMap:
         nearest_lanes = self.nearest_lanes(point, radius, include_junctions)
         return nearest_lanes[0][0] if nearest_lanes else None
 
+    def nearest_lanes_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions=True,
+    ) -> List[List[Tuple[RoadMap.Lane, float]]]:
+        """Find the lanes near each of many points at once.
+
+        Args:
+            points (np.ndarray): Points with shape `(n, 2)` or `(n, 3)`.
+            radius (Optional[Union[float, Sequence[float]]]): The search radius,
+                either shared by all points or one per point.
+
+        Returns:
+            List[List[Tuple[RoadMap.Lane, float]]]: For each point, the result that
+                `nearest_lanes()` would give for it.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if radius is None or np.isscalar(radius):
+            radius = [radius] * len(points)
+        return [
+            self.nearest_lanes(Point(*p.tolist()), r, include_junctions)
+            for p, r in zip(points, radius)
+        ]
+
+    def nearest_lane_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions=True,
+    ) -> List[Optional[RoadMap.Lane]]:
+        """Find the nearest lane to each of many points at once.
+        See `nearest_lanes_batch()`."""
+        return [
+            nearest_lanes[0][0] if nearest_lanes else None
+            for nearest_lanes in self.nearest_lanes_batch(
+                points, radius, include_junctions
+            )
+        ]
+
     def road_with_point(self, point: Point) -> Optional[RoadMap.Road]:
         """Find the road that contains the given point."""
         raise NotImplementedError()
@@ -831,81 +869,55 @@ class RoadMapWithCaches(RoadMap):
             to make use of the SegmentCache class below."""
             raise NotImplementedError()
 
-        @lru_cache(maxsize=1024)
         def from_lane_coord(self, lane_point: RefLinePoint) -> Point:
-            seg = self._map._seg_cache.segment_for_offset(self, lane_point.s)
-            return seg.from_lane_coord(lane_point)
+            x, y = self.from_lane_coords([lane_point.s], [lane_point.t])[0]
+            return Point(x, y)
+
+        def from_lane_coords(
+            self, s: Sequence[float], t: Sequence[float]
+        ) -> np.ndarray:
+            """Converts many lane coordinates to world points at once.
 
-        @lru_cache(maxsize=1024)
-        def _normal_at_offset(self, offset: float) -> np.ndarray:
-            seg = self._map._seg_cache.segment_for_offset(self, offset)
-            return np.array((-seg.dy, seg.dx, 0.0))
+            Args:
+                s (Sequence[float]): The offsets along the lane.
+                t (Sequence[float]): The lateral displacements from the lane center.
+
+            Returns:
+                np.ndarray: The 2D world points with shape `(n, 2)`.
+            """
+            return self._map._seg_cache.from_lane_coords(self, s, t)
 
-        @lru_cache(maxsize=1024)
         def to_lane_coord(self, world_point: Point) -> RefLinePoint:
-            lc = RefLinePoint(s=self.offset_along_lane(world_point))
-            offcenter_vector = (
-                world_point.as_np_array - self.from_lane_coord(lc).as_np_array
-            )
-            t_sign = np.sign(np.dot(offcenter_vector, self._normal_at_offset(lc.s)))
-            return lc._replace(t=np.linalg.norm(offcenter_vector) * t_sign)
+            s, t = self.to_lane_coords([world_point[:2]])
+            return RefLinePoint(s=float(s[0]), t=float(t[0]))
+
+        def to_lane_coords(
+            self, world_points: np.ndarray
+        ) -> Tuple[np.ndarray, np.ndarray]:
+            """Converts many world points to lane coordinates at once.
+
+            Args:
+                world_points (np.ndarray): Points with shape `(n, 2)` or `(n, 3)`.
+
+            Returns:
+                Tuple[np.ndarray, np.ndarray]: The offsets along the lane and the
+                    signed lateral displacements from the lane center.
+            """
+            return self._map._seg_cache.segments(self).project(world_points)
 
-        @lru_cache(maxsize=1024)
         def vector_at_offset(self, offset: float) -> np.ndarray:
-            seg = self._map._seg_cache.segment_for_offset(self, offset)
-            return np.array((seg.dx, seg.dy, 0.0))
-
-        @cached_property
-        def _lane_line(self) -> LineString:
-            points = self.center_polyline
-            assert len(points) >= 2
-            # If we switch to using pygeos instead of Shapely (which is faster), this would become:
-            # return pygeos.creation.linestring(tuple(p) for p in points)
-            return LineString(SPoint(tuple(p)) for p in points)
-
-        @lru_cache(maxsize=1024)
+            seg_cache = self._map._seg_cache
+            dx, dy = seg_cache.segments(self).directions[
+                seg_cache.segment_indices(self, offset)
+            ]
+            return np.array((dx, dy, 0.0))
+
+        @cache(maxsize=16)
         def offset_along_lane(self, world_point: Point) -> float:
-            # If we switch to using pygeos instead of Shapely (which is faster), this would become:
-            # return pygeos.linear.line_locate_point(self._lane_line, pygeos.creation.points([world_point][0]))
-            return self._lane_line.project(SPoint(*world_point))
+            s, _ = self.to_lane_coords([world_point[:2]])
+            return float(s[0])
 
     class _SegmentCache:
-        @dataclass(frozen=True)
-        class Segment:
-            """Stored info about a segment of a lane's center polyline."""
-
-            x: float
-            y: float
-            dx: float
-            dy: float
-            offset: float
-
-            @cached_property
-            def dist_to_next(self) -> float:
-                """returns the distance to the next point in the polyline."""
-                return np.linalg.norm((self.dx, self.dy))
-
-            @lru_cache(maxsize=1024)
-            def from_lane_coord(self, lane_pt: RefLinePoint) -> Point:
-                """For a reference-line point in/along this segment, converts it to a world point."""
-                offset = lane_pt.s - self.offset
-                return Point(
-                    self.x
-                    + (offset * self.dx - lane_pt.t * self.dy) / self.dist_to_next,
-                    self.y
-                    + (offset * self.dy + lane_pt.t * self.dx) / self.dist_to_next,
-                )
-
-        class _OffsetWrapper:
-            def __init__(self, seq: List[RoadMapWithCaches._SegmentCache.Segment]):
-                self._seq = seq
-
-            def __getitem__(self, i: int) -> float:
-                return self._seq[i].offset
-
-            def __len__(self) -> int:
-                return len(self._seq)
-
         def __init__(self):
             self.clear()
 
@@ -914,51 +926,39 @@ class RoadMapWithCaches(RoadMap):
             """Reset this SegmentCache."""
             self._lane_cache = dict()
 
-        @lru_cache(maxsize=1024)
-        def segment_for_offset(
-            self, lane: RoadMapWithCaches.Lane, offset: float
-        ) -> RoadMapWithCaches._SegmentCache.Segment:
-            """Given an offset along a Lane, returns the nearest Segment to it."""
-            # Note: we could use Shapely's "interpolate()" for a LineString here,
-            # but profiling and testing showed that (unlike Shapely's "project()")
-            # this was significantly slower than doing our own version here...
-            # TODO: consider using pygeos' line_interpolate_point() here.
-            segs = self._cache_lane_info(lane)
-            assert segs
-            segi = bisect(self.__class__._OffsetWrapper(segs), offset)
-            if segi > 0:
-                segi -= 1
-            return segs[segi]
-
-        def _cache_lane_info(
-            self, lane: RoadMapWithCaches.Lane
-        ) -> List[RoadMapWithCaches._SegmentCache.Segment]:
+        def segments(self, lane: RoadMapWithCaches.Lane) -> PolylineSegments:
+            """The segments of the center polyline of the given lane."""
             segs = self._lane_cache.get(lane.lane_id)
             if segs is not None:
                 return segs
 
-            class _AccumulateSegs:
-                def __init__(self):
-                    self.offset = 0
-
-                def seg(
-                    self, pt1: Point, pt2: Point
-                ) -> RoadMapWithCaches._SegmentCache.Segment:
-                    """Create a Segment for a successive pair of polyline points."""
-                    # TAI: include lane width sometimes?
-                    rval = RoadMapWithCaches._SegmentCache.Segment(
-                        x=pt1.x,
-                        y=pt1.y,
-                        dx=pt2.x - pt1.x,
-                        dy=pt2.y - pt1.y,
-                        offset=self.offset,
-                    )
-                    self.offset += rval.dist_to_next
-                    return rval
-
-            points = lane.center_polyline
-            assert len(points) >= 2
-            accum = _AccumulateSegs()
-            segs = [accum.seg(pt1, pt2) for pt1, pt2 in zip(points[:-1], points[1:])]
+            # TAI: include lane width sometimes?
+            segs = PolylineSegments.from_points(lane.center_polyline)
             self._lane_cache[lane.lane_id] = segs
             return segs
+
+        def segment_indices(self, lane: RoadMapWithCaches.Lane, offsets):
+            """Given offsets along a Lane, returns the indices of the segments that
+            contain them. Offsets beyond the ends of the lane use the end segments."""
+            # Note: we could use Shapely's "interpolate()" for a LineString here,
+            # but profiling and testing showed that (unlike Shapely's "project()")
+            # this was significantly slower than doing our own version here...
+            segs = self.segments(lane)
+            indices = np.searchsorted(segs.offsets, offsets, side="right") - 1
+            return np.clip(indices, 0, len(segs.offsets) - 1)
+
+        def from_lane_coords(
+            self, lane: RoadMapWithCaches.Lane, s: Sequence[float], t: Sequence[float]
+        ) -> np.ndarray:
+            """Converts reference-line points along a Lane to 2D world points."""
+            s = np.asarray(s, dtype=np.float64)
+            t = np.asarray(t, dtype=np.float64)
+            segs = self.segments(lane)
+            indices = self.segment_indices(lane, s)
+            unit = segs.directions[indices] / segs.lengths[indices, np.newaxis]
+            normal = np.stack((-unit[:, 1], unit[:, 0]), axis=1)
+            return (
+                segs.origins[indices]
+                + (s - segs.offsets[indices])[:, np.newaxis] * unit
+                + t[:, np.newaxis] * normal
+            )
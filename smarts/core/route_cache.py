@@ -21,10 +21,11 @@
 import logging
 import math
 from dataclasses import dataclass, field
-from functools import cached_property, lru_cache
+from functools import cached_property
 from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 from .road_map import RoadMap
+from .utils.cache import cache
 
 # cache_keys shouldn't be exposed/used outside of this Route
 _RouteKey = int
@@ -181,7 +182,7 @@ class RouteWithCache(RoadMap.Route):
         self._logger.warning("Unable to find road on route near point %s", rpt)
         return None
 
-    @lru_cache(maxsize=8)
+    @cache(maxsize=8)
     def distance_between(
         self, start: RoadMap.Route.RoutePoint, end: RoadMap.Route.RoutePoint
     ) -> Optional[float]:
@@ -219,7 +220,7 @@ class RouteWithCache(RoadMap.Route):
             d += road.length
         return -d if negate else d
 
-    @lru_cache(maxsize=8)
+    @cache(maxsize=8)
     def project_along(
         self, start: RoadMap.Route.RoutePoint, distance: float
     ) -> Optional[Set[Tuple[RoadMap.Lane, float]]]:
@@ -24,7 +24,7 @@ import sys
 from collections import deque
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -49,8 +49,12 @@ from smarts.core.plan import Plan
 from smarts.core.renderer_base import RendererBase
 from smarts.core.road_map import RoadMap, Waypoint
 from smarts.core.signals import SignalState
-from smarts.core.utils.math import squared_dist
-from smarts.core.vehicle_state import VehicleState, neighborhood_vehicles_around_vehicle
+from smarts.core.utils.math import radians_to_vec, squared_dist
+from smarts.core.vehicle_state import (
+    VehicleSpatialIndex,
+    VehicleState,
+    neighborhood_vehicles_around_vehicle,
+)
 
 
 class Sensor:
@@ -270,17 +274,26 @@ class LidarSensor(Sensor):
         vehicle_state: VehicleState,
         sensor_params: Optional[SensorParams] = None,
         lidar_offset=(0, 0, 1),
+        follow_heading: bool = False,
     ):
         self._lidar_offset = np.array(lidar_offset)
+        self._follow_heading = follow_heading
 
         self._lidar = Lidar(
             vehicle_state.pose.position + self._lidar_offset,
             sensor_params,
+            heading=self._target_heading(vehicle_state),
         )
 
+    def _target_heading(self, vehicle_state: VehicleState) -> float:
+        if not self._follow_heading:
+            return 0.0
+        return float(vehicle_state.pose.heading)
+
     def follow_vehicle(self, vehicle_state: VehicleState):
         """Update the sensor to target the given vehicle."""
         self._lidar.origin = vehicle_state.pose.position + self._lidar_offset
+        self._lidar.heading = self._target_heading(vehicle_state)
 
     def __eq__(self, __value: object) -> bool:
         return isinstance(__value, LidarSensor) and (
@@ -291,6 +304,17 @@ class LidarSensor(Sensor):
     def __call__(self, bullet_client):
         return self._lidar.compute_point_cloud(bullet_client)
 
+    @staticmethod
+    def compute_point_clouds(sensors: Sequence["LidarSensor"], bullet_client):
+        """Generate the point clouds of several lidar sensors in one ray tracing pass.
+
+        Returns:
+            The point cloud of each sensor in the same format as calling the sensor.
+        """
+        return Lidar.compute_point_clouds(
+            [sensor._lidar for sensor in sensors], bullet_client
+        )
+
     def teardown(self, **kwargs):
         pass
 
@@ -456,9 +480,17 @@ class NeighborhoodVehiclesSensor(Sensor):
         """Radius to check for nearby vehicles."""
         return self._radius
 
-    def __call__(self, vehicle_state: VehicleState, vehicle_states):
+    def __call__(
+        self,
+        vehicle_state: VehicleState,
+        vehicle_states,
+        spatial_index: Optional[VehicleSpatialIndex] = None,
+    ):
         return neighborhood_vehicles_around_vehicle(
-            vehicle_state, vehicle_states, radius=self._radius
+            vehicle_state,
+            vehicle_states,
+            radius=self._radius,
+            spatial_index=spatial_index,
         )
 
     def __eq__(self, __value: object) -> bool:
@@ -476,22 +508,100 @@ class NeighborhoodVehiclesSensor(Sensor):
 
 
 class WaypointsSensor(Sensor):
-    """Detects waypoints leading forward along the vehicle plan."""
+    """Detects waypoints leading forward along the vehicle plan.
 
-    def __init__(self, lookahead=32):
+    If `incremental` is set, the sensor queries `2 * lookahead` waypoints at once and
+    afterwards only drops the waypoints that the vehicle has passed. The waypoints
+    are queried again when fewer than `lookahead` waypoints remain ahead, when the
+    vehicle moves to another lane or into a junction, and when the route changes.
+    """
+
+    def __init__(self, lookahead=32, incremental=False):
         self._lookahead = lookahead
+        self._incremental = incremental
+        self._paths: List[List[Waypoint]] = []
+        self._starts: List[int] = []
+        self._lane_id: Optional[str] = None
+        self._route_road_ids: Tuple[str, ...] = ()
 
     def __call__(self, vehicle_state: VehicleState, plan: Plan, road_map):
-        return road_map.waypoint_paths(
-            pose=vehicle_state.pose,
-            lookahead=self._lookahead,
-            route=plan.route,
+        if not self._incremental:
+            return road_map.waypoint_paths(
+                pose=vehicle_state.pose,
+                lookahead=self._lookahead,
+                route=plan.route,
+            )
+
+        route_road_ids = (
+            tuple(road.road_id for road in plan.route.roads) if plan.route else ()
         )
+        position = vehicle_state.pose.position[:2]
+        starts = None
+        if self._paths and route_road_ids == self._route_road_ids:
+            starts = self._advanced_starts(position)
+        if starts is not None:
+            lane_id = self._nearest_lane_id(
+                [path[start] for path, start in zip(self._paths, starts) if path],
+                position,
+                road_map,
+            )
+            if lane_id is None or lane_id != self._lane_id:
+                starts = None
+        if starts is None:
+            self._paths = road_map.waypoint_paths(
+                pose=vehicle_state.pose,
+                lookahead=2 * self._lookahead,
+                route=plan.route,
+            )
+            starts = [0] * len(self._paths)
+            self._lane_id = self._nearest_lane_id(
+                [path[0] for path in self._paths if path], position, road_map
+            )
+            self._route_road_ids = route_road_ids
+        self._starts = starts
+        return [
+            path[start : start + self._lookahead + 1]
+            for path, start in zip(self._paths, starts)
+        ]
+
+    def _advanced_starts(self, position: np.ndarray) -> Optional[List[int]]:
+        """Skips the waypoints the vehicle has passed on each tracked path. Returns
+        `None` if a path no longer reaches the lookahead."""
+        starts = []
+        for path, start in zip(self._paths, self._starts):
+            while start + 1 < len(path) and (
+                np.dot(
+                    position - path[start + 1].pos,
+                    radians_to_vec(path[start + 1].heading),
+                )
+                >= 0
+            ):
+                start += 1
+            if len(path) - start < self._lookahead + 1 < len(path):
+                return None
+            starts.append(start)
+        return starts
+
+    @staticmethod
+    def _nearest_lane_id(
+        path_starts: List[Waypoint], position: np.ndarray, road_map
+    ) -> Optional[str]:
+        """The lane of the path start nearest to the vehicle or `None` if the vehicle
+        is off the paths or in a junction."""
+        if not path_starts:
+            return None
+        nearest_wp = min(path_starts, key=lambda wp: squared_dist(wp.pos, position))
+        if squared_dist(nearest_wp.pos, position) > nearest_wp.lane_width**2:
+            return None
+        if road_map.lane_by_id(nearest_wp.lane_id).in_junction:
+            return None
+        return nearest_wp.lane_id
 
     def __eq__(self, __value: object) -> bool:
         return (
             isinstance(__value, WaypointsSensor)
             and self._lookahead == __value._lookahead
+            and self._incremental == __value._incremental
         )
 
     def teardown(self, **kwargs):
@@ -499,7 +609,7 @@ class WaypointsSensor(Sensor):
 
     @property
     def mutable(self) -> bool:
-        return False
+        return self._incremental
 
 
 class RoadWaypointsSensor(Sensor):
@@ -20,7 +20,8 @@
 import logging
 import re
 import sys
-from typing import Any, Dict, List, Optional, Set, Tuple
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
 
@@ -76,12 +77,11 @@ LANE_INDEX_CONSTANT = -1
 
 
 def _make_vehicle_observation(
-    road_map,
+    nv_lane: Optional[RoadMap.Lane],
     neighborhood_vehicle: VehicleState,
     sim_frame: SimulationFrame,
     interest_extension: Optional[re.Pattern],
 ):
-    nv_lane = road_map.nearest_lane(neighborhood_vehicle.pose.point, radius=3)
     if nv_lane:
         nv_road_id = nv_lane.road.road_id
         nv_lane_id = nv_lane.lane_id
@@ -107,6 +107,90 @@ def _make_vehicle_observation(
     )
 
 
+class _VehicleObservationBatch:
+    """Values shared between the observations of a group of agents. Neighborhoods are
+    resolved from the frame's vehicle spatial index and per-vehicle lane lookups are
+    done once no matter how many agents observe the vehicle."""
+
+    def __init__(self, sim_frame: SimulationFrame, road_map: RoadMap):
+        self._sim_frame = sim_frame
+        self._road_map = road_map
+        self._neighborhoods: Dict[str, List[VehicleState]] = {}
+        self._nearest_lanes: Dict[Tuple[str, Optional[float]], RoadMap.Lane] = {}
+        self._vehicle_observations: Dict[
+            Tuple[str, Optional[re.Pattern]], VehicleObservation
+        ] = {}
+        self._lane_positions: Dict[Tuple[str, str], Any] = {}
+
+    def neighborhood(self, vehicle_id: str) -> List[VehicleState]:
+        """The vehicles within the neighborhood sensor range of the given vehicle."""
+        if vehicle_id not in self._neighborhoods:
+            sensor = self._sim_frame.vehicle_sensors[vehicle_id][
+                "neighborhood_vehicle_states_sensor"
+            ]
+            self._neighborhoods[vehicle_id] = sensor(
+                self._sim_frame.vehicle_states[vehicle_id],
+                self._sim_frame.vehicle_states.values(),
+                spatial_index=self._sim_frame.vehicle_spatial_index,
+            )
+        return self._neighborhoods[vehicle_id]
+
+    def prefetch_nearest_lanes(
+        self, vehicle_states: Sequence[VehicleState], radius: Optional[float] = None
+    ):
+        """Look up the lanes nearest to all of the given vehicles in one query."""
+        missing = [
+            vehicle_state
+            for vehicle_state in vehicle_states
+            if (vehicle_state.actor_id, radius) not in self._nearest_lanes
+        ]
+        if not missing:
+            return
+        lanes = self._road_map.nearest_lane_batch(
+            [tuple(vehicle_state.pose.point)[:2] for vehicle_state in missing],
+            radius=radius,
+        )
+        for vehicle_state, lane in zip(missing, lanes):
+            self._nearest_lanes[(vehicle_state.actor_id, radius)] = lane
+
+    def nearest_lane(
+        self, vehicle_state: VehicleState, radius: Optional[float] = None
+    ) -> Optional[RoadMap.Lane]:
+        """The lane nearest to the vehicle."""
+        key = (vehicle_state.actor_id, radius)
+        if key not in self._nearest_lanes:
+            self._nearest_lanes[key] = self._road_map.nearest_lane(
+                vehicle_state.pose.point, radius=radius
+            )
+        return self._nearest_lanes[key]
+
+    def vehicle_observation(
+        self, vehicle_state: VehicleState, interest_extension: Optional[re.Pattern]
+    ) -> VehicleObservation:
+        """The observation of a neighborhood vehicle without lane position."""
+        key = (vehicle_state.actor_id, interest_extension)
+        if key not in self._vehicle_observations:
+            self._vehicle_observations[key] = _make_vehicle_observation(
+                self.nearest_lane(vehicle_state, radius=3),
+                vehicle_state,
+                self._sim_frame,
+                interest_extension,
+            )
+        return self._vehicle_observations[key]
+
+    def lane_position(
+        self,
+        lane_position_sensor: LanePositionSensor,
+        lane: RoadMap.Lane,
+        vehicle_state: VehicleState,
+    ):
+        """The position of the vehicle relative to the given lane."""
+        key = (lane.lane_id, vehicle_state.actor_id)
+        if key not in self._lane_positions:
+            self._lane_positions[key] = lane_position_sensor(lane, vehicle_state)
+        return self._lane_positions[key]
+
+
 class SensorState:
     """Sensor state information"""
 
@@ -194,14 +278,22 @@ class Sensors:
         sim_frame: SimulationFrame,
         sim_local_constants: SimulationLocalConstants,
         agent_ids_for_group,
+        agent_costs: Optional[Dict[str, float]] = None,
     ):
-        """Run the serializable sensors in a batch."""
+        """Run the serializable sensors in a batch.
+
+        Args:
+            agent_costs (Optional[Dict[str, float]]):
+                If given, this is filled with the time in seconds the sensors of each agent took.
+        """
         observations, dones, updated_sensors = {}, {}, {}
+        batch = _VehicleObservationBatch(sim_frame, sim_local_constants.road_map)
         for agent_id in agent_ids_for_group:
             vehicle_ids = sim_frame.vehicles_for_agents.get(agent_id)
             interface = sim_frame.agent_interfaces.get(agent_id)
             if not vehicle_ids:
                 continue
+            start = time.perf_counter()
             for vehicle_id in vehicle_ids:
                 (
                     observations[agent_id],
@@ -214,9 +306,64 @@ class Sensors:
                     sim_frame.sensor_states[vehicle_id],
                     vehicle_id,
                     agent_id,
+                    batch=batch,
                 )
+            if agent_costs is not None:
+                agent_costs[agent_id] = time.perf_counter() - start
         return observations, dones, updated_sensors
 
+    @classmethod
+    def observe_serialization_unsafe_sensor_batch(
+        cls,
+        sim_frame: SimulationFrame,
+        sim_local_constants: SimulationLocalConstants,
+        agent_ids,
+        renderer,
+        bullet_client,
+    ):
+        """Run the sensors that can only be done on the main thread for a group of agents.
+        The lidars of all of the agents' vehicles are traced together.
+
+        Returns:
+            The partial observations of each agent and the updated sensors of each vehicle.
+        """
+        vehicle_ids_by_agent = {
+            agent_id: sim_frame.vehicles_for_agents[agent_id] for agent_id in agent_ids
+        }
+        lidar_sensors: Dict[str, LidarSensor] = {}
+        for vehicle_ids in vehicle_ids_by_agent.values():
+            for vehicle_id in vehicle_ids:
+                lidar_sensor = sim_frame.vehicle_sensors[vehicle_id].get("lidar_sensor")
+                if lidar_sensor:
+                    lidar_sensor.follow_vehicle(sim_frame.vehicle_states[vehicle_id])
+                    lidar_sensors[vehicle_id] = lidar_sensor
+        lidar_point_clouds = dict(
+            zip(
+                lidar_sensors,
+                LidarSensor.compute_point_clouds(
+                    list(lidar_sensors.values()), bullet_client
+                ),
+            )
+        )
+
+        rendering, updated_sensors = {}, {}
+        for agent_id, vehicle_ids in vehicle_ids_by_agent.items():
+            for vehicle_id in vehicle_ids:
+                (
+                    rendering[agent_id],
+                    updated_sensors[vehicle_id],
+                ) = cls.process_serialization_unsafe_sensors(
+                    sim_frame,
+                    sim_local_constants,
+                    agent_id,
+                    sim_frame.sensor_states[vehicle_id],
+                    vehicle_id,
+                    renderer,
+                    bullet_client,
+                    lidar_point_cloud=lidar_point_clouds.get(vehicle_id),
+                )
+        return rendering, updated_sensors
+
     @staticmethod
     def process_serialization_unsafe_sensors(
         sim_frame: SimulationFrame,
@@ -226,14 +373,20 @@ class Sensors:
         vehicle_id,
         renderer,
         bullet_client,
+        lidar_point_cloud=None,
     ):
-        """Run observations that can only be done on the main thread."""
+        """Run observations that can only be done on the main thread.
+
+        Args:
+            lidar_point_cloud:
+                The already traced point cloud of the vehicle's lidar, if any.
+        """
         vehicle_sensors: Dict[str, Any] = sim_frame.vehicle_sensors[vehicle_id]
 
         vehicle_state = sim_frame.vehicle_states[vehicle_id]
-        lidar = None
+        lidar = lidar_point_cloud
         lidar_sensor = vehicle_sensors.get("lidar_sensor")
-        if lidar_sensor:
+        if lidar_sensor and lidar is None:
             lidar_sensor.follow_vehicle(vehicle_state)
             lidar = lidar_sensor(bullet_client)
 
@@ -274,8 +427,16 @@ class Sensors:
         sensor_state,
         vehicle_id,
         agent_id=None,
+        batch: Optional[_VehicleObservationBatch] = None,
     ):
-        """Observations that can be done on any thread."""
+        """Observations that can be done on any thread.
+
+        Args:
+            batch (Optional[_VehicleObservationBatch]):
+                Values shared with the other observations generated from the same frame.
+        """
+        if batch is None:
+            batch = _VehicleObservationBatch(sim_frame, sim_local_constants.road_map)
         vehicle_sensors = sim_frame.vehicle_sensors[vehicle_id]
         vehicle_state = sim_frame.vehicle_states[vehicle_id]
         plan = sensor_state.get_plan(sim_local_constants.road_map)
@@ -291,17 +452,17 @@ class Sensors:
                 and interface.done_criteria.interest is not None
                 else None
             )
-            for nv in neighborhood_vehicle_states_sensor(
-                vehicle_state, sim_frame.vehicle_states.values()
-            ):
-                veh_obs = _make_vehicle_observation(
-                    sim_local_constants.road_map, nv, sim_frame, interest_pattern
-                )
-                lane_position_sensor = vehicle_sensors.get("lane_position_sensor")
+            lane_position_sensor = vehicle_sensors.get("lane_position_sensor")
+            neighborhood = batch.neighborhood(vehicle_id)
+            batch.prefetch_nearest_lanes(neighborhood, radius=3)
+            for nv in neighborhood:
+                veh_obs = batch.vehicle_observation(nv, interest_pattern)
                 nv_lane_pos = None
                 if veh_obs.lane_id is not LANE_ID_CONSTANT and lane_position_sensor:
-                    nv_lane_pos = lane_position_sensor(
-                        sim_local_constants.road_map.lane_by_id(veh_obs.lane_id), nv
+                    nv_lane_pos = batch.lane_position(
+                        lane_position_sensor,
+                        sim_local_constants.road_map.lane_by_id(veh_obs.lane_id),
+                        nv,
                     )
                 neighborhood_vehicle_states.append(
                     veh_obs._replace(lane_position=nv_lane_pos)
@@ -319,9 +480,7 @@ class Sensors:
                 within_radius=vehicle_state.dimensions.length,
             )
 
-        closest_lane = sim_local_constants.road_map.nearest_lane(
-            vehicle_state.pose.point
-        )
+        closest_lane = batch.nearest_lane(vehicle_state)
         ego_lane_pos = None
         if closest_lane:
             ego_lane_id = closest_lane.lane_id
@@ -55,22 +55,18 @@ class LocalSensorResolver(SensorResolver):
 
         # While observation processes are operating do rendering
         with timeit("rendering", logger.info):
-            rendering = {}
-            for agent_id in agent_ids:
-                for vehicle_id in sim_frame.vehicles_for_agents[agent_id]:
-                    (
-                        rendering[agent_id],
-                        updated_unsafe_sensors,
-                    ) = Sensors.process_serialization_unsafe_sensors(
-                        sim_frame,
-                        sim_local_constants,
-                        agent_id,
-                        sim_frame.sensor_states[vehicle_id],
-                        vehicle_id,
-                        renderer,
-                        bullet_client,
-                    )
-                    updated_sensors[vehicle_id].update(updated_unsafe_sensors)
+            (
+                rendering,
+                updated_unsafe_sensors,
+            ) = Sensors.observe_serialization_unsafe_sensor_batch(
+                sim_frame,
+                sim_local_constants,
+                agent_ids,
+                renderer,
+                bullet_client,
+            )
+            for vehicle_id, values in updated_unsafe_sensors.items():
+                updated_sensors[vehicle_id].update(values)
 
         with timeit(f"merging observations", logger.info):
             # Merge sensor information
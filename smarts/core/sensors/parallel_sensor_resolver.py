@@ -19,35 +19,84 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import heapq
 import logging
 import multiprocessing as mp
+import struct
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Any, Dict, List, Optional, Set
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import psutil
 
 import smarts.core.serialization.default as serializer
 from smarts.core import config
 from smarts.core.sensors import SensorResolver, Sensors
-from smarts.core.simulation_frame import SimulationFrame
+from smarts.core.simulation_frame import SimulationFrame, SimulationFrameDelta
 from smarts.core.simulation_local_constants import SimulationLocalConstants
 from smarts.core.utils.file import replace
 from smarts.core.utils.logging import timeit
 
 logger = logging.getLogger(__name__)
 
+TRANSPORT_PIPE = "pipe"
+TRANSPORT_SHARED_MEMORY = "shared_memory"
 
-class ParallelSensorResolver(SensorResolver):
-    """This implementation of the sensor resolver completes observations in parallel."""
 
-    def __init__(self, process_count_override: Optional[int] = None) -> None:
+class ParallelSensorResolver(SensorResolver):
+    """This implementation of the sensor resolver completes observations in parallel.
+
+    Args:
+        process_count_override (Optional[int]):
+            The number of worker processes to use instead of the configured amount.
+        transport (Optional[str]):
+            How the simulation frame is sent to the workers ("pipe"|"shared_memory").
+            "pipe" sends the serialized frame through each worker's pipe, "shared_memory"
+            writes the serialized frame once to shared memory and only sends a reference.
+            Defaults to the `core:observation_transport` engine configuration.
+        delta_frames (Optional[bool]):
+            If workers that received the previous frame should only be sent the changes
+            since that frame. Defaults to the `core:observation_delta_frames` engine
+            configuration.
+        batches_per_worker (int):
+            The number of batches the agents assigned to each worker are split into. Batches
+            are sent one at a time and a worker that finishes its own batches takes the
+            remaining batches of the most loaded worker. Defaults to 2.
+    """
+
+    def __init__(
+        self,
+        process_count_override: Optional[int] = None,
+        transport: Optional[str] = None,
+        delta_frames: Optional[bool] = None,
+        batches_per_worker: int = 2,
+    ) -> None:
         super().__init__()
         self._logger = logging.getLogger("Sensors")
         self._sim_local_constants: SimulationLocalConstants = None
         self._workers: List[SensorsWorker] = []
         self._process_count_override = process_count_override
+        if transport is None:
+            transport = config()(
+                "core", "observation_transport", default=TRANSPORT_PIPE
+            )
+        if transport not in (TRANSPORT_PIPE, TRANSPORT_SHARED_MEMORY):
+            raise LookupError(
+                f"SMARTS_CORE_OBSERVATION_TRANSPORT={transport} is not a valid option."
+            )
+        self._transport = transport
+        self._frame_arena: Optional[SharedMemoryArena] = None
+        if delta_frames is None:
+            delta_frames = config()(
+                "core", "observation_delta_frames", default=False, cast=bool
+            )
+        self._delta_frames = delta_frames
+        self._last_frame: Optional[SimulationFrame] = None
+        self._frame_generation = 0
+        self._agent_costs = AgentObservationCosts()
+        self._batches_per_worker = max(1, batches_per_worker)
 
     def observe(
         self,
@@ -90,59 +139,81 @@ class ParallelSensorResolver(SensorResolver):
             f"parallizable observations with {len(agent_ids)} and {len(workers)}",
             logger.info,
         ):
-            agent_ids_for_grouping = list(agent_ids)
+            self._agent_costs.prune(agent_ids)
             agent_groups = [
-                agent_ids_for_grouping[i::used_processes] for i in range(used_processes)
+                agent_group
+                for agent_group in self._agent_costs.partition(
+                    agent_ids, used_processes
+                )
+                if agent_group
             ]
-            worker_args = WorkerKwargs(sim_frame=sim_frame)
-            for i, agent_group in enumerate(agent_groups):
-                if not agent_group:
-                    break
-                with timeit(f"submitting {len(agent_group)} agents", logger.info):
-                    workers[i].send(
+            frame_requests = self._frame_requests(
+                sim_frame, workers[: len(agent_groups)]
+            )
+            queued_batches: Dict[SensorsWorker, List[List[str]]] = {}
+            for worker, agent_group, (request_id, worker_args) in zip(
+                workers, agent_groups, frame_requests
+            ):
+                batch, *queued_batches[worker] = self._agent_costs.split(
+                    agent_group, self._batches_per_worker
+                )
+                with timeit(f"submitting {len(batch)} agents", logger.info):
+                    worker.send(
                         SensorsWorker.Request(
-                            SensorsWorkerRequestId.SIMULATION_FRAME,
-                            worker_args.merged(WorkerKwargs(agent_ids=agent_group)),
+                            request_id,
+                            worker_args.merged(WorkerKwargs(agent_ids=batch)),
                         )
                     )
-                    used_workers.append(workers[i])
+                    used_workers.append(worker)
 
             # While observation processes are operating do rendering
             with timeit("rendering", logger.info):
-                rendering = {}
-                for agent_id in agent_ids:
-                    for vehicle_id in sim_frame.vehicles_for_agents[agent_id]:
-                        (
-                            rendering[agent_id],
-                            updated_unsafe_sensors,
-                        ) = Sensors.process_serialization_unsafe_sensors(
-                            sim_frame,
-                            sim_local_constants,
-                            agent_id,
-                            sim_frame.sensor_states[vehicle_id],
-                            vehicle_id,
-                            renderer,
-                            bullet_client,
-                        )
-                        updated_sensors[vehicle_id].update(updated_unsafe_sensors)
+                (
+                    rendering,
+                    updated_unsafe_sensors,
+                ) = Sensors.observe_serialization_unsafe_sensor_batch(
+                    sim_frame,
+                    sim_local_constants,
+                    agent_ids,
+                    renderer,
+                    bullet_client,
+                )
+                for vehicle_id, values in updated_unsafe_sensors.items():
+                    updated_sensors[vehicle_id].update(values)
 
             # Collect futures
             with timeit("waiting for observations", logger.info):
-                if used_workers:
-                    while agent_ids != set(observations):
-                        assert all(
-                            w.running for w in used_workers
-                        ), "A process worker crashed."
-                        for result in mp.connection.wait(
-                            [worker.connection for worker in used_workers], timeout=5
-                        ):
-                            # pytype: disable=attribute-error
-                            obs, ds, u_sens = result.recv()
-                            # pytype: enable=attribute-error
-                            observations.update(obs)
-                            dones.update(ds)
-                            for v_id, values in u_sens.items():
-                                updated_sensors[v_id].update(values)
+                workers_by_connection = {
+                    worker.connection: worker for worker in used_workers
+                }
+                busy_workers = set(used_workers)
+                while busy_workers:
+                    assert all(
+                        w.running for w in used_workers
+                    ), "A process worker crashed."
+                    for result in mp.connection.wait(
+                        [worker.connection for worker in busy_workers], timeout=5
+                    ):
+                        # pytype: disable=attribute-error
+                        obs, ds, u_sens, costs = result.recv()
+                        # pytype: enable=attribute-error
+                        observations.update(obs)
+                        dones.update(ds)
+                        for v_id, values in u_sens.items():
+                            updated_sensors[v_id].update(values)
+                        self._agent_costs.record(costs)
+
+                        worker = workers_by_connection[result]
+                        busy_workers.discard(worker)
+                        batch = self._next_batch(worker, queued_batches)
+                        if batch:
+                            worker.send(
+                                SensorsWorker.Request(
+                                    SensorsWorkerRequestId.AGENT_IDS,
+                                    WorkerKwargs(agent_ids=batch),
+                                )
+                            )
+                            busy_workers.add(worker)
 
             with timeit(f"merging observations", logger.info):
                 # Merge sensor information
@@ -151,6 +222,92 @@ class ParallelSensorResolver(SensorResolver):
 
         return observations, dones, updated_sensors
 
+    def _next_batch(
+        self,
+        worker: "SensorsWorker",
+        queued_batches: Dict["SensorsWorker", List[List[str]]],
+    ) -> Optional[List[str]]:
+        """Get the next batch of agents for the worker, taking work from the worker with the
+        most remaining work if the given worker has no more of its own."""
+        own_batches = queued_batches.get(worker)
+        if own_batches:
+            return own_batches.pop(0)
+        most_loaded_batches = max(
+            queued_batches.values(),
+            key=lambda batches: sum(
+                self._agent_costs.estimate(a_id) for batch in batches for a_id in batch
+            ),
+            default=None,
+        )
+        if not most_loaded_batches:
+            return None
+        return most_loaded_batches.pop()
+
+    def _frame_requests(
+        self, sim_frame: SimulationFrame, workers: List["SensorsWorker"]
+    ) -> List[Tuple["SensorsWorkerRequestId", "WorkerKwargs"]]:
+        """Generate the frame update for each of the given workers. Each distinct update is
+        only serialized once and is sent using the configured transport."""
+        previous_generation = self._frame_generation
+        self._frame_generation += 1
+
+        full_payload = dict(sim_frame=sim_frame)
+        payloads = [full_payload] * len(workers)
+        if self._delta_frames:
+            if self._last_frame is not None and any(
+                w.frame_generation == previous_generation for w in workers
+            ):
+                with timeit("generating frame delta", logger.info):
+                    delta_payload = dict(
+                        sim_frame_delta=SimulationFrameDelta.between(
+                            self._last_frame, sim_frame
+                        )
+                    )
+                payloads = [
+                    delta_payload
+                    if w.frame_generation == previous_generation
+                    else full_payload
+                    for w in workers
+                ]
+            self._last_frame = sim_frame
+        for worker in workers:
+            worker.frame_generation = self._frame_generation
+
+        if self._transport == TRANSPORT_SHARED_MEMORY:
+            # Only one payload can be held in the shared memory at a time.
+            if any(payload is not payloads[0] for payload in payloads):
+                payloads = [full_payload] * len(workers)
+            if not payloads:
+                return []
+            if self._frame_arena is None:
+                self._frame_arena = SharedMemoryArena()
+            with timeit("writing frame to shared memory", logger.info):
+                frame_reference = self._frame_arena.write(
+                    serializer.dumps(
+                        {**payloads[0], "sim_frame_generation": self._frame_generation}
+                    )
+                )
+            return [
+                (
+                    SensorsWorkerRequestId.SHARED_SIMULATION_FRAME,
+                    WorkerKwargs(sim_frame_reference=frame_reference),
+                )
+            ] * len(workers)
+
+        serialized_payloads: Dict[int, WorkerKwargs] = {}
+        for payload in payloads:
+            if id(payload) not in serialized_payloads:
+                serialized_payloads[id(payload)] = WorkerKwargs(
+                    **payload, sim_frame_generation=self._frame_generation
+                )
+        return [
+            (
+                SensorsWorkerRequestId.SIMULATION_FRAME,
+                serialized_payloads[id(payload)],
+            )
+            for payload in payloads
+        ]
+
     def __del__(self):
         try:
             self.stop_all_workers()
@@ -162,6 +319,10 @@ class ParallelSensorResolver(SensorResolver):
         for worker in self._workers:
             worker.stop()
         self._workers = []
+        self._last_frame = None
+        if self._frame_arena is not None:
+            self._frame_arena.close()
+            self._frame_arena = None
 
     def _validate_configuration(self, local_constants: SimulationLocalConstants):
         """Check that constants have not changed which might indicate that the workers need to be updated."""
@@ -213,6 +374,207 @@ class ParallelSensorResolver(SensorResolver):
     def process_count_override(self, count: Optional[int]):
         self._process_count_override = count
 
+    @property
+    def agent_costs(self) -> "AgentObservationCosts":
+        """The observation cost estimates used to distribute agents to workers."""
+        return self._agent_costs
+
+    @property
+    def transport(self) -> str:
+        """The method used to send the simulation frame to the workers.
+
+        Returns:
+            str: Either "pipe" or "shared_memory".
+        """
+        return self._transport
+
+
+class AgentObservationCosts:
+    """Tracks how long the observations of each agent take to generate and uses that to
+    balance agents across workers.
+
+    Args:
+        smoothing (float):
+            The weight of the newest measurement in the running average of an agent's cost.
+    """
+
+    def __init__(self, smoothing: float = 0.3) -> None:
+        self._smoothing = smoothing
+        self._costs: Dict[str, float] = {}
+
+    def record(self, costs: Dict[str, float]):
+        """Update the cost estimates with measured observation times.
+
+        Args:
+            costs (Dict[str, float]): The time in seconds each agent's observation took.
+        """
+        for agent_id, cost in costs.items():
+            previous = self._costs.get(agent_id)
+            self._costs[agent_id] = (
+                cost
+                if previous is None
+                else previous + self._smoothing * (cost - previous)
+            )
+
+    def estimate(self, agent_id: str) -> float:
+        """The expected observation time of the agent. Agents that have not been measured
+        are expected to cost the average of the measured agents."""
+        cost = self._costs.get(agent_id)
+        if cost is not None:
+            return cost
+        if not self._costs:
+            return 1.0
+        return sum(self._costs.values()) / len(self._costs)
+
+    def prune(self, agent_ids: Set[str]):
+        """Discard the estimates of agents not in the given agents."""
+        for agent_id in self._costs.keys() - agent_ids:
+            del self._costs[agent_id]
+
+    def partition(self, agent_ids: Set[str], count: int) -> List[List[str]]:
+        """Partition the agents into groups of similar total cost. Each group is sorted
+        from most to least expensive.
+
+        Args:
+            agent_ids (Set[str]): The agents to partition.
+            count (int): The number of groups.
+
+        Returns:
+            List[List[str]]: The groups of agents.
+        """
+        groups: List[List[str]] = [[] for _ in range(count)]
+        loads = [(0.0, i) for i in range(count)]
+        for agent_id in sorted(
+            agent_ids, key=lambda a_id: (-self.estimate(a_id), a_id)
+        ):
+            load, i = heapq.heappop(loads)
+            groups[i].append(agent_id)
+            heapq.heappush(loads, (load + self.estimate(agent_id), i))
+        return groups
+
+    def split(self, agent_group: List[str], count: int) -> List[List[str]]:
+        """Split a group of agents into at most the given number of batches of similar total
+        cost while keeping the group order.
+
+        Args:
+            agent_group (List[str]): The agents to split.
+            count (int): The maximum number of batches.
+
+        Returns:
+            List[List[str]]: The non-empty batches.
+        """
+        target = sum(self.estimate(a_id) for a_id in agent_group) / max(1, count)
+        batches: List[List[str]] = [[]]
+        batch_cost = 0.0
+        for agent_id in agent_group:
+            if batches[-1] and batch_cost >= target and len(batches) < count:
+                batches.append([])
+                batch_cost = 0.0
+            batches[-1].append(agent_id)
+            batch_cost += self.estimate(agent_id)
+        return batches
+
+
+@dataclass(frozen=True)
+class SharedMemoryReference:
+    """A reference to a payload written into a `SharedMemoryArena`."""
+
+    name: str
+    """The name of the shared memory block."""
+    generation: int
+    """The write generation of the payload in the block."""
+    size: int
+    """The size of the payload in bytes."""
+
+    def read(self, attachments: Dict[str, shared_memory.SharedMemory]):
+        """Deserialize the referenced payload.
+
+        Args:
+            attachments (Dict[str, shared_memory.SharedMemory]):
+                Shared memory blocks already attached by this process. Blocks that are no
+                longer referenced are closed and the referenced block is attached if needed.
+
+        Returns:
+            Any: The deserialized payload.
+        """
+        for name in [n for n in attachments if n != self.name]:
+            attachments.pop(name).close()
+        shm = attachments.get(self.name)
+        if shm is None:
+            shm = attachments[self.name] = shared_memory.SharedMemory(name=self.name)
+
+        generation, size = SharedMemoryArena.HEADER.unpack_from(shm.buf, 0)
+        assert (
+            generation == self.generation and size == self.size
+        ), f"Shared memory `{self.name}` is at generation {generation} not {self.generation}."
+        header_size = SharedMemoryArena.HEADER.size
+        payload = shm.buf[header_size : header_size + size]
+        try:
+            return serializer.loads(payload)
+        finally:
+            payload.release()
+
+
+class SharedMemoryArena:
+    """A block of shared memory that serialized data is written into once so that any
+    number of worker processes can read it. The block is replaced by a larger one when a
+    payload does not fit.
+
+    Args:
+        initial_size (int): The starting capacity of the block in bytes.
+    """
+
+    HEADER = struct.Struct("<QQ")
+    """The block header of (generation, payload size)."""
+
+    def __init__(self, initial_size: int = 2**20) -> None:
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._generation = 0
+        self._reserve(initial_size)
+
+    def _reserve(self, size: int):
+        required = size + self.HEADER.size
+        if self._shm is not None and self._shm.size >= required:
+            return
+        capacity = max(required, 2 * self._shm.size if self._shm is not None else 0)
+        self.close()
+        self._shm = shared_memory.SharedMemory(create=True, size=capacity)
+
+    def write(self, data: bytes) -> SharedMemoryReference:
+        """Write the data into shared memory, replacing the previous payload.
+
+        Args:
+            data (bytes): The serialized payload.
+
+        Returns:
+            SharedMemoryReference: A reference which workers can use to read the payload.
+        """
+        self._reserve(len(data))
+        self._generation += 1
+        header_size = self.HEADER.size
+        self.HEADER.pack_into(self._shm.buf, 0, self._generation, len(data))
+        self._shm.buf[header_size : header_size + len(data)] = data
+        return SharedMemoryReference(self._shm.name, self._generation, len(data))
+
+    @property
+    def capacity(self) -> int:
+        """The current size of the shared memory block in bytes."""
+        return self._shm.size if self._shm is not None else 0
+
+    def close(self):
+        """Release and unlink the shared memory block."""
+        if self._shm is None:
+            return
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except (AttributeError, FileNotFoundError):
+            pass
+
 
 class WorkerKwargs:
     """Used to serialize arguments for a worker upfront."""
@@ -356,6 +718,8 @@ class SensorsWorkerRequestId(IntEnum):
 
     SIMULATION_FRAME = 1
     SIMULATION_LOCAL_CONSTANTS = 2
+    SHARED_SIMULATION_FRAME = 3
+    AGENT_IDS = 4
 
 
 class SensorsWorker(ProcessWorker):
@@ -363,15 +727,50 @@ class SensorsWorker(ProcessWorker):
 
     def __init__(self) -> None:
         super().__init__()
+        self._frame_generation: Optional[int] = None
+
+    @property
+    def frame_generation(self) -> Optional[int]:
+        """The generation of the last simulation frame sent to this worker."""
+        return self._frame_generation
+
+    @frame_generation.setter
+    def frame_generation(self, generation: Optional[int]):
+        self._frame_generation = generation
 
     @classmethod
     def _do_work(cls, state):
-        return cls.local(state=state)
+        return cls.local(state)
 
     @classmethod
     def _on_request(cls, state: Dict, request: ProcessWorker.Request) -> bool:
         assert request.data is None or isinstance(request.data, WorkerKwargs)
-        if request.id == SensorsWorkerRequestId.SIMULATION_FRAME:
+        if request.id in (
+            SensorsWorkerRequestId.SIMULATION_FRAME,
+            SensorsWorkerRequestId.SHARED_SIMULATION_FRAME,
+        ):
+            data = request.data.deserialize()
+            if request.id == SensorsWorkerRequestId.SHARED_SIMULATION_FRAME:
+                frame_reference: SharedMemoryReference = data.pop("sim_frame_reference")
+                with timeit("reading frame from shared memory", logger.info):
+                    data.update(
+                        frame_reference.read(
+                            state.setdefault("shared_memory_attachments", {})
+                        )
+                    )
+            sim_frame_delta: Optional[SimulationFrameDelta] = data.pop(
+                "sim_frame_delta", None
+            )
+            if sim_frame_delta is not None:
+                assert (
+                    state.get("sim_frame_generation")
+                    == data["sim_frame_generation"] - 1
+                ), "Frame delta does not follow from the frame held by the worker."
+                with timeit("applying frame delta", logger.info):
+                    data["sim_frame"] = sim_frame_delta.apply(state["sim_frame"])
+            state.update(data)
+            return True
+        if request.id == SensorsWorkerRequestId.AGENT_IDS:
             state.update(request.data.deserialize())
             return True
         if request.id == SensorsWorkerRequestId.SIMULATION_LOCAL_CONSTANTS:
@@ -381,10 +780,13 @@ class SensorsWorker(ProcessWorker):
 
     @staticmethod
     def local(state: Dict):
-        """The work method on the local thread."""
+        """The work method on the local thread. Returns the observations, dones, and
+        updated sensors of the agents together with the observation cost of each."""
         sim_local_constants = state["sim_local_constants"]
         sim_frame = state["sim_frame"]
         agent_ids = state["agent_ids"]
-        return Sensors.observe_serializable_sensor_batch(
-            sim_frame, sim_local_constants, agent_ids
+        agent_costs = {}
+        observations, dones, updated = Sensors.observe_serializable_sensor_batch(
+            sim_frame, sim_local_constants, agent_ids, agent_costs=agent_costs
         )
+        return observations, dones, updated, agent_costs
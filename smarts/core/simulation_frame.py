@@ -21,13 +21,13 @@
 # THE SOFTWARE.
 import logging
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from functools import cached_property, lru_cache
 from typing import Any, Dict, List, Optional, Set
 
 from smarts.core.actor import ActorState
 from smarts.core.agent_interface import AgentInterface
-from smarts.core.vehicle_state import Collision, VehicleState
+from smarts.core.vehicle_state import Collision, VehicleSpatialIndex, VehicleState
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +75,11 @@ class SimulationFrame:
         """Get actor states paired by their ids."""
         return {a_s.actor_id: a_s for a_s in self.actor_states}
 
+    @cached_property
+    def vehicle_spatial_index(self) -> VehicleSpatialIndex:
+        """A spatial index over the vehicle states in this frame."""
+        return VehicleSpatialIndex(self.vehicle_states.values())
+
     @lru_cache(28)
     def interest_actors(
         self, extension: Optional[re.Pattern] = None
@@ -142,3 +147,142 @@ class SimulationFrame:
             assert self.agent_ids.union(self.vehicles_for_agents) == self.agent_ids
             assert len(self.agent_ids - set(self.agent_interfaces)) == 0
             assert not len(self.vehicle_ids.symmetric_difference(self.vehicle_states))
+
+
+@dataclass(frozen=True)
+class _MappingDelta:
+    updated: Dict[str, Any]
+    removed: Set[str]
+
+    @classmethod
+    def between(cls, previous: Dict[str, Any], current: Dict[str, Any], changed):
+        return cls(
+            updated={
+                k: v
+                for k, v in current.items()
+                if k not in previous or changed(previous[k], v)
+            },
+            removed=set(previous.keys() - current.keys()),
+        )
+
+    def apply(self, previous: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **{k: v for k, v in previous.items() if k not in self.removed},
+            **self.updated,
+        }
+
+
+def _is_replaced(previous, current) -> bool:
+    return previous is not current
+
+
+@dataclass(frozen=True)
+class SimulationFrameDelta:
+    """The changes between two simulation frames. This allows a copy of the previous frame
+    that is held elsewhere (e.g. in a sensor worker process) to be patched into the current
+    frame without sending the values that did not change.
+
+    Values are compared by identity. Sensors that are `mutable` are always considered changed.
+    """
+
+    replaced: Dict[str, Any] = field(default_factory=dict)
+    """Fields that were replaced entirely."""
+    mappings: Dict[str, _MappingDelta] = field(default_factory=dict)
+    """Per entry changes to mapping fields."""
+    vehicle_sensors: Dict[str, _MappingDelta] = field(default_factory=dict)
+    """Per sensor changes for vehicles that remained between the frames."""
+    actor_state_order: List[str] = field(default_factory=list)
+    """The ordering of the actor ids in `actor_states`."""
+
+    _MAPPING_FIELDS = (
+        "agent_interfaces",
+        "agent_vehicle_controls",
+        "vehicle_collisions",
+        "vehicle_states",
+        "vehicles_for_agents",
+    )
+
+    @classmethod
+    def between(
+        cls, previous: SimulationFrame, current: SimulationFrame
+    ) -> "SimulationFrameDelta":
+        """Generate the changes needed to transform the previous frame into the current frame.
+
+        Args:
+            previous (SimulationFrame): The frame the changes are relative to.
+            current (SimulationFrame): The frame to describe.
+
+        Returns:
+            SimulationFrameDelta: The differences between the frames.
+        """
+        delta = cls(
+            actor_state_order=[a_s.actor_id for a_s in current.actor_states],
+        )
+        for f in fields(SimulationFrame):
+            name = f.name
+            previous_value = getattr(previous, name)
+            current_value = getattr(current, name)
+            if name in cls._MAPPING_FIELDS:
+                delta.mappings[name] = _MappingDelta.between(
+                    previous_value, current_value, _is_replaced
+                )
+            elif name == "actor_states":
+                delta.mappings[name] = _MappingDelta.between(
+                    previous.actor_states_by_id,
+                    current.actor_states_by_id,
+                    _is_replaced,
+                )
+            elif name == "vehicle_sensors":
+                delta.mappings[name] = _MappingDelta(
+                    updated={
+                        v_id: sensors
+                        for v_id, sensors in current_value.items()
+                        if v_id not in previous_value
+                    },
+                    removed=set(previous_value.keys() - current_value.keys()),
+                )
+                for v_id, sensors in current_value.items():
+                    if v_id in previous_value:
+                        delta.vehicle_sensors[v_id] = _MappingDelta.between(
+                            previous_value[v_id],
+                            sensors,
+                            lambda p, c: p is not c or c.mutable,
+                        )
+            elif previous_value is not current_value:
+                delta.replaced[name] = current_value
+        return delta
+
+    def apply(self, previous: SimulationFrame) -> SimulationFrame:
+        """Patch the previous frame with these changes.
+
+        Args:
+            previous (SimulationFrame):
+                The same frame that was used to generate this delta.
+
+        Returns:
+            SimulationFrame: The resulting frame.
+        """
+        values = {}
+        for f in fields(SimulationFrame):
+            name = f.name
+            if name in self.replaced:
+                values[name] = self.replaced[name]
+            elif name == "actor_states":
+                actor_states_by_id = self.mappings[name].apply(
+                    previous.actor_states_by_id
+                )
+                values[name] = [
+                    actor_states_by_id[a_id] for a_id in self.actor_state_order
+                ]
+            elif name == "vehicle_sensors":
+                vehicle_sensors = self.mappings[name].apply(previous.vehicle_sensors)
+                for v_id, sensors_delta in self.vehicle_sensors.items():
+                    vehicle_sensors[v_id] = sensors_delta.apply(
+                        previous.vehicle_sensors[v_id]
+                    )
+                values[name] = vehicle_sensors
+            elif name in self.mappings:
+                values[name] = self.mappings[name].apply(getattr(previous, name))
+            else:
+                values[name] = getattr(previous, name)
+        return SimulationFrame(**values)
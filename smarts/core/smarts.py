@@ -49,6 +49,7 @@ from .agents_provider import (
     TrajectoryInterpolationProvider,
 )
 from .bubble_manager import BubbleManager
+from .chassis import contacting_bullet_ids
 from .controllers import ActionSpaceType
 from .coordinates import BoundingBox, Point
 from .external_provider import ExternalProvider
@@ -69,7 +70,12 @@ from .utils.math import rounder_for_dt
 from .utils.pybullet import bullet_client as bc
 from .vehicle import Vehicle
 from .vehicle_index import VehicleIndex
-from .vehicle_state import Collision, VehicleState, neighborhood_vehicles_around_vehicle
+from .vehicle_state import (
+    Collision,
+    VehicleSpatialIndex,
+    VehicleState,
+    neighborhood_vehicles_around_vehicle,
+)
 
 logging.basicConfig(
     format="%(asctime)s.%(msecs)03d %(levelname)s: {%(module)s} %(message)s",
@@ -213,6 +219,9 @@ class SMARTS(ProviderManager):
         # TODO: Should not be stored in SMARTS
         self._vehicle_collisions: Dict[str, List[Collision]] = dict()
         self._vehicle_states = []
+        self._vehicle_spatial_index: Tuple[
+            Optional[List[VehicleState]], Optional[VehicleSpatialIndex]
+        ] = (None, None)
 
         self._bubble_manager = None
         self._trap_manager: TrapManager = TrapManager()
@@ -1430,32 +1439,49 @@ class SMARTS(ProviderManager):
 
         vehicle = self._vehicle_index.vehicle_by_id(vehicle_id)
         return neighborhood_vehicles_around_vehicle(
-            vehicle.state, self._vehicle_states, radius
+            vehicle.state,
+            self._vehicle_states,
+            radius,
+            spatial_index=self._vehicle_states_spatial_index(),
         )
 
+    def _vehicle_states_spatial_index(self) -> VehicleSpatialIndex:
+        # The vehicle states are replaced with a new list whenever they change.
+        indexed_states, spatial_index = self._vehicle_spatial_index
+        if indexed_states is not self._vehicle_states:
+            spatial_index = VehicleSpatialIndex(self._vehicle_states)
+            self._vehicle_spatial_index = (self._vehicle_states, spatial_index)
+        return spatial_index
+
     def _clear_collisions(self, vehicle_ids):
         for vehicle_id in vehicle_ids:
             self._vehicle_collisions.pop(vehicle_id, None)
 
-    def _get_pybullet_collisions(self, vehicle_id: str) -> Set[str]:
-        vehicle = self._vehicle_index.vehicle_by_id(vehicle_id)
-        # We are only concerned with vehicle-vehicle collisions
-        return {
-            p.bullet_id
-            for p in vehicle.chassis.contact_points
-            if p.bullet_id != self._ground_bullet_id
-        }
-
     def _process_collisions(self):
         self._vehicle_collisions = dict()
 
+        vehicles_by_bullet_id = {
+            vehicle.chassis.bullet_id: vehicle
+            for vehicle in self._vehicle_index.vehicles
+        }
+        contacts = contacting_bullet_ids(
+            self._bullet_client,
+            [vehicle.chassis for vehicle in vehicles_by_bullet_id.values()],
+        )
+        if not contacts:
+            return
+
+        def vehicle_contacts(vehicle_id):
+            vehicle = self._vehicle_index.vehicle_by_id(vehicle_id)
+            return contacts.get(vehicle.chassis.bullet_id)
+
         for vehicle_id in self._vehicle_index.agent_vehicle_ids():
-            collidee_bullet_ids = self._get_pybullet_collisions(vehicle_id)
+            collidee_bullet_ids = vehicle_contacts(vehicle_id)
             if not collidee_bullet_ids:
                 continue
             vehicle_collisions = self._vehicle_collisions.setdefault(vehicle_id, [])
             for bullet_id in collidee_bullet_ids:
-                collidee = self._bullet_id_to_vehicle(bullet_id)
+                collidee = vehicles_by_bullet_id[bullet_id]
                 owner_id = self._vehicle_index.owner_id_from_vehicle_id(collidee.id)
                 collision = Collision(
                     collidee_id=collidee.id, collidee_owner_id=owner_id
@@ -1467,19 +1493,9 @@ class SMARTS(ProviderManager):
         ]
         for vehicle_id in self._vehicle_index.social_vehicle_ids():
             for provider in traffic_providers:
-                if provider.manages_actor(vehicle_id) and self._get_pybullet_collisions(
-                    vehicle_id
-                ):
+                if provider.manages_actor(vehicle_id) and vehicle_contacts(vehicle_id):
                     provider.vehicle_collided(vehicle_id)
 
-    def _bullet_id_to_vehicle(self, bullet_id):
-        for vehicle in self._vehicle_index.vehicles:
-            if bullet_id == vehicle.chassis.bullet_id:
-                return vehicle
-        assert (
-            False
-        ), f"Only collisions with agent or social vehicles is supported, hit {bullet_id}"
-
     def _check_ground_plane(self):
         rescale_plane = False
         map_min = np.array(self._map_bb.min_pt)[:2] if self._map_bb else np.array([])
@@ -26,6 +26,7 @@ from subprocess import check_output
 from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 import numpy as np
+from shapely.geometry import LineString
 from shapely.geometry import Point as shPoint
 from shapely.geometry import Polygon
 from shapely.ops import nearest_points, snap
@@ -36,7 +37,8 @@ from .coordinates import BoundingBox, Heading, Point, Pose, RefLinePoint
 from .lanepoints import LanePoint, LanePoints, LinkedLanePoint
 from .road_map import RoadMap, Waypoint
 from .route_cache import RouteWithCache
-from .utils.geometry import buffered_shape
+from .utils.cache import cache
+from .utils.geometry import PolylineSegments, ShapeIndex, buffered_shape
 from .utils.glb import make_map_glb, make_road_line_glb
 from .utils.math import inplace_unwrap, radians_to_vec, vec_2d
 
@@ -414,7 +416,7 @@ class SumoRoadNetwork(RoadMap):
         def exit_surfaces(self) -> List[RoadMap.Surface]:
             return self.outgoing_lanes
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_lanes_at_offset(self, offset: float) -> List[RoadMap.Lane]:
             result = []
             radius = 1.1 * self.width_at_offset(offset)[0]
@@ -505,7 +507,7 @@ class SumoRoadNetwork(RoadMap):
                 point,
             )
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -523,7 +525,7 @@ class SumoRoadNetwork(RoadMap):
             bline = buffered_shape(line, 0.0)
             return line if bline.is_empty else bline
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             # TAI:  could use (cached) self._sumo_lane.getBoundingBox(...) as a quick first-pass check...
             lane_point = self.to_lane_coord(point)
@@ -531,33 +533,25 @@ class SumoRoadNetwork(RoadMap):
                 abs(lane_point.t) <= self._width / 2 and 0 <= lane_point.s < self.length
             )
 
-        @lru_cache(maxsize=1024)
+        @cached_property
+        def _segments(self) -> PolylineSegments:
+            return PolylineSegments.from_points(self._sumo_lane.getShape(False))
+
+        @cache(maxsize=16)
         def offset_along_lane(self, world_point: Point) -> float:
-            shape = self._sumo_lane.getShape(False)
-            point = world_point[:2]
-            if point not in shape:
-                return sumolib.geomhelper.polygonOffsetWithMinimumDistanceToPoint(
-                    point, shape, perpendicular=False
-                )
-            # SUMO geomhelper.polygonOffset asserts when the point is part of the shape.
-            # We get around the assertion with a check if the point is part of the shape.
-            offset = 0
-            for i in range(len(shape) - 1):
-                if shape[i] == point:
-                    break
-                offset += sumolib.geomhelper.distance(shape[i], shape[i + 1])
-            return offset
+            s, _ = self.to_lane_coords([world_point[:2]])
+            return float(s[0])
 
         def width_at_offset(self, offset: float) -> Tuple[float, float]:
             return self._width, 1.0
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def project_along(
             self, start_offset: float, distance: float
         ) -> Set[Tuple[RoadMap.Lane, float]]:
             return super().project_along(start_offset, distance)
 
-        @lru_cache(maxsize=1024)
+        @cache(maxsize=16)
         def from_lane_coord(self, lane_point: RefLinePoint) -> Point:
             shape = self._sumo_lane.getShape(False)
             x, y = sumolib.geomhelper.positionAtShapeOffset(shape, lane_point.s)
@@ -573,15 +567,30 @@ class SumoRoadNetwork(RoadMap):
                 y += dx * dd
             return Point(x=x, y=y)
 
-        @lru_cache(maxsize=1024)
+        @cache(maxsize=16)
         def to_lane_coord(self, world_point: Point) -> RefLinePoint:
-            return super().to_lane_coord(world_point)
+            s, t = self.to_lane_coords([world_point[:2]])
+            return RefLinePoint(s=float(s[0]), t=float(t[0]))
+
+        def to_lane_coords(
+            self, world_points: np.ndarray
+        ) -> Tuple[np.ndarray, np.ndarray]:
+            """Converts many world points to lane coordinates at once.
+
+            Args:
+                world_points (np.ndarray): Points with shape `(n, 2)` or `(n, 3)`.
+
+            Returns:
+                Tuple[np.ndarray, np.ndarray]: The offsets along the lane and the
+                    signed lateral displacements from the lane center.
+            """
+            return self._segments.project(world_points)
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def center_at_point(self, point: Point) -> Point:
             return super().center_at_point(point)
 
-        @lru_cache(8)
+        @cache(maxsize=8)
         def _edges_at_point(self, point: Point) -> Tuple[Point, Point]:
             """Get the boundary points perpendicular to the center of the lane closest to the given
              world coordinate.
@@ -597,15 +606,15 @@ class SumoRoadNetwork(RoadMap):
             right_edge = RefLinePoint(s=offset, t=-width / 2)
             return self.from_lane_coord(left_edge), self.from_lane_coord(right_edge)
 
-        @lru_cache(1024)
+        @cache(maxsize=16)
         def vector_at_offset(self, start_offset: float) -> np.ndarray:
             return super().vector_at_offset(start_offset)
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def center_pose_at_point(self, point: Point) -> Pose:
             return super().center_pose_at_point(point)
 
-        @lru_cache(maxsize=1024)
+        @cache(maxsize=16)
         def curvature_radius_at_offset(
             self, offset: float, lookahead: int = 5
         ) -> float:
@@ -681,7 +690,7 @@ class SumoRoadNetwork(RoadMap):
             # TAI:  also include lanes here?
             return self.outgoing_roads
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_roads_at_point(self, point: Point) -> List[RoadMap.Road]:
             result = []
             for lane in self.lanes:
@@ -718,7 +727,7 @@ class SumoRoadNetwork(RoadMap):
         def lane_at_index(self, index: int) -> RoadMap.Lane:
             return self.lanes[index]
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             # TAI:  could use (cached) self._sumo_edge.getBoundingBox(...) as a quick first-pass check...
             for lane in self.lanes:
@@ -726,7 +735,7 @@ class SumoRoadNetwork(RoadMap):
                     return True
             return False
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def _edges_at_point(self, point: Point) -> Tuple[Point, Point]:
             """Get the boundary points perpendicular to the center of the road closest to the given
              world coordinate.
@@ -741,7 +750,7 @@ class SumoRoadNetwork(RoadMap):
             left_edge, _ = lanes[-1]._edges_at_point(point)
             return left_edge, right_edge
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -769,13 +778,13 @@ class SumoRoadNetwork(RoadMap):
         self._surfaces[road_id] = road
         return road
 
-    @lru_cache(maxsize=4)
+    @cache(maxsize=4)
     def dynamic_features_near(
         self, point: Point, radius: float
     ) -> List[Tuple[RoadMap.Feature, float]]:
         return super().dynamic_features_near(point, radius)
 
-    @lru_cache(maxsize=1024)
+    @cache(maxsize=1024)
     def nearest_lanes(
         self, point: Point, radius: Optional[float] = None, include_junctions=True
     ) -> List[Tuple[RoadMap.Lane, float]]:
@@ -804,7 +813,32 @@ class SumoRoadNetwork(RoadMap):
         candidate_lanes.sort(key=lambda lane_dist_tup: lane_dist_tup[1])
         return [(self.lane_by_id(lane.getID()), dist) for lane, dist in candidate_lanes]
 
-    @lru_cache(maxsize=16)
+    @cache(maxsize=2)
+    def _lane_shape_index(self, include_junctions: bool) -> ShapeIndex:
+        # Mirrors the lane shapes that getNeighboringLanes() measures distances to
+        # in nearest_lanes() (see the note there about includeJunctions).
+        sumo_lanes = [
+            lane
+            for edge in self._graph.getEdges(withInternal=True)
+            if include_junctions or not edge.isSpecial()
+            for lane in edge.getLanes()
+        ]
+        return ShapeIndex(
+            [self.lane_by_id(lane.getID()) for lane in sumo_lanes],
+            [LineString(lane.getShape(not include_junctions)) for lane in sumo_lanes],
+        )
+
+    def nearest_lanes_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions=True,
+    ) -> List[List[Tuple[RoadMap.Lane, float]]]:
+        if radius is None:
+            radius = self._default_lane_width
+        return self._lane_shape_index(include_junctions).near_points(points, radius)
+
+    @cache(maxsize=16)
     def road_with_point(self, point: Point) -> Optional[RoadMap.Road]:
         radius = max(5, 2 * self._default_lane_width)
         for nl, dist in self.nearest_lanes(point, radius):
@@ -951,7 +985,9 @@ class SumoRoadNetwork(RoadMap):
     @cached_property
     def _lanepoints(self):
         assert self._map_spec.lanepoint_spacing > 0
-        return LanePoints.from_sumo(self, spacing=self._map_spec.lanepoint_spacing)
+        return LanePoints.from_cache(
+            self, self._map_spec.lanepoint_spacing, LanePoints.from_sumo
+        )
 
     def waypoint_paths(
         self,
@@ -23,11 +23,13 @@ import math
 from functools import partial
 from typing import Any, Generator, Sequence, Tuple
 
+import numpy as np
 import pytest
 from helpers.scenario import temp_scenario
 
 import smarts.sstudio.types as t
 from smarts.core.agent_manager import AgentManager
+from smarts.core.bubble_manager import Bubble, _BubbleGrid
 from smarts.core.controllers import ActionSpaceType
 from smarts.core.coordinates import Heading, Pose
 from smarts.core.local_traffic_provider import LocalTrafficProvider
@@ -378,3 +380,86 @@ def test_vehicle_spawned_outside_bubble_is_captured(
             break
 
     assert got_hijacked
+
+
+def test_vehicle_index_changes_since(smarts: SMARTS, mock_provider: MockProvider):
+    index: VehicleIndex = smarts.vehicle_index
+
+    def step_with(*vehicle_ids):
+        mock_provider.override_next_provider_state(
+            vehicles=[
+                (v_id, Pose.from_center((10 * i, 0, 0), HEADING_CONSTANT), 10)
+                for i, v_id in enumerate(vehicle_ids)
+            ]
+        )
+        smarts.step({})
+
+    start = index.change_log_position
+    step_with("vehicle-1", "vehicle-2")
+    changes = index.changes_since(start)
+    assert changes.added == {"vehicle-1", "vehicle-2"}
+    assert not changes.removed and not changes.control_changed
+
+    position = index.change_log_position
+    step_with("vehicle-2", "vehicle-3")
+    changes = index.changes_since(position)
+    assert changes.added == {"vehicle-3"}
+    assert changes.removed == {"vehicle-1"}
+
+    # Vehicles added and removed within the window cancel out
+    step_with("vehicle-2")
+    changes = index.changes_since(start)
+    assert changes.added == {"vehicle-2"}
+    assert not changes.removed
+
+    assert index.changes_since(index.change_log_position + 1) is None
+
+
+def test_bubble_membership_batch():
+    bubbles = [
+        Bubble(
+            t.Bubble(
+                zone=t.PositionalZone(pos=(x, y), size=(10, 10)),
+                margin=2,
+                actor=t.SocialAgentActor(
+                    name="zoo-car", agent_locator="zoo.policies:keep-lane-agent-v0"
+                ),
+            ),
+            road_map=None,
+        )
+        for x, y in [(0, 0), (12, 0), (100, 40)]
+    ]
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-20, 120, size=(500, 2))
+    radii = rng.uniform(0.5, 3, size=500)
+
+    vehicle_indices, bubble_indices = _BubbleGrid(
+        bubbles, padding=float(radii.max())
+    ).overlapping(positions, radii)
+    expected = {
+        (i, j)
+        for i, (position, radius) in enumerate(zip(positions, radii))
+        for j, bubble in enumerate(bubbles)
+        if np.linalg.norm(position - bubble.centroid) <= radius + bubble.reach
+    }
+    assert set(zip(vehicle_indices.tolist(), bubble_indices.tolist())) == expected
+
+    for bubble in bubbles:
+        in_bubble, in_airlock = bubble.in_bubble_or_airlock_xy(
+            positions[:, 0], positions[:, 1]
+        )
+        assert [
+            bubble.in_bubble_or_airlock(tuple(position)) for position in positions
+        ] == list(zip(in_bubble.tolist(), in_airlock.tolist()))
+
+
+def test_bubble_manager_keeps_frame_vehicles(
+    smarts: SMARTS, mock_provider: MockProvider
+):
+    for x in (92, 94, 100):
+        mock_provider.override_next_provider_state(
+            vehicles=[("vehicle", Pose.from_center((x, 0, 0), HEADING_CONSTANT), 10)]
+        )
+        smarts.step({})
+        # The bubble manager queries the vehicle index before the frame is built.
+        assert smarts.cached_frame.vehicle_ids
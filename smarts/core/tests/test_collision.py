@@ -29,7 +29,7 @@ from helpers.scenario import temp_scenario
 
 from smarts.core import models
 from smarts.core.agent_interface import ActionSpaceType, AgentInterface
-from smarts.core.chassis import AckermannChassis, BoxChassis
+from smarts.core.chassis import AckermannChassis, BoxChassis, contacting_bullet_ids
 from smarts.core.coordinates import Heading, Pose
 from smarts.core.scenario import Scenario
 from smarts.core.smarts import SMARTS
@@ -106,6 +106,31 @@ def test_collision(bullet_client: bc.BulletClient):
     assert GROUND_ID not in collided_bullet_ids
 
 
+def test_contacting_bullet_ids(bullet_client: bc.BulletClient):
+    """Check that the broadphase finds the same contacts as the per chassis query."""
+    chassis = AckermannChassis(
+        Pose.from_center([0, 0, 0], Heading(-math.pi * 0.5)), bullet_client
+    )
+
+    b_chassis, far_chassis = (
+        BoxChassis(
+            Pose.from_center(position, Heading(0)),
+            speed=0,
+            dimensions=VEHICLE_CONFIGS["passenger"].dimensions,
+            bullet_client=chassis._client,
+        )
+        for position in ([0, 0, 0], [0, 20, 0])
+    )
+
+    step_with_vehicle_commands(chassis, steps=2)
+    contacts = contacting_bullet_ids(bullet_client, [chassis, b_chassis, far_chassis])
+    assert contacts == {
+        chassis.bullet_id: {b_chassis.bullet_id},
+        b_chassis.bullet_id: {chassis.bullet_id},
+    }
+    assert contacts[chassis.bullet_id] == {c.bullet_id for c in chassis.contact_points}
+
+
 def test_non_collision(bullet_client: bc.BulletClient):
     """Spawn without overlap to check for the most basic collision"""
 
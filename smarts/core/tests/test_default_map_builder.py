@@ -0,0 +1,100 @@
+# MIT License
+#
+# Copyright (C) 2023. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import gc
+import weakref
+
+import pytest
+
+import smarts.core.default_map_builder as default_map_builder
+from smarts.core.default_map_builder import RoadMapCache, get_road_map
+from smarts.sstudio.types import MapSpec
+
+
+class _FakeMap:
+    def __init__(self, source):
+        self.source = source
+
+    def is_same_map(self, map_spec):
+        return map_spec == self.source
+
+
+def test_road_map_cache_evicts_least_recently_used():
+    cache = RoadMapCache(max_maps=2, max_bytes=1000)
+    maps = {source: _FakeMap(source) for source in ("a", "b", "c")}
+
+    cache.put("a", maps["a"], "hash_a", 100)
+    cache.put("b", maps["b"], "hash_b", 100)
+    assert cache.get(_FakeMap, "a") == (maps["a"], "hash_a")
+
+    cache.put("c", maps["c"], "hash_c", 100)
+    assert cache.get(_FakeMap, "b") is None
+    assert cache.get(_FakeMap, "a") is not None
+    assert cache.get(_FakeMap, "c") is not None
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.evictions) == (3, 1, 1)
+    assert stats.size == 2
+    assert stats.nbytes == 200
+
+
+def test_road_map_cache_is_bounded_by_bytes():
+    cache = RoadMapCache(max_maps=10, max_bytes=250)
+    for source in ("a", "b", "c"):
+        cache.put(source, _FakeMap(source), source, 100)
+    assert cache.stats.size == 2
+    assert cache.get(_FakeMap, "a") is None
+
+    # The most recent map is kept even if it alone exceeds the bound.
+    cache.put("d", _FakeMap("d"), "d", 1000)
+    assert cache.stats.size == 1
+    assert cache.get(_FakeMap, "d") is not None
+
+    cache.clear()
+    assert cache.stats.size == 0
+    assert cache.stats.nbytes == 0
+
+
+@pytest.fixture
+def single_map_cache(monkeypatch):
+    cache = RoadMapCache(max_maps=1, max_bytes=2 * 1024**3)
+    monkeypatch.setattr(default_map_builder, "_road_map_cache", cache)
+    return cache
+
+
+def test_evicted_road_map_is_released(single_map_cache):
+    road_map, _ = get_road_map(
+        MapSpec(source="scenarios/sumo/intersections/4lane", lanepoint_spacing=1.0)
+    )
+    # Use the per-map caches so that they would hold on to the map if they outlived it.
+    point = road_map.bounding_box.center
+    lane = road_map.nearest_lane(point)
+    lane.offset_along_lane(point)
+    lane.center_at_point(point)
+    road_map.road_with_point(point)
+    assert single_map_cache.stats.nbytes > 0
+    map_ref = weakref.ref(road_map)
+    del road_map, lane, point
+
+    get_road_map(MapSpec(source="scenarios/sumo/figure_eight", lanepoint_spacing=1.0))
+    assert single_map_cache.stats.evictions == 1
+    gc.collect()
+    assert map_ref() is None
@@ -21,6 +21,7 @@
 # THE SOFTWARE.
 import math
 import os
+import shutil
 import sys
 from pathlib import Path
 
@@ -28,7 +29,8 @@ import numpy as np
 import pytest
 from matplotlib import pyplot as plt
 
-from smarts.core.coordinates import Point
+from smarts.core.coordinates import Point, Pose, RefLinePoint
+from smarts.core.lanepoints import LanePoint, LanePoints, LinkedLanePoint
 from smarts.core.opendrive_road_network import OpenDriveRoadNetwork
 from smarts.core.road_map import RoadMap
 from smarts.core.scenario import Scenario
@@ -151,6 +153,27 @@ def test_sumo_map(sumo_scenario):
             ), cands
 
 
+def test_lanepoints_save_and_load(sumo_scenario, tmp_path):
+    road_map = sumo_scenario.road_map
+    lanepoints = road_map._lanepoints
+    assert lanepoints.save(str(tmp_path))
+
+    loaded = LanePoints.load(str(tmp_path), road_map)
+    assert len(loaded._linked_lanepoints) == len(lanepoints._linked_lanepoints)
+    for original, restored in zip(
+        lanepoints._linked_lanepoints, loaded._linked_lanepoints
+    ):
+        assert restored.lp == original.lp
+        assert restored.is_inferred == original.is_inferred
+        assert [n.lp for n in restored.nexts] == [n.lp for n in original.nexts]
+
+    point = Point(125.20, 139.0, 0)
+    lane_id = "edge-north-NS_0"
+    assert loaded.closest_lanepoint_on_lane_to_point(
+        point, lane_id
+    ) == lanepoints.closest_lanepoint_on_lane_to_point(point, lane_id)
+
+
 def test_opendrive_map_4lane(opendrive_scenario_4lane):
     road_map = opendrive_scenario_4lane.road_map
     assert isinstance(road_map, OpenDriveRoadNetwork)
@@ -461,6 +484,159 @@ def _check_composite(road_map, comp_lane_id: str, sublane_ids):
     ]
 
 
+def test_lane_coords_batch(opendrive_scenario_4lane):
+    road_map = opendrive_scenario_4lane.road_map
+    lane = road_map.road_by_id("57_0_R").lane_at_index(0)
+
+    s = np.array([5, 10.5, 60])
+    t = np.array([0, 1, -0.5])
+    world_points = lane.from_lane_coords(s, t)
+    assert world_points.shape == (3, 2)
+    for point, s_i, t_i in zip(world_points, s, t):
+        single = lane.from_lane_coord(RefLinePoint(s=s_i, t=t_i))
+        assert np.allclose(point, (single.x, single.y))
+
+    lane_s, lane_t = lane.to_lane_coords(world_points)
+    assert np.allclose(lane_s[0], s[0])
+    assert np.allclose(np.abs(lane_t), np.abs(t), atol=1e-3)
+    assert np.all(np.sign(lane_t[1:]) == np.sign(t[1:]))
+    single = lane.to_lane_coord(Point(*world_points[1]))
+    assert np.isclose(single.s, lane_s[1]) and np.isclose(single.t, lane_t[1])
+
+
+@pytest.fixture
+def map_cache_dir(tmp_path, monkeypatch):
+    from smarts.core import config
+
+    cache_dir = tmp_path / "map_cache"
+    monkeypatch.setenv("SMARTS_CORE_MAP_CACHE_DIR", str(cache_dir))
+    config.cache_clear()
+    yield cache_dir
+    config.cache_clear()
+
+
+def test_lanepoints_from_cache(map_cache_dir, tmp_path):
+    map_path = tmp_path / "map.net.xml"
+    shutil.copyfile("scenarios/sumo/intersections/4lane/map.net.xml", map_path)
+    builds = []
+
+    def build(road_map, spacing):
+        builds.append(spacing)
+        return LanePoints.from_sumo(road_map, spacing)
+
+    def from_cache(spacing):
+        road_map = SumoRoadNetwork.from_spec(
+            MapSpec(source=str(map_path), lanepoint_spacing=spacing)
+        )
+        return LanePoints.from_cache(road_map, spacing, build)
+
+    built = from_cache(1.0)
+    assert builds == [1.0]
+    assert len(list(map_cache_dir.iterdir())) == 1
+
+    loaded = from_cache(1.0)
+    assert builds == [1.0]
+    assert [l_lp.lp.pose for l_lp in loaded._linked_lanepoints] == [
+        l_lp.lp.pose for l_lp in built._linked_lanepoints
+    ]
+
+    from_cache(2.0)
+    assert builds == [1.0, 2.0]
+
+    # A changed map source is compiled again under a new hash.
+    with open(map_path, "a") as f:
+        f.write("<!-- changed -->\n")
+    from_cache(1.0)
+    assert builds == [1.0, 2.0, 1.0]
+    assert len(list(map_cache_dir.iterdir())) == 2
+
+
+def test_lanepoint_path_cache(opendrive_scenario_4lane):
+    lanepoints = opendrive_scenario_4lane.road_map._lanepoints
+    for linked_lp in lanepoints._linked_lanepoints[::25]:
+        deep = lanepoints.path_indices_starting_at_lanepoint(linked_lp, 40, ())
+        assert deep.shape[1] == 41
+        for lookahead in (0, 5, 20):
+            truncated = lanepoints.path_indices_starting_at_lanepoint(
+                linked_lp, lookahead, ()
+            )
+            expected = lanepoints._compute_path_indices(linked_lp, lookahead, ())
+            assert np.array_equal(truncated, expected)
+
+        paths = lanepoints.paths_starting_at_lanepoint(linked_lp, 5, ())
+        assert paths[0][0] is linked_lp
+        assert all(len(path) <= 6 for path in paths)
+
+
+def test_lanepoint_paths_from_other_lanepoints(opendrive_scenario_4lane):
+    lanepoints = opendrive_scenario_4lane.road_map._lanepoints
+    node_count = len(lanepoints._path_nodes)
+    linked_lp = lanepoints._linked_lanepoints[10]
+    expected = lanepoints.path_indices_starting_at_lanepoint(linked_lp, 5, ())
+
+    # A copy resolves to the stored lane point.
+    copy = LinkedLanePoint(
+        lp=linked_lp.lp, is_inferred=linked_lp.is_inferred, nexts=list(linked_lp.nexts)
+    )
+    assert np.array_equal(
+        lanepoints.path_indices_starting_at_lanepoint(copy, 5, ()), expected
+    )
+
+    # A lane point that is not stored is followed without being indexed.
+    moved = LinkedLanePoint(
+        lp=LanePoint(
+            lane=linked_lp.lp.lane,
+            pose=Pose(
+                position=linked_lp.lp.pose.position + 0.1,
+                orientation=linked_lp.lp.pose.orientation,
+            ),
+            lane_width=linked_lp.lp.lane_width,
+        ),
+        is_inferred=True,
+        nexts=list(linked_lp.nexts),
+    )
+    paths = lanepoints.paths_starting_at_lanepoint(moved, 5, ())
+    assert paths[0][0] is moved
+    assert [path[1:] for path in paths] == [
+        [lanepoints.linked_lanepoint_at(i) for i in row[1:] if i >= 0]
+        for row in expected
+    ]
+    with pytest.raises(ValueError):
+        lanepoints.path_indices_starting_at_lanepoint(moved, 5, ())
+    assert len(lanepoints._path_nodes) == node_count
+
+
+@pytest.mark.parametrize(
+    "scenario_fixture", ["sumo_scenario", "opendrive_scenario_4lane"]
+)
+def test_nearest_lanes_batch(scenario_fixture, request):
+    road_map = request.getfixturevalue(scenario_fixture).road_map
+    bb = road_map.bounding_box
+    rng = np.random.default_rng(42)
+    points = np.column_stack(
+        (
+            rng.uniform(bb.min_pt.x, bb.max_pt.x, 50),
+            rng.uniform(bb.min_pt.y, bb.max_pt.y, 50),
+        )
+    )
+
+    batch = road_map.nearest_lanes_batch(points, radius=5)
+    assert len(batch) == len(points)
+    for point, nearest_lanes in zip(points, batch):
+        single = road_map.nearest_lanes(Point(*point), radius=5)
+        assert [lane.lane_id for lane, _ in nearest_lanes] == [
+            lane.lane_id for lane, _ in single
+        ]
+        assert np.allclose([d for _, d in nearest_lanes], [d for _, d in single])
+
+    radii = rng.uniform(1, 10, len(points))
+    for point, radius, lane in zip(
+        points, radii, road_map.nearest_lane_batch(points, radius=radii)
+    ):
+        assert lane == road_map.nearest_lane(Point(*point), radius=radius)
+    assert road_map.nearest_lanes_batch(np.empty((0, 2))) == []
+
+
 def test_opendrive_map_merge(opendrive_scenario_merge):
     road_map = opendrive_scenario_merge.road_map
     assert isinstance(road_map, OpenDriveRoadNetwork)
@@ -28,7 +28,10 @@ from smarts.core.controllers import ActionSpaceType
 from smarts.core.plan import Mission
 from smarts.core.scenario import Scenario
 from smarts.core.sensors.local_sensor_resolver import LocalSensorResolver
-from smarts.core.sensors.parallel_sensor_resolver import ParallelSensorResolver
+from smarts.core.sensors.parallel_sensor_resolver import (
+    AgentObservationCosts,
+    ParallelSensorResolver,
+)
 from smarts.core.simulation_frame import SimulationFrame
 from smarts.core.simulation_local_constants import SimulationLocalConstants
 from smarts.core.smarts import SMARTS
@@ -90,14 +93,20 @@ def sim(scenario, request):
     smarts.destroy()
 
 
+@pytest.mark.parametrize("delta_frames", [False, True])
+@pytest.mark.parametrize("transport", ["pipe", "shared_memory"])
 def test_sensor_parallelization(
     sim: SMARTS,
+    transport: str,
+    delta_frames: bool,
 ):
     del sim.cached_frame
     simulation_frame: SimulationFrame = sim.cached_frame
     simulation_local_constants: SimulationLocalConstants = sim.local_constants
 
-    parallel_resolver = ParallelSensorResolver(process_count_override=1)
+    parallel_resolver = ParallelSensorResolver(
+        process_count_override=1, transport=transport, delta_frames=delta_frames
+    )
     serial_resolver = LocalSensorResolver()
 
     parallel_resolver.get_workers(1, sim_local_constants=sim.local_constants)
@@ -135,3 +144,21 @@ def test_sensor_parallelization(
         assert p_sensors.keys() == l_updated_sensors[agent_id].keys()
         for k in p_sensors:
             assert p_sensors[k] == l_updated_sensors[agent_id][k]
+
+
+def test_agent_observation_cost_partitioning():
+    costs = AgentObservationCosts(smoothing=1)
+    costs.record({"heavy": 8.0, "medium": 4.0, "light_1": 2.0, "light_2": 2.0})
+
+    groups = costs.partition({"heavy", "medium", "light_1", "light_2"}, 2)
+    assert sorted(map(sorted, groups)) == [
+        ["heavy"],
+        ["light_1", "light_2", "medium"],
+    ]
+    assert costs.estimate("unmeasured") == 4.0
+
+    batches = costs.split(["medium", "light_1", "light_2"], 2)
+    assert batches == [["medium"], ["light_1", "light_2"]]
+
+    costs.prune({"heavy"})
+    assert costs.estimate("medium") == 8.0
@@ -23,6 +23,7 @@ from typing import Any
 
 import pytest
 
+import smarts.core.serialization.default as serializer
 from smarts.core.agent_interface import AgentInterface, AgentType
 from smarts.core.controllers import ActionSpaceType
 from smarts.core.plan import Mission
@@ -31,6 +32,7 @@ from smarts.core.sensors import Observation
 from smarts.core.sensors.parallel_sensor_resolver import (
     SensorsWorker,
     SensorsWorkerRequestId,
+    SharedMemoryArena,
     WorkerKwargs,
 )
 from smarts.core.simulation_frame import SimulationFrame
@@ -119,8 +121,8 @@ def test_sensor_worker(
         sim_local_constants=sim.local_constants,
         agent_ids=agent_ids,
     )
-    observations, dones, updated_sensors = SensorsWorker.local(state=state)
-    other_observations, other_dones, updated_sensors = worker.result(timeout=5)
+    observations, dones, updated_sensors, local_costs = SensorsWorker.local(state=state)
+    other_observations, other_dones, updated_sensors, costs = worker.result(timeout=5)
 
     assert isinstance(observations, dict)
     assert all(
@@ -134,3 +136,25 @@ def test_sensor_worker(
     assert all([isinstance(obs, bool) for obs in other_dones.values()])
     assert observations.keys() == other_dones.keys()
     assert diff_unpackable(other_observations, observations) == ""
+    assert costs.keys() == other_observations.keys()
+    assert local_costs.keys() == observations.keys()
+
+
+def test_shared_memory_arena():
+    arena = SharedMemoryArena(initial_size=16)
+    attachments = {}
+    try:
+        small = {"a": 1}
+        reference = arena.write(serializer.dumps(small))
+        assert reference.read(attachments) == small
+
+        large = list(range(1000))
+        next_reference = arena.write(serializer.dumps(large))
+        assert next_reference.generation == reference.generation + 1
+        assert arena.capacity > 16
+        assert next_reference.read(attachments) == large
+        assert set(attachments) == {next_reference.name}
+    finally:
+        for shm in attachments.values():
+            shm.close()
+        arena.close()
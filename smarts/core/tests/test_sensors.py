@@ -25,11 +25,16 @@ import numpy as np
 import pytest
 from helpers.scenario import temp_scenario
 
-from smarts.core.coordinates import Heading, Pose
+from smarts.core.chassis import BoxChassis
+from smarts.core.coordinates import Dimensions, Heading, Pose
+from smarts.core.lidar import Lidar
+from smarts.core.lidar_sensor_params import BasicLidar
 from smarts.core.plan import Plan
 from smarts.core.scenario import Scenario
 from smarts.core.sensors import DrivenPathSensor, TripMeterSensor, WaypointsSensor
-from smarts.core.utils.math import squared_dist
+from smarts.core.utils import pybullet
+from smarts.core.utils.math import rotate_quat, squared_dist
+from smarts.core.utils.pybullet import bullet_client as bc
 from smarts.sstudio import gen_scenario
 from smarts.sstudio import types as t
 
@@ -141,3 +146,109 @@ def test_waypoints_sensor(scenarios):
     assert len(waypoints) == 3
 
     sensor.teardown()
+
+
+def test_waypoints_sensor_incremental(scenarios):
+    scenario = next(scenarios)
+    vehicle_state = mock.Mock()
+    vehicle_state.pose = Pose(
+        position=np.array([33, -65, 0]),
+        orientation=np.array([0, 0, 0, 0]),
+        heading_=Heading(0),
+    )
+
+    mission = scenario.missions[AGENT_ID]
+    plan = Plan(scenario.road_map, mission)
+
+    sensor = WaypointsSensor(lookahead=10, incremental=True)
+    assert sensor.mutable
+    waypoints = sensor(vehicle_state, plan, scenario.road_map)
+    assert len(waypoints) == len(
+        WaypointsSensor(lookahead=10)(vehicle_state, plan, scenario.road_map)
+    )
+    assert all(len(path) == 11 for path in waypoints)
+
+    # moving along the same lane only advances the tracked paths
+    tracked_paths = sensor._paths
+    lane_path = next(path for path in waypoints if path[0].lane_id == sensor._lane_id)
+    vehicle_state.pose = Pose.from_center(
+        np.append(lane_path[3].pos, 0), lane_path[3].heading
+    )
+    advanced = sensor(vehicle_state, plan, scenario.road_map)
+    assert sensor._paths is tracked_paths
+    advanced_lane_path = next(
+        path for path in advanced if path[0].lane_id == sensor._lane_id
+    )
+    assert np.allclose(advanced_lane_path[0].pos, lane_path[3].pos)
+    assert all(len(path) == 11 for path in advanced)
+
+    # running out of tracked waypoints searches again
+    vehicle_state.pose = Pose.from_center(
+        np.append(advanced_lane_path[-1].pos, 0), advanced_lane_path[-1].heading
+    )
+    sensor(vehicle_state, plan, scenario.road_map)
+    assert sensor._paths is not tracked_paths
+
+    sensor.teardown()
+
+
+def test_lidar_point_clouds():
+    client = bc.BulletClient(pybullet.DIRECT)
+    try:
+        BoxChassis(
+            Pose.from_center([0, 5, 0], Heading(0)),
+            speed=0,
+            dimensions=Dimensions(length=3, width=2, height=2),
+            bullet_client=client,
+        )
+        lidars = [
+            Lidar(np.array([0, 0, 1]), BasicLidar),
+            Lidar(np.array([50, 50, 1]), BasicLidar),
+        ]
+
+        batched = Lidar.compute_point_clouds(lidars, client)
+        for lidar, (point_cloud, hits, rays) in zip(lidars, batched):
+            single_point_cloud, single_hits, single_rays = lidar.compute_point_cloud(
+                client
+            )
+            assert point_cloud.shape == (len(rays), 3)
+            assert hits.shape == (len(rays),)
+            assert rays.shape == (len(rays), 2, 3)
+            assert np.array_equal(point_cloud, single_point_cloud)
+            assert np.array_equal(hits, single_hits)
+            assert np.array_equal(rays, single_rays)
+            assert np.all(np.isinf(point_cloud[~hits]))
+            assert np.allclose(rays[:, 0], lidar.origin)
+
+        assert batched[0][1].any()
+        assert not batched[1][1].any()
+    finally:
+        client.disconnect()
+
+
+def test_lidar_base_rays():
+    lidar = Lidar(np.array([1, 2, 3]), BasicLidar)
+    n_rays = int(
+        (BasicLidar.end_angle - BasicLidar.start_angle) / BasicLidar.angle_resolution
+    )
+    expected = [
+        rotate_quat(
+            np.asarray(pybullet.getQuaternionFromEuler((roll, 0, yaw)), dtype=float),
+            np.asarray((0, BasicLidar.max_distance, 0), dtype=float),
+        )
+        for yaw in -1 * BasicLidar.laser_angles
+        for roll in np.arange(n_rays) * BasicLidar.angle_resolution
+    ]
+
+    rays = lidar._compute_rays()
+    assert rays.shape == (len(expected), 2, 3)
+    assert np.allclose(rays[:, 0], [1, 2, 3])
+    assert np.allclose(rays[:, 1] - [1, 2, 3], expected)
+    assert Lidar(np.array([0, 0, 0]), BasicLidar)._base_rays is lidar._base_rays
+
+    lidar.heading = np.pi / 2
+    turned = lidar._compute_rays()[:, 1] - [1, 2, 3]
+    expected = np.asarray(expected)
+    assert np.allclose(turned[:, 0], -expected[:, 1])
+    assert np.allclose(turned[:, 1], expected[:, 0])
+    assert np.allclose(turned[:, 2], expected[:, 2])
@@ -26,6 +26,7 @@ import pytest
 import smarts.core.serialization.default as serializer
 from smarts.core.agent_interface import AgentInterface, AgentType
 from smarts.core.scenario import Scenario
+from smarts.core.simulation_frame import SimulationFrameDelta
 from smarts.core.smarts import SMARTS, SimulationFrame
 from smarts.core.sumo_traffic_simulation import SumoTrafficSimulation
 
@@ -118,3 +119,27 @@ def test_state_serialization(sim: SMARTS, scenario: Scenario):
 
     # dataclass allows comparison
     assert frame == deserialized
+
+
+def test_state_delta(sim: SMARTS, scenario: Scenario):
+    sim.setup(scenario)
+    sim.reset(scenario, start_time=10)
+    previous_frame: SimulationFrame = sim.cached_frame
+    sim.step({AGENT_ID: [0, 0, 0]})
+    frame: SimulationFrame = sim.cached_frame
+
+    delta = SimulationFrameDelta.between(previous_frame, frame)
+    # The delta is applied to a copy as it would be in a worker process
+    serialized_previous = serializer.dumps(previous_frame)
+    serialized_delta = serializer.dumps(delta)
+    patched: SimulationFrame = serializer.loads(serialized_delta).apply(
+        serializer.loads(serialized_previous)
+    )
+
+    assert "map_spec" not in delta.replaced
+    assert patched == frame
+    assert patched.vehicle_states.keys() == frame.vehicle_states.keys()
+    assert [a_s.actor_id for a_s in patched.actor_states] == [
+        a_s.actor_id for a_s in frame.actor_states
+    ]
+    assert patched.vehicle_sensors.keys() == frame.vehicle_sensors.keys()
@@ -0,0 +1,259 @@
+# MIT License
+#
+# Copyright (C) 2023. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import sqlite3
+from contextlib import closing
+from types import SimpleNamespace
+
+import pytest
+
+from smarts.core.columnar_traffic_history import ColumnarTrafficHistoryBackend
+from smarts.core.coordinates import Point
+from smarts.core.road_map import RoadMap
+from smarts.core.signals import SignalLightState, SignalState
+from smarts.core.traffic_history import (
+    TRAFFIC_HISTORY_SCHEMA_VERSION,
+    TrafficHistory,
+    TrafficHistoryReplay,
+)
+from smarts.core.traffic_history_provider import TrafficHistoryProvider
+
+
+@pytest.fixture
+def traffic_history(tmp_path):
+    db_path = tmp_path / "history.shf"
+    with sqlite3.connect(db_path) as dbconxn:
+        # A version 1 database
+        dbconxn.execute(
+            """CREATE TABLE Spec (
+                   key TEXT PRIMARY KEY,
+                   value TEXT
+               ) WITHOUT ROWID"""
+        )
+        dbconxn.execute(
+            """CREATE TABLE Vehicle (
+                   id INTEGER PRIMARY KEY,
+                   type INTEGER NOT NULL,
+                   length REAL,
+                   width REAL,
+                   height REAL,
+                   is_ego_vehicle INTEGER DEFAULT 0
+               ) WITHOUT ROWID"""
+        )
+        dbconxn.execute(
+            """CREATE TABLE Trajectory (
+                   vehicle_id INTEGER NOT NULL,
+                   sim_time REAL NOT NULL,
+                   position_x REAL NOT NULL,
+                   position_y REAL NOT NULL,
+                   heading_rad REAL NOT NULL,
+                   speed REAL DEFAULT 0.0,
+                   lane_id INTEGER DEFAULT 0,
+                   PRIMARY KEY (vehicle_id, sim_time),
+                   FOREIGN KEY (vehicle_id) REFERENCES Vehicle(id)
+               ) WITHOUT ROWID"""
+        )
+        dbconxn.execute(
+            """CREATE TABLE TrafficLightState (
+                   sim_time REAL NOT NULL,
+                   state INTEGER NOT NULL,
+                   stop_point_x REAL NOT NULL,
+                   stop_point_y REAL NOT NULL,
+                   lane INTEGER NOT NULL
+               )"""
+        )
+        dbconxn.executemany(
+            "INSERT INTO Vehicle VALUES (?, ?, ?, ?, ?, ?)",
+            [(v_id, 2, 4.0, 2.0, None, 0) for v_id in range(1, 6)],
+        )
+        # Vehicles seen every 0.1s from 0.1 * vehicle_id for 2s
+        dbconxn.executemany(
+            "INSERT INTO Trajectory VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (v_id, round(0.1 * (v_id + i), 1), float(i), float(v_id), 0.0, 5.0, 0)
+                for v_id in range(1, 6)
+                for i in range(20)
+            ],
+        )
+        dbconxn.execute("CREATE INDEX Trajectory_Time ON Trajectory (sim_time)")
+    dbconxn.close()
+    entry = next(e for e in os.scandir(tmp_path) if e.name == "history.shf")
+    history = TrafficHistory(entry)
+    history.connect_for_multiple_queries()
+    yield history
+    history.disconnect()
+
+
+def test_in_memory_replay(traffic_history: TrafficHistory):
+    replay = TrafficHistoryReplay(traffic_history, window=0.5)
+    for step in range(30):
+        start_time, end_time = round(0.1 * step, 1), round(0.1 * (step + 2), 1)
+        expected = {}
+        for row in traffic_history.vehicles_active_between(start_time, end_time):
+            expected.setdefault(row.vehicle_id, row)
+
+        rows = replay.vehicles_active_between(start_time, end_time)
+        assert {row.vehicle_id: row for row in rows} == expected
+        assert len(rows) == len(expected)
+
+
+def test_schema_upgrade(traffic_history: TrafficHistory):
+    assert traffic_history.schema_version == TRAFFIC_HISTORY_SCHEMA_VERSION
+    with closing(sqlite3.connect(traffic_history._db)) as dbconxn:
+        indices = {row[0] for row in dbconxn.execute("SELECT name FROM sqlite_master")}
+    assert "VehicleSummary" in indices
+    assert "Trajectory_Time_Vehicle" in indices
+    assert "Trajectory_Time" not in indices
+
+    assert traffic_history.vehicle_initial_time(3) == 0.3
+    assert traffic_history.vehicle_final_exit_time(3) == 2.2
+    assert traffic_history.vehicle_final_position(3) == (19.0, 3.0)
+    assert sorted(traffic_history.first_seen_times()) == [
+        (v_id, round(0.1 * v_id, 1)) for v_id in range(1, 6)
+    ]
+    assert traffic_history.last_seen_vehicle_time() == 2.4
+
+    windows = sorted(traffic_history.vehicle_windows_in_range(0.5, 2.0, 1.0))
+    assert [w.vehicle_id for w in windows] == [1, 2, 3, 4, 5]
+    assert windows[0].start_time == 0.5 and windows[0].end_time == 1.9
+    assert windows[0].start_position_x == 4.0 and windows[0].end_position_x == 18.0
+    assert windows[0].average_speed == 5.0
+
+
+def test_columnar_store(traffic_history: TrafficHistory, tmp_path):
+    ColumnarTrafficHistoryBackend.write(
+        traffic_history.backend, tmp_path / "columnar.shf", partition_seconds=0.5
+    )
+    entry = next(e for e in os.scandir(tmp_path) if e.name == "columnar.shf")
+    columnar = TrafficHistory(entry)
+    assert isinstance(columnar.backend, ColumnarTrafficHistoryBackend)
+
+    assert sorted(columnar.all_vehicle_ids()) == sorted(
+        traffic_history.all_vehicle_ids()
+    )
+    assert sorted(columnar.first_seen_times()) == sorted(
+        traffic_history.first_seen_times()
+    )
+    assert columnar.last_seen_vehicle_time() == traffic_history.last_seen_vehicle_time()
+    for v_id in ("1", "3"):
+        assert columnar.vehicle_dims(v_id) == traffic_history.vehicle_dims(v_id)
+        assert columnar.vehicle_final_position(
+            v_id
+        ) == traffic_history.vehicle_final_position(v_id)
+        assert columnar.vehicle_pose_at_time(
+            v_id, 0.9
+        ) == traffic_history.vehicle_pose_at_time(v_id, 0.9)
+        assert list(columnar.vehicle_trajectory(v_id)) == list(
+            traffic_history.vehicle_trajectory(v_id)
+        )
+
+    for step in range(30):
+        start_time, end_time = round(0.1 * step, 1), round(0.1 * (step + 2), 1)
+        assert sorted(columnar.vehicles_active_between(start_time, end_time)) == sorted(
+            traffic_history.vehicles_active_between(start_time, end_time)
+        )
+
+    windows = sorted(columnar.vehicle_windows_in_range(0.5, 2.0, 1.0))
+    assert windows == sorted(traffic_history.vehicle_windows_in_range(0.5, 2.0, 1.0))
+
+
+class _SignalRoadMap:
+    """Has a signal controlling lane "<lane>_<n>" near each stop point (n, lane)."""
+
+    def dynamic_features_near(self, point, radius):
+        return [
+            (
+                SimpleNamespace(
+                    type=RoadMap.FeatureType.FIXED_LOC_SIGNAL,
+                    type_specific_info=SimpleNamespace(
+                        lane_id=f"{int(point.y)}_{int(point.x)}"
+                    ),
+                ),
+                0.0,
+            ),
+            (SimpleNamespace(type=RoadMap.FeatureType.STOP_SIGN), 0.0),
+        ]
+
+
+def _signals_by_query(history, road_map, lane_sig_state, prev_time, history_time):
+    # The signals that TrafficHistoryProvider emitted from a query every step.
+    signals = []
+    for tls in history.traffic_light_states_between(prev_time, history_time):
+        stop_pt = Point(tls.stop_point_x, tls.stop_point_y)
+        prev_state = lane_sig_state.setdefault(tls.lane_id, dict()).setdefault(
+            stop_pt, tls.state
+        )
+        last_changed = tls.sim_time if prev_state != tls.state else None
+        lane_sig_state[tls.lane_id][stop_pt] = tls.state
+        controlled_lanes = []
+        for feat, _ in road_map.dynamic_features_near(stop_pt, 4):
+            if feat.type == RoadMap.FeatureType.FIXED_LOC_SIGNAL:
+                feat_lane = feat.type_specific_info
+                if str(tls.lane_id) in feat_lane.lane_id:
+                    controlled_lanes.append(feat_lane.lane_id)
+        signals.append(
+            (
+                f"signal_{tls.lane_id}_{len(lane_sig_state[tls.lane_id])}",
+                SignalLightState(tls.state),
+                last_changed,
+                controlled_lanes,
+            )
+        )
+    return signals
+
+
+def test_provider_signal_timeline(traffic_history: TrafficHistory):
+    states = [SignalLightState.STOP, SignalLightState.GO, SignalLightState.CAUTION]
+    with closing(sqlite3.connect(traffic_history._db)) as dbconxn, dbconxn:
+        dbconxn.executemany(
+            "INSERT INTO TrafficLightState VALUES (?, ?, ?, ?, ?)",
+            [
+                (round(0.1 * t, 1), int(states[(t // 4 + n) % 3]), n, lane, lane)
+                for lane in (7, 8)
+                for n in (1, 2)
+                for t in range(1, 30, 2 if lane == 7 else 3)
+            ],
+        )
+
+    road_map = _SignalRoadMap()
+    provider = TrafficHistoryProvider(in_memory_replay=False)
+    provider.setup(SimpleNamespace(traffic_history=traffic_history, road_map=road_map))
+    lane_sig_state = {}
+    emitted = 0
+    for step in range(1, 30):
+        elapsed_sim_time = round(0.1 * step, 1)
+        provider_state = provider.step({}, 0.1, elapsed_sim_time)
+        signals = [
+            (s.actor_id, s.state, s.last_changed, s.controlled_lanes)
+            for s in provider_state.actors
+            if isinstance(s, SignalState)
+        ]
+        assert signals == _signals_by_query(
+            traffic_history,
+            road_map,
+            lane_sig_state,
+            round(elapsed_sim_time - 0.1, 1),
+            elapsed_sim_time,
+        )
+        emitted += len(signals)
+    assert emitted > 0
+    provider.teardown()
@@ -29,6 +29,10 @@ from smarts.core.coordinates import Dimensions, Heading, Pose
 from smarts.core.utils import pybullet
 from smarts.core.utils.pybullet import bullet_client as bc
 from smarts.core.vehicle import VEHICLE_CONFIGS, Vehicle, VehicleState
+from smarts.core.vehicle_state import (
+    VehicleSpatialIndex,
+    neighborhood_vehicles_around_vehicle,
+)
 
 
 @pytest.fixture
@@ -141,3 +145,35 @@ def test_vehicle_bounding_box(bullet_client):
         vehicle.bounding_box, [[0.5, 2.5], (1.5, 2.5), (1.5, -0.5), (0.5, -0.5)]
     ):
         assert np.array_equal(coordinates[0], coordinates[1])
+
+
+def test_vehicle_spatial_index():
+    def state_at(actor_id, x):
+        return VehicleState(
+            actor_id=actor_id,
+            pose=Pose.from_center((x, 0, 0), Heading(0)),
+            dimensions=Dimensions(length=3, width=1, height=1),
+        )
+
+    ego = state_at("ego", 0)
+    states = [state_at(f"v-{x}", x) for x in (30, -5, 10, 50)] + [ego]
+    spatial_index = VehicleSpatialIndex(states)
+
+    assert [s.actor_id for s in spatial_index.neighbors(ego, radius=10)] == [
+        "v--5",
+        "v-10",
+    ]
+    assert len(spatial_index.neighbors(ego)) == 4
+    assert spatial_index.neighbors(ego, radius=1) == []
+    assert neighborhood_vehicles_around_vehicle(
+        ego, states, radius=30
+    ) == spatial_index.neighbors(ego, radius=30)
+    assert VehicleSpatialIndex([]).neighbors(ego, radius=10) == []
+
+    assert neighborhood_vehicles_around_vehicle(
+        ego, states, radius=30, spatial_index=spatial_index
+    ) == spatial_index.neighbors(ego, radius=30)
+    with pytest.raises(AssertionError):
+        neighborhood_vehicles_around_vehicle(
+            ego, states[:-1], spatial_index=spatial_index
+        )
@@ -30,6 +30,7 @@ from functools import cached_property, lru_cache
 from typing import (
     Dict,
     Generator,
+    Iterable,
     NamedTuple,
     Optional,
     Set,
@@ -39,26 +40,142 @@ from typing import (
     Union,
 )
 
+import numpy as np
+
 from smarts.core.coordinates import Dimensions
 from smarts.core.utils.math import radians_to_vec
 from smarts.core.vehicle import VEHICLE_CONFIGS
 
 T = TypeVar("T")
 
+TRAFFIC_HISTORY_SCHEMA_VERSION = 2
+"""The version of the traffic history database schema. Databases without a
+`schema_version` in their Spec table are version 1."""
+
+
+class TrafficHistoryBackend:
+    """The storage of a traffic history. Queries return plain tuples (or columns) that
+    :class:`TrafficHistory` wraps, so a backend does not depend on the facade."""
+
+    @property
+    def schema_version(self) -> int:
+        """The schema version of the stored history. Backends without versioned
+        schemas support all the queries of the current version."""
+        return TRAFFIC_HISTORY_SCHEMA_VERSION
+
+    def connect_for_multiple_queries(self):
+        """Keep the storage open across queries until :meth:`disconnect` is called."""
+
+    def disconnect(self):
+        """Release the storage kept open by :meth:`connect_for_multiple_queries`."""
+
+    def spec(self) -> Dict[str, str]:
+        """All the key value pairs of the dataset specification."""
+        raise NotImplementedError
+
+    def spec_value(self, key: str) -> Optional[str]:
+        """A value of the dataset specification."""
+        raise NotImplementedError
+
+    def all_vehicle_ids(self) -> Iterable[int]:
+        """The ids of all vehicles."""
+        raise NotImplementedError
+
+    def ego_vehicle_id(self) -> Optional[int]:
+        """The id of the ego vehicle."""
+        raise NotImplementedError
+
+    def vehicle_attributes(self) -> Iterable[Tuple]:
+        """The id, type, length, width, and height of every vehicle."""
+        raise NotImplementedError
+
+    def vehicle_type(self, vehicle_id: str) -> Optional[int]:
+        """The dataset type of a vehicle."""
+        raise NotImplementedError
+
+    def vehicle_dims(self, vehicle_id: str) -> Optional[Tuple]:
+        """The length, width, height, and type of a vehicle."""
+        raise NotImplementedError
+
+    def vehicle_initial_time(self, vehicle_id: str) -> Optional[float]:
+        """The first time a vehicle is seen."""
+        raise NotImplementedError
+
+    def vehicle_final_exit_time(self, vehicle_id: str) -> Optional[float]:
+        """The last time a vehicle is seen."""
+        raise NotImplementedError
+
+    def vehicle_final_position(self, vehicle_id: str) -> Optional[Tuple]:
+        """The last (x, y) position of a vehicle."""
+        raise NotImplementedError
+
+    def first_seen_times(self) -> Iterable[Tuple]:
+        """The (id, time) each passenger car is first seen."""
+        raise NotImplementedError
+
+    def last_seen_vehicle_time(self) -> Optional[float]:
+        """The last time any passenger car is seen."""
+        raise NotImplementedError
+
+    def vehicle_pose_at_time(self, vehicle_id: str, sim_time: float) -> Optional[Tuple]:
+        """The (x, y, heading, speed) of a vehicle at the given time."""
+        raise NotImplementedError
+
+    def vehicle_ids_active_between(
+        self, start_time: float, end_time: float
+    ) -> Iterable[Tuple]:
+        """The `(id,)` of each passenger car seen in `[start_time, end_time]`."""
+        raise NotImplementedError
+
+    def vehicles_active_between(
+        self, start_time: float, end_time: float
+    ) -> Iterable[Tuple]:
+        """The fields of :class:`TrafficHistory.VehicleRow` for every trajectory row
+        in `(start_time, end_time]`, latest first."""
+        raise NotImplementedError
+
+    def trajectory_columns_between(
+        self, start_time: float, end_time: float
+    ) -> TrafficHistory.TrajectoryColumns:
+        """All trajectory rows in `(start_time, end_time]` as columns sorted by time."""
+        raise NotImplementedError
+
+    def traffic_light_states_between(
+        self, start_time: float, end_time: float
+    ) -> Iterable[Tuple]:
+        """The fields of :class:`TrafficHistory.TrafficLightRow` for every traffic light
+        state in `(start_time, end_time]`, earliest first."""
+        raise NotImplementedError
+
+    def vehicle_window_by_id(self, vehicle_id: str) -> Optional[Tuple]:
+        """The fields of :class:`TrafficHistory.TrafficHistoryVehicleWindow` (with the
+        dataset type) over the whole trajectory of a vehicle."""
+        raise NotImplementedError
+
+    def vehicle_windows_in_range(
+        self,
+        exists_at_or_after: float,
+        ends_before: float,
+        minimum_vehicle_window: float,
+    ) -> Iterable[Tuple]:
+        """The fields of :class:`TrafficHistory.TrafficHistoryVehicleWindow` (with the
+        dataset type) of the vehicles seen for at least `minimum_vehicle_window` in
+        `[exists_at_or_after, ends_before)`, ordered by start time."""
+        raise NotImplementedError
+
+    def vehicle_trajectory(self, vehicle_id: str) -> Iterable[Tuple]:
+        """The (x, y, heading, speed) of each row of a vehicle's trajectory."""
+        raise NotImplementedError
 
-class TrafficHistory:
-    """Traffic history for use with converted datasets."""
+
+class SqliteTrafficHistoryBackend(TrafficHistoryBackend):
+    """A traffic history stored in a SQLite database."""
 
     def __init__(self, db):
         self._log = logging.getLogger(self.__class__.__name__)
         self._db = db
         self._db_cnxn = None
 
-    @property
-    def name(self) -> str:
-        """The name of the traffic history."""
-        return os.path.splitext(self._db.name)[0]
-
     def connect_for_multiple_queries(self):
         """Optional optimization to avoid the overhead of parsing
         the sqlite file header multiple times for clients that
@@ -87,6 +204,87 @@ class TrafficHistory:
             return None
         return row if result_type is tuple else result_type(row[0])
 
+    @cached_property
+    def schema_version(self) -> int:
+        """The schema version of the history database. Older databases are upgraded in
+        place the first time this is checked, if they are writable."""
+        query = "SELECT value FROM Spec WHERE key='schema_version'"
+        version = self._query_val(int, query) or 1
+        if version < TRAFFIC_HISTORY_SCHEMA_VERSION:
+            try:
+                with closing(sqlite3.connect(self._db)) as dbcnxn:
+                    SqliteTrafficHistoryBackend.upgrade_schema(dbcnxn)
+                version = TRAFFIC_HISTORY_SCHEMA_VERSION
+            except sqlite3.Error as e:
+                self._log.warning(
+                    f"unable to upgrade traffic history `{os.fspath(self._db)}` from "
+                    f"version {version}, falling back to slower queries: {e}"
+                )
+        return version
+
+    @staticmethod
+    def upgrade_schema(dbcnxn: sqlite3.Connection):
+        """Upgrade a traffic history database in place to the current schema version.
+
+        Version 2 replaces the single column trajectory indices with an index on
+        `(sim_time, vehicle_id)` that covers the replayed columns (the primary key
+        already orders trajectories by `(vehicle_id, sim_time)`) and adds the
+        VehicleSummary table.
+        """
+        cur = dbcnxn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("SELECT value FROM Spec WHERE key='schema_version'")
+            row = cur.fetchone()
+            version = int(row[0]) if row else 1
+            if version < 2:
+                cur.execute("DROP INDEX IF EXISTS Trajectory_Time")
+                cur.execute("DROP INDEX IF EXISTS Trajectory_Vehicle")
+                cur.execute(
+                    """CREATE INDEX IF NOT EXISTS Trajectory_Time_Vehicle
+                       ON Trajectory (sim_time, vehicle_id,
+                                      position_x, position_y, heading_rad, speed)"""
+                )
+                cur.execute("DROP TABLE IF EXISTS VehicleSummary")
+                cur.execute(
+                    """CREATE TABLE VehicleSummary (
+                           vehicle_id INTEGER PRIMARY KEY,
+                           first_seen REAL NOT NULL,
+                           last_seen REAL NOT NULL,
+                           final_position_x REAL NOT NULL,
+                           final_position_y REAL NOT NULL,
+                           average_speed REAL,
+                           FOREIGN KEY (vehicle_id) REFERENCES Vehicle(id)
+                       ) WITHOUT ROWID"""
+                )
+                cur.execute(
+                    """INSERT INTO VehicleSummary
+                       SELECT S.vehicle_id, S.first_seen, S.last_seen,
+                              T.position_x, T.position_y, S.average_speed
+                       FROM (
+                        SELECT vehicle_id, MIN(sim_time) AS first_seen,
+                               MAX(sim_time) AS last_seen, AVG(speed) AS average_speed
+                        FROM Trajectory
+                        GROUP BY vehicle_id
+                       ) AS S
+                       INNER JOIN Trajectory AS T
+                       ON T.vehicle_id = S.vehicle_id AND T.sim_time = S.last_seen"""
+                )
+            cur.execute(
+                "INSERT OR REPLACE INTO Spec VALUES ('schema_version', ?)",
+                (str(TRAFFIC_HISTORY_SCHEMA_VERSION),),
+            )
+            dbcnxn.commit()
+        except:
+            dbcnxn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    @property
+    def _has_vehicle_summary(self) -> bool:
+        return self.schema_version >= 2
+
     def _query_list(
         self, query: str, params: Tuple = ()
     ) -> Generator[Tuple, None, None]:
@@ -98,60 +296,326 @@ class TrafficHistory:
                 yield row
             cur.close()
 
+    def spec(self) -> Dict[str, str]:
+        return dict(self._query_list("SELECT key, value FROM Spec"))
+
+    def spec_value(self, key: str) -> Optional[str]:
+        query = "SELECT value FROM Spec where key=?"
+        return self._query_val(str, query, params=(key,))
+
+    def all_vehicle_ids(self) -> Generator[int, None, None]:
+        query = "SELECT id FROM Vehicle"
+        return (row[0] for row in self._query_list(query))
+
+    def ego_vehicle_id(self) -> Optional[int]:
+        query = "SELECT id FROM Vehicle WHERE is_ego_vehicle = 1"
+        return self._query_val(int, query)
+
+    def vehicle_attributes(self) -> Generator[Tuple, None, None]:
+        query = "SELECT id, type, length, width, height FROM Vehicle"
+        return self._query_list(query)
+
+    def vehicle_type(self, vehicle_id: str) -> Optional[int]:
+        query = "SELECT type FROM Vehicle WHERE id = ?"
+        return self._query_val(int, query, params=(vehicle_id,))
+
+    def vehicle_dims(self, vehicle_id: str) -> Optional[Tuple]:
+        query = "SELECT length, width, height, type FROM Vehicle WHERE id = ?"
+        return self._query_val(tuple, query, params=(vehicle_id,))
+
+    def vehicle_initial_time(self, vehicle_id: str) -> Optional[float]:
+        query = "SELECT MIN(sim_time) FROM Trajectory WHERE vehicle_id = ?"
+        if self._has_vehicle_summary:
+            query = "SELECT first_seen FROM VehicleSummary WHERE vehicle_id = ?"
+        return self._query_val(float, query, params=(vehicle_id,))
+
+    def vehicle_final_exit_time(self, vehicle_id: str) -> Optional[float]:
+        query = "SELECT MAX(sim_time) FROM Trajectory WHERE vehicle_id = ?"
+        if self._has_vehicle_summary:
+            query = "SELECT last_seen FROM VehicleSummary WHERE vehicle_id = ?"
+        return self._query_val(float, query, params=(vehicle_id,))
+
+    def vehicle_final_position(self, vehicle_id: str) -> Optional[Tuple]:
+        if self._has_vehicle_summary:
+            query = """SELECT final_position_x, final_position_y
+                       FROM VehicleSummary WHERE vehicle_id = ?"""
+            return self._query_val(tuple, query, params=(vehicle_id,))
+        query = "SELECT position_x, position_y FROM Trajectory WHERE vehicle_id=? AND sim_time=(SELECT MAX(sim_time) FROM Trajectory WHERE vehicle_id=?)"
+        return self._query_val(
+            tuple,
+            query,
+            params=(
+                vehicle_id,
+                vehicle_id,
+            ),
+        )
+
+    def first_seen_times(self) -> Generator[Tuple, None, None]:
+        if self._has_vehicle_summary:
+            query = """SELECT S.vehicle_id, S.first_seen
+                FROM VehicleSummary AS S INNER JOIN Vehicle AS V ON S.vehicle_id=V.id
+                WHERE V.type = 2"""
+            return self._query_list(query)
+        query = """SELECT T.vehicle_id, MIN(T.sim_time)
+            FROM Trajectory AS T INNER JOIN Vehicle AS V ON T.vehicle_id=V.id
+            WHERE V.type = 2
+            GROUP BY vehicle_id"""
+        return self._query_list(query)
+
+    def last_seen_vehicle_time(self) -> Optional[float]:
+        if self._has_vehicle_summary:
+            query = """SELECT MAX(S.last_seen)
+                FROM VehicleSummary AS S INNER JOIN Vehicle AS V ON S.vehicle_id=V.id
+                WHERE V.type = 2"""
+            return self._query_val(float, query)
+
+        query = """SELECT MAX(T.sim_time)
+            FROM Trajectory AS T INNER JOIN Vehicle AS V ON T.vehicle_id=V.id
+            WHERE V.type = 2
+            ORDER BY T.sim_time DESC LIMIT 1"""
+        return self._query_val(float, query)
+
+    def vehicle_pose_at_time(self, vehicle_id: str, sim_time: float) -> Optional[Tuple]:
+        query = """SELECT position_x, position_y, heading_rad, speed
+                   FROM Trajectory
+                   WHERE vehicle_id = ? and sim_time = ?"""
+        return self._query_val(tuple, query, params=(int(vehicle_id), float(sim_time)))
+
+    def vehicle_ids_active_between(
+        self, start_time: float, end_time: float
+    ) -> Generator[Tuple, None, None]:
+        query = """SELECT DISTINCT T.vehicle_id
+                   FROM Trajectory AS T INNER JOIN Vehicle AS V ON T.vehicle_id=V.id
+                   WHERE ? <= T.sim_time AND T.sim_time <= ? AND V.type = 2"""
+        return self._query_list(query, (start_time, end_time))
+
+    def vehicles_active_between(
+        self, start_time: float, end_time: float
+    ) -> Generator[Tuple, None, None]:
+        query = """SELECT V.id, V.type, V.length, V.width, V.height,
+                          T.position_x, T.position_y, T.heading_rad, T.speed
+                   FROM Vehicle AS V INNER JOIN Trajectory AS T ON V.id = T.vehicle_id
+                   WHERE T.sim_time > ? AND T.sim_time <= ?
+                   ORDER BY T.sim_time DESC"""
+        return self._query_list(query, (start_time, end_time))
+
+    def trajectory_columns_between(
+        self, start_time: float, end_time: float
+    ) -> TrafficHistory.TrajectoryColumns:
+        query = """SELECT sim_time, vehicle_id, position_x, position_y, heading_rad, speed
+                   FROM Trajectory
+                   WHERE sim_time > ? AND sim_time <= ?
+                   ORDER BY sim_time ASC"""
+        rows = list(self._query_list(query, (start_time, end_time)))
+        columns = np.array(rows, dtype=np.float64).reshape(-1, 6).T
+        return TrafficHistory.TrajectoryColumns(
+            sim_time=columns[0],
+            vehicle_id=columns[1].astype(np.int64),
+            position_x=columns[2],
+            position_y=columns[3],
+            heading_rad=columns[4],
+            speed=columns[5],
+        )
+
+    def traffic_light_states_between(
+        self, start_time: float, end_time: float
+    ) -> Generator[Tuple, None, None]:
+        query = """SELECT sim_time, state, stop_point_x, stop_point_y, lane
+                   FROM TrafficLightState
+                   WHERE sim_time > ? AND sim_time <= ?
+                   ORDER BY sim_time ASC"""
+        return self._query_list(query, (start_time, end_time))
+
+    def vehicle_window_by_id(
+        self,
+        vehicle_id: str,
+    ) -> Optional[Tuple]:
+        query = """SELECT V.id, V.type, V.length, V.width, V.height,
+                          S.position_x, S.position_y, S.heading_rad, S.speed, D.avg_speed,
+                          S.sim_time, E.sim_time,
+                          E.position_x, E.position_y, E.heading_rad
+                    FROM Vehicle AS V
+                    INNER JOIN (
+                     SELECT vehicle_id, AVG(speed) as "avg_speed"
+                     FROM Trajectory
+                     WHERE vehicle_id = ?
+                    ) AS D ON V.id = D.vehicle_id
+                    INNER JOIN (
+                     SELECT vehicle_id, MIN(sim_time) as sim_time, speed, position_x, position_y, heading_rad
+                     FROM Trajectory
+                     WHERE vehicle_id = ?
+                    ) AS S ON V.id = S.vehicle_id
+                    INNER JOIN (
+                     SELECT vehicle_id, MAX(sim_time) as sim_time, speed, position_x, position_y, heading_rad
+                     FROM Trajectory
+                     WHERE vehicle_id = ?
+                    ) AS E ON V.id = E.vehicle_id
+        """
+        rows = self._query_list(
+            query,
+            tuple([vehicle_id] * 3),
+        )
+
+        return next(rows, None)
+
+    def vehicle_windows_in_range(
+        self,
+        exists_at_or_after: float,
+        ends_before: float,
+        minimum_vehicle_window: float,
+    ) -> Generator[Tuple, None, None]:
+        # The first and last rows of each vehicle in the range are found through the
+        # (vehicle_id, sim_time) primary key. The vehicle summary rules out vehicles
+        # that are not in the range before any trajectory is searched.
+        candidates, candidate_params = "Vehicle AS C", ()
+        if self._has_vehicle_summary:
+            candidates = """(SELECT vehicle_id AS id FROM VehicleSummary
+                             WHERE last_seen >= ? AND first_seen < ?) AS C"""
+            candidate_params = (exists_at_or_after, ends_before)
+        query = f"""SELECT V.id, V.type, V.length, V.width, V.height,
+                          S.position_x, S.position_y, S.heading_rad, S.speed, W.avg_speed,
+                          S.sim_time, E.sim_time,
+                          E.position_x, E.position_y, E.heading_rad
+                   FROM (
+                    SELECT C.id,
+                        (SELECT MIN(sim_time) FROM Trajectory
+                         WHERE vehicle_id = C.id AND sim_time >= ?) AS start_time,
+                        (SELECT MAX(sim_time) FROM Trajectory
+                         WHERE vehicle_id = C.id AND sim_time < ?) AS end_time,
+                        (SELECT AVG(speed) FROM Trajectory
+                         WHERE vehicle_id = C.id AND sim_time >= ? AND sim_time < ?)
+                         AS avg_speed
+                    FROM {candidates}
+                   ) AS W
+                   INNER JOIN Vehicle AS V ON V.id = W.id
+                   INNER JOIN Trajectory AS S
+                   ON S.vehicle_id = W.id AND S.sim_time = W.start_time
+                   INNER JOIN Trajectory AS E
+                   ON E.vehicle_id = W.id AND E.sim_time = W.end_time
+                   WHERE W.end_time - W.start_time >= ?
+                   ORDER BY S.sim_time
+                   """
+
+        rows = self._query_list(
+            query,
+            (
+                exists_at_or_after,
+                ends_before,
+                exists_at_or_after,
+                ends_before,
+                *candidate_params,
+                minimum_vehicle_window,
+            ),
+        )
+
+        return rows
+
+    def vehicle_trajectory(self, vehicle_id: str) -> Generator[Tuple, None, None]:
+        query = """SELECT T.position_x, T.position_y, T.heading_rad, T.speed
+                   FROM Trajectory AS T
+                   WHERE T.vehicle_id = ?"""
+        return self._query_list(query, (vehicle_id,))
+
+
+def _open_backend(db) -> TrafficHistoryBackend:
+    try:
+        with open(db, "rb") as history_file:
+            header = history_file.read(16)
+    except OSError:
+        header = b""
+    # do import here to break circular dependency chain
+    from smarts.core.columnar_traffic_history import ColumnarTrafficHistoryBackend
+
+    if ColumnarTrafficHistoryBackend.is_columnar_header(header):
+        return ColumnarTrafficHistoryBackend(db)
+    return SqliteTrafficHistoryBackend(db)
+
+
+class TrafficHistory:
+    """Traffic history for use with converted datasets. The history is read from either
+    a SQLite database or a columnar trajectory store (see
+    :class:`~smarts.core.columnar_traffic_history.ColumnarTrafficHistoryBackend`),
+    depending on the contents of the file."""
+
+    def __init__(self, db):
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._db = db
+        self._backend = _open_backend(db)
+
+    @property
+    def name(self) -> str:
+        """The name of the traffic history."""
+        return os.path.splitext(self._db.name)[0]
+
+    @property
+    def backend(self) -> TrafficHistoryBackend:
+        """The storage of the traffic history."""
+        return self._backend
+
+    def connect_for_multiple_queries(self):
+        """Optional optimization to avoid the overhead of opening the history storage
+        multiple times for clients that will be performing multiple queries.  If used,
+        then disconnect() should be called when finished."""
+        self._backend.connect_for_multiple_queries()
+
+    def disconnect(self):
+        """End connection with the history database."""
+        self._backend.disconnect()
+
+    @property
+    def schema_version(self) -> int:
+        """The schema version of the history database. Older databases are upgraded in
+        place the first time this is checked, if they are writable."""
+        return self._backend.schema_version
+
+    @staticmethod
+    def upgrade_schema(dbcnxn: sqlite3.Connection):
+        """Upgrade a traffic history database in place to the current schema version.
+        See :meth:`SqliteTrafficHistoryBackend.upgrade_schema`."""
+        SqliteTrafficHistoryBackend.upgrade_schema(dbcnxn)
+
+    def _spec_value(self, result_type: Type[T], key: str) -> Optional[T]:
+        value = self._backend.spec_value(key)
+        return None if value is None else result_type(value)
+
     @cached_property
     def dataset_source(self) -> Optional[str]:
         """The known source of the history data"""
-        query = "SELECT value FROM Spec where key='source_type'"
-        return self._query_val(str, query)
+        return self._spec_value(str, "source_type")
 
     @cached_property
     def lane_width(self) -> Optional[float]:
         """The general lane width in the history data"""
-        query = "SELECT value FROM Spec where key='map_net.lane_width'"
-        return self._query_val(float, query)
+        return self._spec_value(float, "map_net.lane_width")
 
     @cached_property
     def target_speed(self) -> Optional[float]:
         """The general speed limit in the history data."""
-        query = "SELECT value FROM Spec where key='speed_limit_mps'"
-        return self._query_val(float, query)
+        return self._spec_value(float, "speed_limit_mps")
 
-    def all_vehicle_ids(self) -> Generator[int, None, None]:
+    def all_vehicle_ids(self) -> Iterable[int]:
         """Get the ids of all vehicles in the history data"""
-        query = "SELECT id FROM Vehicle"
-        return (row[0] for row in self._query_list(query))
+        return self._backend.all_vehicle_ids()
 
     @cached_property
     def ego_vehicle_id(self) -> Optional[int]:
         """The id of the ego's actor in the history data."""
-        query = "SELECT id FROM Vehicle WHERE is_ego_vehicle = 1"
-        ego_id = self._query_val(int, query)
-        return ego_id
+        return self._backend.ego_vehicle_id()
 
     @lru_cache(maxsize=32)
     def vehicle_initial_time(self, vehicle_id: str) -> float:
         """Returns the initial time the specified vehicle is seen in the history data."""
-        query = "SELECT MIN(sim_time) FROM Trajectory WHERE vehicle_id = ?"
-        return self._query_val(float, query, params=(vehicle_id,))
+        return self._backend.vehicle_initial_time(vehicle_id)
 
     @lru_cache(maxsize=32)
     def vehicle_final_exit_time(self, vehicle_id: str) -> float:
         """Returns the final time the specified vehicle is seen in the history data."""
-        query = "SELECT MAX(sim_time) FROM Trajectory WHERE vehicle_id = ?"
-        return self._query_val(float, query, params=(vehicle_id,))
+        return self._backend.vehicle_final_exit_time(vehicle_id)
 
     @lru_cache(maxsize=32)
     def vehicle_final_position(self, vehicle_id: str) -> Tuple[float, float]:
         """Returns the final (x,y) position for the specified vehicle in the history data."""
-        query = "SELECT position_x, position_y FROM Trajectory WHERE vehicle_id=? AND sim_time=(SELECT MAX(sim_time) FROM Trajectory WHERE vehicle_id=?)"
-        return self._query_val(
-            tuple,
-            query,
-            params=(
-                vehicle_id,
-                vehicle_id,
-            ),
-        )
+        return self._backend.vehicle_final_position(vehicle_id)
 
     def decode_vehicle_type(self, vehicle_type: int) -> str:
         """Convert from the dataset type id to their config type.
@@ -177,8 +641,7 @@ class TrafficHistory:
     @lru_cache(maxsize=32)
     def vehicle_config_type(self, vehicle_id: str) -> str:
         """Find the configuration type of the specified vehicle."""
-        query = "SELECT type FROM Vehicle WHERE id = ?"
-        veh_type = self._query_val(int, query, params=(vehicle_id,))
+        veh_type = self._backend.vehicle_type(vehicle_id)
         return self.decode_vehicle_type(veh_type)
 
     def _resolve_vehicle_dims(
@@ -202,54 +665,35 @@ class TrafficHistory:
         # do import here to break circular dependency chain
         from smarts.core.vehicle import VEHICLE_CONFIGS
 
-        query = "SELECT length, width, height, type FROM Vehicle WHERE id = ?"
-        length, width, height, veh_type = self._query_val(
-            tuple, query, params=(vehicle_id,)
-        )
+        length, width, height, veh_type = self._backend.vehicle_dims(vehicle_id)
         return self._resolve_vehicle_dims(veh_type, length, width, height)
 
-    def first_seen_times(self) -> Generator[Tuple[int, float], None, None]:
+    def first_seen_times(self) -> Iterable[Tuple[int, float]]:
         """Find the times each vehicle is first seen in the traffic history.
 
         XXX: For now, limit agent missions to just passenger cars (V.type = 2)
         """
-        query = """SELECT T.vehicle_id, MIN(T.sim_time)
-            FROM Trajectory AS T INNER JOIN Vehicle AS V ON T.vehicle_id=V.id
-            WHERE V.type = 2
-            GROUP BY vehicle_id"""
-        return self._query_list(query)
+        return self._backend.first_seen_times()
 
     def last_seen_vehicle_time(self) -> Optional[float]:
         """Find the time the last vehicle exits the history."""
-
-        query = """SELECT MAX(T.sim_time)
-            FROM Trajectory AS T INNER JOIN Vehicle AS V ON T.vehicle_id=V.id
-            WHERE V.type = 2
-            ORDER BY T.sim_time DESC LIMIT 1"""
-        return self._query_val(float, query)
+        return self._backend.last_seen_vehicle_time()
 
     def vehicle_pose_at_time(
         self, vehicle_id: str, sim_time: float
     ) -> Optional[Tuple[float, float, float, float]]:
         """Get the pose of the specified vehicle at the specified history time."""
-        query = """SELECT position_x, position_y, heading_rad, speed
-                   FROM Trajectory
-                   WHERE vehicle_id = ? and sim_time = ?"""
-        return self._query_val(tuple, query, params=(int(vehicle_id), float(sim_time)))
+        return self._backend.vehicle_pose_at_time(vehicle_id, sim_time)
 
     def vehicle_ids_active_between(
         self, start_time: float, end_time: float
-    ) -> Generator[Tuple, None, None]:
+    ) -> Iterable[Tuple]:
         """Find the ids of all active vehicles between the given history times.
 
         XXX: For now, limited to just passenger cars (V.type = 2)
         XXX: This looks like the wrong level to filter out vehicles
         """
-
-        query = """SELECT DISTINCT T.vehicle_id
-                   FROM Trajectory AS T INNER JOIN Vehicle AS V ON T.vehicle_id=V.id
-                   WHERE ? <= T.sim_time AND T.sim_time <= ? AND V.type = 2"""
-        return self._query_list(query, (start_time, end_time))
+        return self._backend.vehicle_ids_active_between(start_time, end_time)
 
     class VehicleRow(NamedTuple):
         """Vehicle state information"""
@@ -306,14 +750,30 @@ class TrafficHistory:
         self, start_time: float, end_time: float
     ) -> Generator[TrafficHistory.VehicleRow, None, None]:
         """Find all vehicles active between the given history times."""
-        query = """SELECT V.id, V.type, V.length, V.width, V.height,
-                          T.position_x, T.position_y, T.heading_rad, T.speed
-                   FROM Vehicle AS V INNER JOIN Trajectory AS T ON V.id = T.vehicle_id
-                   WHERE T.sim_time > ? AND T.sim_time <= ?
-                   ORDER BY T.sim_time DESC"""
-        rows = self._query_list(query, (start_time, end_time))
+        rows = self._backend.vehicles_active_between(start_time, end_time)
         return (TrafficHistory.VehicleRow(*row) for row in rows)
 
+    def vehicle_attributes(self) -> Iterable[Tuple]:
+        """Get the id, type, length, width, and height of every vehicle in the history
+        data."""
+        return self._backend.vehicle_attributes()
+
+    class TrajectoryColumns(NamedTuple):
+        """Trajectory rows as columns sorted by time."""
+
+        sim_time: np.ndarray
+        vehicle_id: np.ndarray
+        position_x: np.ndarray
+        position_y: np.ndarray
+        heading_rad: np.ndarray
+        speed: np.ndarray
+
+    def trajectory_columns_between(
+        self, start_time: float, end_time: float
+    ) -> TrafficHistory.TrajectoryColumns:
+        """Load all trajectory rows between the given history times into columns."""
+        return self._backend.trajectory_columns_between(start_time, end_time)
+
     class TrafficLightRow(NamedTuple):
         """Fields in a row from the TrafficLightState table."""
 
@@ -327,45 +787,9 @@ class TrafficHistory:
         self, start_time: float, end_time: float
     ) -> Generator[TrafficHistory.TrafficLightRow, None, None]:
         """Find all traffic light states between the given history times."""
-        query = """SELECT sim_time, state, stop_point_x, stop_point_y, lane
-                   FROM TrafficLightState
-                   WHERE sim_time > ? AND sim_time <= ?
-                   ORDER BY sim_time ASC"""
-        rows = self._query_list(query, (start_time, end_time))
+        rows = self._backend.traffic_light_states_between(start_time, end_time)
         return (TrafficHistory.TrafficLightRow(*row) for row in rows)
 
-    @staticmethod
-    def _greatest_n_per_group_format(
-        select, table, group_by, greatest_of_group, where=None, operation="MAX"
-    ):
-        """This solves the issue where you want to get the highest value of `greatest_of_group` in
-        the group `groupby` for versions of sqlite3 that are lower than `3.7.11`.
-
-        See: https://stackoverflow.com/questions/12608025/how-to-construct-a-sqlite-query-to-group-by-order
-
-        e.g. Get a table of the highest speed(`greatest_of_group`) each vehicle(`group_by`) was
-        operating at.
-        > _greatest_n_per_group_format(
-        >    select="vehicle_speed,
-        >    vehicle_id",
-        >    table="Trajectory",
-        >    group_by="vehicle_id",
-        >    greatest_of_group="vehicle_speed",
-        > )
-        """
-        where = f"{where} AND" if where else ""
-        return f"""
-            SELECT {select},
-                (SELECT COUNT({group_by}) AS count
-                    FROM {table} m2
-                    WHERE m1.{group_by} = m2.{group_by})
-            FROM  {table} m1
-            WHERE {greatest_of_group} = (SELECT {operation}({greatest_of_group})
-                                            FROM {table} m3
-                                            WHERE {where} m1.{group_by} = m3.{group_by})
-            GROUP BY {group_by}
-        """
-
     def _window_from_row(self, row):
         return TrafficHistory.TrafficHistoryVehicleWindow(
             row[0],
@@ -379,34 +803,7 @@ class TrafficHistory:
         vehicle_id: str,
     ) -> Optional[TrafficHistory.TrafficHistoryVehicleWindow]:
         """Find the given vehicle by its id."""
-        query = """SELECT V.id, V.type, V.length, V.width, V.height,
-                          S.position_x, S.position_y, S.heading_rad, S.speed, D.avg_speed,
-                          S.sim_time, E.sim_time,
-                          E.position_x, E.position_y, E.heading_rad
-                    FROM Vehicle AS V
-                    INNER JOIN (
-                     SELECT vehicle_id, AVG(speed) as "avg_speed"
-                     FROM Trajectory
-                     WHERE vehicle_id = ?
-                    ) AS D ON V.id = D.vehicle_id
-                    INNER JOIN (
-                     SELECT vehicle_id, MIN(sim_time) as sim_time, speed, position_x, position_y, heading_rad
-                     FROM Trajectory
-                     WHERE vehicle_id = ?
-                    ) AS S ON V.id = S.vehicle_id
-                    INNER JOIN (
-                     SELECT vehicle_id, MAX(sim_time) as sim_time, speed, position_x, position_y, heading_rad
-                     FROM Trajectory
-                     WHERE vehicle_id = ?
-                    ) AS E ON V.id = E.vehicle_id
-        """
-        rows = self._query_list(
-            query,
-            tuple([vehicle_id] * 3),
-        )
-
-        row = next(rows, None)
-
+        row = self._backend.vehicle_window_by_id(vehicle_id)
         if row is None:
             return None
         return self._window_from_row(row)
@@ -418,59 +815,8 @@ class TrafficHistory:
         minimum_vehicle_window: float,
     ) -> Generator[TrafficHistory.TrafficHistoryVehicleWindow, None, None]:
         """Find all vehicles active between the given history times."""
-        query = f"""SELECT V.id, V.type, V.length, V.width, V.height,
-                          S.position_x, S.position_y, S.heading_rad, S.speed, D.avg_speed,
-                          S.sim_time, E.sim_time,
-                          E.position_x, E.position_y, E.heading_rad
-                   FROM Vehicle AS V
-                   INNER JOIN ( 
-                    SELECT vehicle_id, AVG(speed) as "avg_speed"
-                    FROM (SELECT vehicle_id, sim_time, speed from Trajectory WHERE sim_time >= ? AND sim_time < ?)
-                    GROUP BY vehicle_id
-                   ) AS D ON V.id = D.vehicle_id
-                   INNER JOIN (
-                    {self._greatest_n_per_group_format(
-                        select='''vehicle_id,
-                        sim_time,
-                        speed,
-                        position_x,
-                        position_y,
-                        heading_rad''',
-                        table='Trajectory',
-                        group_by='vehicle_id',
-                        greatest_of_group='sim_time',
-                        where='sim_time >= ?',
-                        operation="MIN"
-                    )}
-                   ) AS S ON V.id = S.vehicle_id
-                   INNER JOIN (
-                    {self._greatest_n_per_group_format(
-                        select='''vehicle_id,
-                        sim_time,
-                        speed,
-                        position_x,
-                        position_y,
-                        heading_rad''',
-                        table='Trajectory',
-                        group_by='vehicle_id',
-                        greatest_of_group='sim_time',
-                        where='sim_time < ?'
-                    )}
-                   ) AS E ON V.id = E.vehicle_id
-                   WHERE E.sim_time - S.sim_time >= ?
-                   GROUP BY V.id
-                   ORDER BY S.sim_time
-                   """
-
-        rows = self._query_list(
-            query,
-            (
-                exists_at_or_after,
-                ends_before,
-                exists_at_or_after,
-                ends_before,
-                minimum_vehicle_window,
-            ),
+        rows = self._backend.vehicle_windows_in_range(
+            exists_at_or_after, ends_before, minimum_vehicle_window
         )
 
         seen = set()
@@ -504,10 +850,7 @@ class TrafficHistory:
         self, vehicle_id: str
     ) -> Generator[TrafficHistory.TrajectoryRow, None, None]:
         """Get the trajectory of the specified vehicle"""
-        query = """SELECT T.position_x, T.position_y, T.heading_rad, T.speed
-                   FROM Trajectory AS T
-                   WHERE T.vehicle_id = ?"""
-        rows = self._query_list(query, (vehicle_id,))
+        rows = self._backend.vehicle_trajectory(vehicle_id)
         return (TrafficHistory.TrajectoryRow(*row) for row in rows)
 
     def random_overlapping_sample(
@@ -518,17 +861,70 @@ class TrafficHistory:
 
         Note: this may return a sample with less than k if we're unable to find k overlapping.
         """
-        # This is inefficient, but it's not that important
-        choice = random.choice(list(vehicle_start_times.keys()))
-        sample = {choice}
-        sample_start_time = vehicle_start_times[choice]
-        sample_end_time = self.vehicle_final_exit_time(choice)
-        while len(sample) < k:
-            choices = list(vehicle_start_times.keys())
-            if len(choices) <= len(sample):
-                break
-            choice = str(random.choice(choices))
-            sample_start_time = min(vehicle_start_times[choice], sample_start_time)
-            sample_end_time = max(self.vehicle_final_exit_time(choice), sample_end_time)
-            sample.add(choice)
-        return sample
+        choices = [str(vehicle_id) for vehicle_id in vehicle_start_times]
+        return set(random.sample(choices, min(max(k, 1), len(choices))))
+
+
+class TrafficHistoryReplay:
+    """Replays the vehicles of a traffic history from trajectory columns held in
+    memory instead of querying the database every step. The trajectories are loaded a
+    window of history time at a time.
+
+    Args:
+        history (TrafficHistory): The traffic history to replay.
+        window (float): The history time loaded into memory with each query.
+    """
+
+    def __init__(self, history: TrafficHistory, window: float = 30):
+        assert window > 0, "window should be positive"
+        self._history = history
+        self._window = window
+        self._vehicle_attributes: Dict[int, Tuple[int, float, float, float]] = {
+            row[0]: tuple(row[1:]) for row in history.vehicle_attributes()
+        }
+        self._columns: Optional[TrafficHistory.TrajectoryColumns] = None
+        self._loaded_start = 0.0
+        self._loaded_end = 0.0
+
+    def _columns_between(
+        self, start_time: float, end_time: float
+    ) -> TrafficHistory.TrajectoryColumns:
+        if (
+            self._columns is None
+            or start_time < self._loaded_start
+            or end_time > self._loaded_end
+        ):
+            self._loaded_start = start_time
+            self._loaded_end = start_time + max(self._window, end_time - start_time)
+            self._columns = self._history.trajectory_columns_between(
+                self._loaded_start, self._loaded_end
+            )
+        return self._columns
+
+    def vehicles_active_between(
+        self, start_time: float, end_time: float
+    ) -> Iterable[TrafficHistory.VehicleRow]:
+        """Find all vehicles active between the given history times. Unlike
+        :meth:`TrafficHistory.vehicles_active_between` only the latest row of each
+        vehicle is returned, latest first."""
+        columns = self._columns_between(start_time, end_time)
+        start, end = np.searchsorted(
+            columns.sim_time, (start_time, end_time), side="right"
+        )
+        vehicle_ids = columns.vehicle_id[start:end][::-1]
+        _, latest = np.unique(vehicle_ids, return_index=True)
+        rows = end - 1 - np.sort(latest)
+        return [
+            TrafficHistory.VehicleRow(
+                vehicle_id, *self._vehicle_attributes[vehicle_id], x, y, heading, speed
+            )
+            for vehicle_id, x, y, heading, speed in zip(
+                columns.vehicle_id[rows].tolist(),
+                columns.position_x[rows].tolist(),
+                columns.position_y[rows].tolist(),
+                columns.heading_rad[rows].tolist(),
+                columns.speed[rows].tolist(),
+            )
+            # Matches the inner join with the Vehicle table
+            if vehicle_id in self._vehicle_attributes
+        ]
@@ -19,30 +19,62 @@
 # THE SOFTWARE.
 
 import logging
+import math
 import weakref
 from functools import cached_property, lru_cache
-from typing import Iterable, Optional, Set
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
+import numpy as np
 from shapely.geometry import Polygon
 
+from smarts.core import config
 from smarts.core.actor import ActorRole, ActorState
 from smarts.core.controllers import ActionSpaceType
 from smarts.core.coordinates import Dimensions, Heading, Point, Pose
 from smarts.core.provider import ProviderManager, ProviderRecoveryFlags, ProviderState
 from smarts.core.road_map import RoadMap
 from smarts.core.signals import SignalLightState, SignalState
-from smarts.core.traffic_history import TrafficHistory
+from smarts.core.traffic_history import TrafficHistory, TrafficHistoryReplay
 from smarts.core.traffic_provider import TrafficProvider
 from smarts.core.utils.math import rounder_for_dt
 from smarts.core.vehicle import VEHICLE_CONFIGS, VehicleState
 
 
+class _SignalTimeline(NamedTuple):
+    """The traffic light states of a traffic history sorted by time. Each state refers
+    to one of the distinct (lane, stop point) signals of the history."""
+
+    sim_time: np.ndarray
+    state: np.ndarray
+    signal: np.ndarray
+    lane_ids: List[int]
+    stop_points: List[Point]
+    controlled_lanes: List[List[str]]
+
+
 class TrafficHistoryProvider(TrafficProvider):
-    """A provider that replays traffic history for simulation."""
+    """A provider that replays traffic history for simulation.
 
-    def __init__(self):
+    Args:
+        in_memory_replay (Optional[bool]):
+            Replay the vehicles from trajectories loaded into memory a window at a time
+            instead of querying the history database every step. Defaults to the engine
+            `providers:traffic_history_in_memory_replay` configuration.
+    """
+
+    def __init__(self, in_memory_replay: Optional[bool] = None):
         self._logger = logging.getLogger(self.__class__.__name__)
         self._histories = None
+        if in_memory_replay is None:
+            in_memory_replay = config()(
+                "providers",
+                "traffic_history_in_memory_replay",
+                default=False,
+                cast=bool,
+            )
+        self._in_memory_replay = in_memory_replay
+        self._replay: Optional[TrafficHistoryReplay] = None
+        self._signal_timeline: Optional[_SignalTimeline] = None
         self._scenario = None
         self._is_setup = False
         self._replaced_actor_ids = set()
@@ -92,12 +124,60 @@ class TrafficHistoryProvider(TrafficProvider):
             del self.__dict__["history_vehicle_ids"]
         self._scenario = scenario
         self._histories = scenario.traffic_history
+        self._replay = None
         if self._histories:
             self._histories.connect_for_multiple_queries()
+            if self._in_memory_replay:
+                self._replay = TrafficHistoryReplay(
+                    self._histories,
+                    window=config()(
+                        "providers",
+                        "traffic_history_replay_window",
+                        default=30,
+                        cast=float,
+                    ),
+                )
+            self._signal_timeline = self._load_signal_timeline()
         self._reset_scenario_state()
         self._is_setup = True
         return ProviderState()
 
+    def _load_signal_timeline(self) -> _SignalTimeline:
+        """Load all the traffic light states of the history and resolve the lanes each
+        signal controls, which does not change during the episode."""
+        rows = list(self._histories.traffic_light_states_between(-math.inf, math.inf))
+        signals: Dict[Tuple[int, Point], int] = {}
+        lane_ids, stop_points, controlled_lanes = [], [], []
+        signal_of_rows = []
+        for tls in rows:
+            stop_pt = Point(tls.stop_point_x, tls.stop_point_y)
+            key = (tls.lane_id, stop_pt)
+            if key not in signals:
+                signals[key] = len(stop_points)
+                lane_ids.append(tls.lane_id)
+                stop_points.append(stop_pt)
+                controlled_lanes.append(self._controlled_lanes(tls.lane_id, stop_pt))
+            signal_of_rows.append(signals[key])
+        return _SignalTimeline(
+            sim_time=np.array([tls.sim_time for tls in rows], dtype=np.float64),
+            state=np.array([tls.state for tls in rows], dtype=np.int64),
+            signal=np.array(signal_of_rows, dtype=np.int64),
+            lane_ids=lane_ids,
+            stop_points=stop_points,
+            controlled_lanes=controlled_lanes,
+        )
+
+    def _controlled_lanes(self, lane_id: int, stop_pt: Point) -> List[str]:
+        controlled_lanes = []
+        for feat, _ in self._scenario.road_map.dynamic_features_near(stop_pt, 4):
+            if feat.type == RoadMap.FeatureType.FIXED_LOC_SIGNAL:
+                feat_lane = feat.type_specific_info
+                # XXX: note that tls.lane_id may or may not correspond to a lane_id in the RoadMap
+                # Here we assume that it will at least be part of the naming scheme somehow.
+                if str(lane_id) in feat_lane.lane_id:
+                    controlled_lanes.append(feat_lane.lane_id)
+        return controlled_lanes
+
     def set_replaced_ids(self, actor_ids: Iterable[str]):
         """Replace the given vehicles, excluding them from control by this provider."""
         self._replaced_actor_ids.update(self._get_base_id(a_id) for a_id in actor_ids)
@@ -116,6 +196,8 @@ class TrafficHistoryProvider(TrafficProvider):
         if self._histories:
             self._histories.disconnect()
             self._histories = None
+        self._replay = None
+        self._signal_timeline = None
         self._scenario = None
         self._reset_scenario_state()
 
@@ -144,7 +226,8 @@ class TrafficHistoryProvider(TrafficProvider):
         history_time = rounder(self._start_time_offset + elapsed_sim_time)
         prev_time = rounder(history_time - dt)
 
-        rows = self._histories.vehicles_active_between(prev_time, history_time)
+        source = self._histories if self._replay is None else self._replay
+        rows = source.vehicles_active_between(prev_time, history_time)
         for hr in rows:
             v_id = self._dbid_to_actor_id(hr.vehicle_id)
             if v_id in vehicle_ids or v_id in self._replaced_actor_ids:
@@ -174,42 +257,34 @@ class TrafficHistoryProvider(TrafficProvider):
         self._last_step_vehicles = vehicle_ids
 
         signals = []
-        last_changed = None
-        rows = self._histories.traffic_light_states_between(prev_time, history_time)
-        try:
-            for tls in rows:
-                stop_pt = Point(tls.stop_point_x, tls.stop_point_y)
-                prev_state = self._lane_sig_state.setdefault(
-                    tls.lane_id, dict()
-                ).setdefault(stop_pt, tls.state)
-                last_changed = tls.sim_time if prev_state != tls.state else None
-                self._lane_sig_state[tls.lane_id][stop_pt] = tls.state
-                lane_sigs_count = len(self._lane_sig_state[tls.lane_id])
-                actor_id = f"signal_{tls.lane_id}_{lane_sigs_count}"
-                controlled_lanes = []
-                for feat, _ in self._scenario.road_map.dynamic_features_near(
-                    stop_pt, 4
-                ):
-                    if feat.type == RoadMap.FeatureType.FIXED_LOC_SIGNAL:
-                        feat_lane = feat.type_specific_info
-                        # XXX: note that tls.lane_id may or may not correspond to a lane_id in the RoadMap
-                        # Here we assume that it will at least be part of the naming scheme somehow.
-                        if str(tls.lane_id) in feat_lane.lane_id:
-                            controlled_lanes.append(feat_lane.lane_id)
-                signals.append(
-                    SignalState(
-                        actor_id=actor_id,
-                        actor_type="signal",
-                        source=self.source_str,
-                        role=ActorRole.Signal,
-                        state=SignalLightState(tls.state),
-                        stopping_pos=stop_pt,
-                        controlled_lanes=controlled_lanes,
-                        last_changed=last_changed,
-                    )
+        timeline = self._signal_timeline
+        start, end = np.searchsorted(
+            timeline.sim_time, (prev_time, history_time), side="right"
+        )
+        for sim_time, state, signal in zip(
+            timeline.sim_time[start:end].tolist(),
+            timeline.state[start:end].tolist(),
+            timeline.signal[start:end].tolist(),
+        ):
+            lane_id = timeline.lane_ids[signal]
+            stop_pt = timeline.stop_points[signal]
+            lane_sig_state = self._lane_sig_state.setdefault(lane_id, dict())
+            prev_state = lane_sig_state.setdefault(stop_pt, state)
+            last_changed = sim_time if prev_state != state else None
+            lane_sig_state[stop_pt] = state
+            actor_id = f"signal_{lane_id}_{len(lane_sig_state)}"
+            signals.append(
+                SignalState(
+                    actor_id=actor_id,
+                    actor_type="signal",
+                    source=self.source_str,
+                    role=ActorRole.Signal,
+                    state=SignalLightState(state),
+                    stopping_pos=stop_pt,
+                    controlled_lanes=list(timeline.controlled_lanes[signal]),
+                    last_changed=last_changed,
                 )
-        except:
-            raise
+            )
 
         return ProviderState(actors=vehicles + signals)
 
@@ -18,9 +18,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import functools
-from threading import RLock
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
 from types import FunctionType
-from typing import Any
+from typing import Any, Dict, Optional
 
 _CACHE_KEY_PREFIX = "_cache_decorator"
 
@@ -77,49 +80,158 @@ def _make_key(
     return _HashedSeq(key)
 
 
+@dataclass
+class CacheStats:
+    """Counters of a `@cache` decorated method summed over all instances."""
+
+    hits: int = 0
+    """Calls answered from the cache."""
+    misses: int = 0
+    """Calls that computed their result."""
+    evictions: int = 0
+    """Entries dropped because the cache was full or the entry expired."""
+    size: int = 0
+    """Entries currently held."""
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of calls answered from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+_registry: Dict[str, CacheStats] = {}
+
+
+def cache_stats() -> Dict[str, CacheStats]:
+    """The counters of every `@cache` decorated method by qualified method name."""
+    return dict(_registry)
+
+
+def _unbound_cache():
+    return None
+
+
+_MISSING = object()
+
+
 # Inspired by https://strandmark.wordpress.com/2018/10/01/clearable-per-instance-method-cache-in-python/
 class _CacheCallable:
-    def __init__(self, cache_key: str, method: FunctionType, instance: Any):
-        self._method = method
-        self._instance = instance
-        self._cache = instance.__dict__
-        self._cache_key = cache_key
-        self._lock = RLock()
+    """The cache of one method on one instance. It is bound once per instance so
+    accessing the method does not allocate, and hits do not take a lock."""
 
-    def __call__(self, *args, **kwargs) -> Any:
-        cached = self._cache.get(self._cache_key, {})
+    __slots__ = ("_method", "_instance_ref", "_entries", "_maxsize", "_ttl", "_stats")
 
-        key = _make_key(args, kwargs)
-        if key not in cached:
-            with self._lock:
-                # Check if another thread filled cache while we awaited lock
-                cached = self._cache.get(self._cache_key, {})
-                if key not in cached:
-                    cached[key] = self._method(self._instance, *args, **kwargs)
-                    self._cache[self._cache_key] = cached
+    def __init__(self, decorator: "cache", instance: Any):
+        self._method = decorator._method
+        self._instance_ref = weakref.ref(instance)
+        self._entries = OrderedDict()
+        self._maxsize = decorator._maxsize
+        self._ttl = decorator._ttl
+        self._stats = decorator._stats
 
-        return cached[key]
+    def __call__(self, *args, **kwargs) -> Any:
+        key = _make_key(args, kwargs)
+        entries = self._entries
+        entry = entries.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, expires_at = (entry, None) if self._ttl is None else entry
+            if expires_at is None or time.monotonic() < expires_at:
+                self._stats.hits += 1
+                try:
+                    entries.move_to_end(key)
+                except KeyError:
+                    # evicted by another thread since the lookup
+                    pass
+                return value
+            self._discard(key)
+            self._stats.evictions += 1
+
+        # Another thread may compute the same entry concurrently, which only costs
+        # the duplicated work.
+        self._stats.misses += 1
+        value = self._method(self._instance_ref(), *args, **kwargs)
+        if key not in entries:
+            self._stats.size += 1
+        entries[key] = (
+            value if self._ttl is None else (value, time.monotonic() + self._ttl)
+        )
+        while len(entries) > self._maxsize:
+            try:
+                entries.popitem(last=False)
+            except KeyError:
+                break
+            self._stats.size -= 1
+            self._stats.evictions += 1
+        return value
+
+    def _discard(self, key):
+        if self._entries.pop(key, _MISSING) is not _MISSING:
+            self._stats.size -= 1
 
     def clear_cache(self):
         """Clear the instance cache."""
-        _CacheCallable.external_clear_cache(self._instance, self._cache_key)
+        self._stats.size -= len(self._entries)
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __del__(self):
+        self._stats.size -= len(self._entries)
+
+    def __reduce__(self):
+        # Copies of the instance start with an empty cache.
+        return (_unbound_cache, ())
 
     @staticmethod
     def external_clear_cache(instance, cache_key):
         """Clears the cache on the given instance."""
-        setattr(instance, cache_key, {})
+        bound = instance.__dict__.get(cache_key)
+        if bound is not None:
+            bound.clear_cache()
 
 
 class cache:
-    """A caching decorator."""
+    """A caching decorator for methods. Each instance keeps its own least recently
+    used cache of up to `maxsize` results that optionally expire `ttl` seconds after
+    they were computed. Hit, miss, eviction, and size counters of each decorated
+    method are available from :func:`cache_stats`.
 
-    def __init__(self, method: FunctionType):
+    Can be used as `@cache` or `@cache(maxsize=128, ttl=1.0)`.
+    """
+
+    def __init__(
+        self,
+        method: Optional[FunctionType] = None,
+        *,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+    ):
+        assert maxsize > 0, "maxsize must be positive"
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._method = None
+        if method is not None:
+            self(method)
+
+    def __call__(self, method: FunctionType) -> "cache":
+        assert self._method is None, "cache is already bound to a method"
         self._method = method
         self._cache_key = f"{_CACHE_KEY_PREFIX}_{method.__name__}"
-
-    def __get__(self, instance: Any, _):
-        assert instance, "Method must be called on an object"
-        return _CacheCallable(self._cache_key, self._method, instance)
+        name = f"{method.__module__}.{method.__qualname__}"
+        self._stats = _registry.setdefault(name, CacheStats())
+        functools.update_wrapper(self, method)
+        return self
+
+    def __get__(self, instance: Any, _=None):
+        if instance is None:
+            return self
+        bound = instance.__dict__.get(self._cache_key)
+        if bound is None or bound._instance_ref() is not instance:
+            bound = _CacheCallable(self, instance)
+            instance.__dict__[self._cache_key] = bound
+        return bound
 
 
 def clear_cache(func):
@@ -18,8 +18,15 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+from __future__ import annotations
+
+from typing import Any, List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+import shapely
+from shapely import STRtree
 from shapely.geometry import LineString, MultiPolygon, Polygon
-from shapely.geometry.base import CAP_STYLE, JOIN_STYLE
+from shapely.geometry.base import CAP_STYLE, JOIN_STYLE, BaseGeometry
 from shapely.ops import triangulate
 
 
@@ -48,3 +55,130 @@ def triangulate_polygon(polygon: Polygon):
         for tri_face in triangulate(polygon)
         if tri_face.centroid.within(polygon)
     ]
+
+
+class ShapeIndex:
+    """A bulk-queryable spatial index over the shapes of a fixed set of items.
+
+    Args:
+        items (Sequence[Any]): The items to index.
+        shapes (Sequence[BaseGeometry]): The shape of each item.
+    """
+
+    def __init__(self, items: Sequence[Any], shapes: Sequence[BaseGeometry]):
+        assert len(items) == len(shapes)
+        self._items = list(items)
+        self._shapes = np.empty(len(shapes), dtype=object)
+        self._shapes[:] = list(shapes)
+        self._tree = STRtree(self._shapes)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def near_points(
+        self, points: np.ndarray, radius: Union[float, Sequence[float]]
+    ) -> List[List[Tuple[Any, float]]]:
+        """Finds the items that are closer than `radius` to each of the given points.
+
+        Args:
+            points (np.ndarray): Points with shape `(n, 2)` or `(n, 3)`. Only the
+                x and y coordinates are considered.
+            radius (Union[float, Sequence[float]]): The search radius, either shared
+                by all points or one per point.
+
+        Returns:
+            List[List[Tuple[Any, float]]]: For each point, the items near it
+                together with their distance to the point, sorted by distance.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        points = points.reshape(-1, points.shape[-1])
+        results = [[] for _ in range(len(points))]
+        if len(points) == 0 or len(self._items) == 0:
+            return results
+        radii = np.broadcast_to(np.asarray(radius, dtype=np.float64), len(points))
+        geoms = shapely.points(points[:, :2])
+        point_indices, shape_indices = self._tree.query(
+            geoms, predicate="dwithin", distance=radii
+        )
+        distances = shapely.distance(geoms[point_indices], self._shapes[shape_indices])
+        near = distances < radii[point_indices]
+        point_indices = point_indices[near]
+        shape_indices = shape_indices[near]
+        distances = distances[near]
+        order = np.lexsort((distances, point_indices))
+        for p, s, d in zip(
+            point_indices[order], shape_indices[order], distances[order]
+        ):
+            results[p].append((self._items[s], float(d)))
+        return results
+
+
+class PolylineSegments(NamedTuple):
+    """The segments of a polyline as contiguous arrays."""
+
+    origins: np.ndarray
+    """The start point of each segment. shape=(n, 2)"""
+    directions: np.ndarray
+    """The vector from the start to the end of each segment. shape=(n, 2)"""
+    lengths: np.ndarray
+    """The length of each segment. shape=(n,)"""
+    offsets: np.ndarray
+    """The offset along the polyline at the start of each segment. shape=(n,)"""
+
+    @classmethod
+    def from_points(cls, points: Sequence[Sequence[float]]) -> PolylineSegments:
+        """Builds the segments of the polyline through the given points."""
+        points = np.array([tuple(p)[:2] for p in points], dtype=np.float64)
+        assert len(points) >= 2
+        directions = np.diff(points, axis=0)
+        lengths = np.linalg.norm(directions, axis=1)
+        offsets = np.zeros_like(lengths)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        return cls(
+            origins=points[:-1],
+            directions=directions,
+            lengths=lengths,
+            offsets=offsets,
+        )
+
+    def project(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Projects points onto the closest location on the polyline.
+
+        Args:
+            points (np.ndarray): Points with shape `(m, 2)` or `(m, 3)`. Only the
+                x and y coordinates are considered.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The offset along the polyline of the
+                closest location to each point and the distance of each point from
+                that location, positive to the left of the polyline.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        points = points.reshape(-1, points.shape[-1])[:, :2]
+        if len(points) == 0:
+            return np.empty(0), np.empty(0)
+        squared_lengths = self.lengths * self.lengths
+        # (m, n, 2) displacements from every segment start to every point
+        displacements = points[:, np.newaxis, :] - self.origins[np.newaxis, :, :]
+        fractions = np.einsum("mnk,nk->mn", displacements, self.directions)
+        np.divide(
+            fractions,
+            squared_lengths,
+            out=fractions,
+            where=squared_lengths > 0,
+        )
+        np.clip(fractions, 0, 1, out=fractions)
+        displacements -= fractions[..., np.newaxis] * self.directions
+        squared_distances = np.einsum("mnk,mnk->mn", displacements, displacements)
+        # like shapely's `project()`, ties go to the earliest segment
+        nearest = np.argmin(squared_distances, axis=1)
+        rows = np.arange(len(points))
+        offsets = (
+            self.offsets[nearest] + fractions[rows, nearest] * self.lengths[nearest]
+        )
+        offcenter = displacements[rows, nearest]
+        directions = self.directions[nearest]
+        sides = np.sign(
+            directions[:, 0] * offcenter[:, 1] - directions[:, 1] * offcenter[:, 0]
+        )
+        return offsets, np.sqrt(squared_distances[rows, nearest]) * sides
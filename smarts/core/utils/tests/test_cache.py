@@ -0,0 +1,77 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from copy import deepcopy
+
+from smarts.core.utils.cache import cache, cache_stats, clear_cache
+
+
+class _Counter:
+    def __init__(self):
+        self.calls = 0
+
+    @cache(maxsize=2)
+    def double(self, value):
+        self.calls += 1
+        return value * 2
+
+    @cache(ttl=0)
+    def expiring(self, value):
+        self.calls += 1
+        return value
+
+    @clear_cache
+    def reset(self):
+        pass
+
+
+def test_cache_bounded_and_instrumented():
+    counter = _Counter()
+    assert counter.double is counter.double
+
+    assert counter.double(1) == 2
+    assert counter.double(1) == 2
+    assert counter.calls == 1
+    counter.double(2)
+    counter.double(3)
+    assert len(counter.double) == 2
+    counter.double(1)
+    assert counter.calls == 4
+
+    stats = cache_stats()[f"{__name__}._Counter.double"]
+    assert stats.hits == 1 and stats.misses == 4 and stats.evictions == 2
+    assert stats.size == 2
+
+    counter.reset()
+    assert len(counter.double) == 0 and stats.size == 0
+
+    counter.expiring(1)
+    counter.expiring(1)
+    assert counter.calls == 6
+
+
+def test_cache_copies_start_empty():
+    counter = _Counter()
+    counter.double(1)
+    copied = deepcopy(counter)
+    assert copied.double(1) == 2
+    assert copied.calls == 2
+    assert len(counter.double) == 1
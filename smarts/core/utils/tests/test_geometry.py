@@ -0,0 +1,45 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import numpy as np
+from shapely.geometry import LineString
+from shapely.geometry import Point as SPoint
+
+from smarts.core.utils.geometry import PolylineSegments
+
+
+def test_polyline_projection():
+    polyline = [(0, 0), (10, 0), (10, 0), (15, 5), (15, 20)]
+    line = LineString(polyline)
+    segments = PolylineSegments.from_points(polyline)
+    assert np.allclose(segments.offsets, [0, 10, 10, 10 + np.sqrt(50)])
+
+    rng = np.random.default_rng(7)
+    points = rng.uniform(-5, 25, (200, 2))
+    offsets, lateral = segments.project(points)
+    for point, offset, t in zip(points, offsets, lateral):
+        assert np.isclose(offset, line.project(SPoint(point)))
+        assert np.isclose(abs(t), line.distance(SPoint(point)))
+
+    # left of the direction of travel is positive
+    _, lateral = segments.project([(5, 1), (5, -1), (16, 10, 3)])
+    assert np.allclose(lateral, [1, -1, -1])
+    assert all(len(a) == 0 for a in segments.project(np.empty((0, 2))))
@@ -399,6 +399,7 @@ class Vehicle:
         if agent_interface.waypoint_paths:
             sensor = WaypointsSensor(
                 lookahead=agent_interface.waypoint_paths.lookahead,
+                incremental=agent_interface.waypoint_paths.incremental,
             )
             vehicle.attach_waypoints_sensor(sensor)
 
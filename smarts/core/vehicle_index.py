@@ -19,18 +19,9 @@
 # THE SOFTWARE.
 import logging
 from copy import copy, deepcopy
+from enum import IntEnum
 from io import StringIO
-from typing import (
-    Dict,
-    FrozenSet,
-    Iterator,
-    List,
-    NamedTuple,
-    Optional,
-    Set,
-    Tuple,
-    Union,
-)
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple, Union
 
 import numpy as np
 import tableprint as tp
@@ -48,6 +39,7 @@ from .sensors import SensorState
 from .vehicle import Vehicle, VehicleState
 
 VEHICLE_INDEX_ID_LENGTH = 128
+_CHANGE_LOG_LIMIT = 2**16
 
 
 def _2id(id_: str):
@@ -60,6 +52,29 @@ def _2id(id_: str):
     return (separator + id_).zfill(VEHICLE_INDEX_ID_LENGTH - len(separator))
 
 
+class VehicleIndexChange(IntEnum):
+    """The kinds of entries in the change log of a `VehicleIndex`."""
+
+    Added = 0
+    """The vehicle was added to the index."""
+    Removed = 1
+    """The vehicle was removed from the index."""
+    ControlChanged = 2
+    """The owner, shadower, or role of the vehicle changed."""
+
+
+class VehicleIndexChanges(NamedTuple):
+    """The net changes to the vehicles of a `VehicleIndex` over part of its change
+    log."""
+
+    added: Set[str]
+    """Vehicles that were not in the index before and are now."""
+    removed: Set[str]
+    """Vehicles that were in the index before and are not now."""
+    control_changed: Set[str]
+    """Vehicles that stayed in the index but changed control or were replaced."""
+
+
 class _ControlEntity(NamedTuple):
     vehicle_id: Union[bytes, str]
     owner_id: Union[bytes, str]
@@ -96,6 +111,10 @@ class VehicleIndex:
         # Loaded from yaml file on scenario reset
         self._controller_params = {}
 
+        # [(VehicleIndexChange, vehicle_id)], see `changes_since()`
+        self._change_log: List[Tuple[VehicleIndexChange, str]] = []
+        self._change_log_start = 0
+
     @classmethod
     def identity(cls):
         """Returns an empty identity index."""
@@ -143,7 +162,7 @@ class VehicleIndex:
         memo[id(self)] = result
 
         dict_ = copy(self.__dict__)
-        shallow = ["_2id_to_id", "_vehicles", "_controller_states"]
+        shallow = ["_2id_to_id", "_vehicles", "_controller_states", "_change_log"]
         for k in shallow:
             v = dict_.pop(k)
             setattr(result, k, copy(v))
@@ -153,6 +172,52 @@ class VehicleIndex:
 
         return result
 
+    @property
+    def change_log_position(self) -> int:
+        """The position after the latest entry of the change log.
+        See :meth:`changes_since`."""
+        return self._change_log_start + len(self._change_log)
+
+    def changes_since(self, position: int) -> Optional[VehicleIndexChanges]:
+        """The net changes to the vehicles in the index since the given position of the
+        change log. This lets callers follow the index without copying it.
+
+        Args:
+            position (int): A previous value of :attr:`change_log_position`.
+
+        Returns:
+            Optional[VehicleIndexChanges]:
+                The changes or `None` if the log no longer reaches back to the position.
+        """
+        if not self._change_log_start <= position <= self.change_log_position:
+            return None
+        added, removed, control_changed = set(), set(), set()
+        for change, vehicle_id in self._change_log[position - self._change_log_start :]:
+            if change == VehicleIndexChange.Added:
+                if vehicle_id in removed:
+                    # replaced by a new vehicle with the same id
+                    removed.discard(vehicle_id)
+                    control_changed.add(vehicle_id)
+                else:
+                    added.add(vehicle_id)
+            elif change == VehicleIndexChange.Removed:
+                control_changed.discard(vehicle_id)
+                if vehicle_id in added:
+                    added.discard(vehicle_id)
+                else:
+                    removed.add(vehicle_id)
+            elif vehicle_id not in added:
+                control_changed.add(vehicle_id)
+        return VehicleIndexChanges(added, removed, control_changed)
+
+    def _log_change(self, change: VehicleIndexChange, vehicle_id):
+        """Appends to the change log, dropping its older half when it gets too long."""
+        self._change_log.append((change, self._2id_to_id.get(vehicle_id, vehicle_id)))
+        if len(self._change_log) > _CHANGE_LOG_LIMIT:
+            dropped = len(self._change_log) // 2
+            del self._change_log[:dropped]
+            self._change_log_start += dropped
+
     @cache
     def vehicle_ids(self) -> Set[str]:
         """A set of all unique vehicles ids in the index."""
@@ -288,9 +353,12 @@ class VehicleIndex:
         return list(self._vehicles.values())
 
     @cache
-    def vehicleitems(self) -> Iterator[Tuple[str, Vehicle]]:
-        """A list of all vehicle IDs paired with their vehicle."""
-        return map(lambda x: (self._2id_to_id[x[0]], x[1]), self._vehicles.items())
+    def vehicleitems(self) -> Tuple[Tuple[str, Vehicle], ...]:
+        """All vehicle IDs paired with their vehicle."""
+        # This is cached, so it must not be an iterator that the first caller exhausts.
+        return tuple(
+            (self._2id_to_id[v_id], vehicle) for v_id, vehicle in self._vehicles.items()
+        )
 
     @cache
     def vehicle_by_id(self, vehicle_id, default=...):
@@ -313,6 +381,7 @@ class VehicleIndex:
             vehicle = self._vehicles.pop(vehicle_id, None)
             if vehicle is not None:
                 vehicle.teardown(renderer=renderer)
+                self._log_change(VehicleIndexChange.Removed, vehicle_id)
 
             # popping since sensor_states/controller_states may not include the
             # vehicle if it's not being controlled by an agent
@@ -354,6 +423,8 @@ class VehicleIndex:
     @clear_cache
     def teardown(self, renderer):
         """Clean up resources, resetting the index."""
+        for vehicle_id in self._vehicles:
+            self._log_change(VehicleIndexChange.Removed, vehicle_id)
         self._controlled_by = VehicleIndex._build_empty_controlled_by()
 
         for vehicle in self._vehicles.values():
@@ -395,6 +466,7 @@ class VehicleIndex:
         self._controlled_by[v_index] = tuple(
             entity._replace(shadower_id=agent_id, is_boid=boid)
         )
+        self._log_change(VehicleIndexChange.ControlChanged, vehicle_id)
 
         # XXX: We are not giving the vehicle an AckermannChassis here but rather later
         #      when we switch_to_agent_control. This means when control that requires
@@ -467,6 +539,7 @@ class VehicleIndex:
                 is_hijacked=hijacking,
             )
         )
+        self._log_change(VehicleIndexChange.ControlChanged, vehicle_id)
 
         return vehicle
 
@@ -490,6 +563,7 @@ class VehicleIndex:
         for entity in self._controlled_by[v_index]:
             entity = _ControlEntity(*entity)
             self._controlled_by[v_index] = tuple(entity._replace(shadower_id=b""))
+            self._log_change(VehicleIndexChange.ControlChanged, entity.vehicle_id)
 
     @clear_cache
     def stop_agent_observation(self, vehicle_id) -> Vehicle:
@@ -502,6 +576,7 @@ class VehicleIndex:
         entity = self._controlled_by[v_index][0]
         entity = _ControlEntity(*entity)
         self._controlled_by[v_index] = tuple(entity._replace(shadower_id=""))
+        self._log_change(VehicleIndexChange.ControlChanged, vehicle_id)
 
         return vehicle
 
@@ -543,6 +618,7 @@ class VehicleIndex:
                 is_hijacked=False,
             )
         )
+        self._log_change(VehicleIndexChange.ControlChanged, v_id)
 
         return vehicle.state, route
 
@@ -728,6 +804,7 @@ class VehicleIndex:
             position=vehicle.position,
         )
         self._controlled_by = np.insert(self._controlled_by, 0, tuple(entity))
+        self._log_change(VehicleIndexChange.Added, vehicle_id)
 
     @clear_cache
     def build_social_vehicle(
@@ -766,6 +843,7 @@ class VehicleIndex:
             position=np.asarray(vehicle.position),
         )
         self._controlled_by = np.insert(self._controlled_by, 0, tuple(entity))
+        self._log_change(VehicleIndexChange.Added, vehicle_id)
 
         return vehicle
 
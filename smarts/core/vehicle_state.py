@@ -20,10 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 from dataclasses import dataclass
-from typing import NamedTuple, Optional, Tuple
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 
 import numpy as np
-from scipy.spatial.distance import cdist
+from scipy.spatial import cKDTree
 from shapely.affinity import rotate as shapely_rotate
 from shapely.geometry import Polygon
 from shapely.geometry import box as shapely_box
@@ -171,22 +171,72 @@ class VehicleState(ActorState):
         return shapely_rotate(poly, self.pose.heading, use_radians=True)
 
 
+class VehicleSpatialIndex:
+    """A spatial index over the positions of a set of vehicle states that is used to find
+    the vehicles within a radius of a point."""
+
+    def __init__(self, vehicle_states: Iterable[VehicleState]):
+        self._vehicle_states: List[VehicleState] = list(vehicle_states)
+        positions = np.array(
+            [state.pose.position for state in self._vehicle_states], dtype=np.float64
+        ).reshape(-1, 3)
+        self._tree = cKDTree(positions) if len(positions) else None
+
+    def __len__(self):
+        return len(self._vehicle_states)
+
+    def indices_within(self, position, radius: Optional[float]) -> List[int]:
+        """Get the indices of the vehicles within the radius of the position.
+
+        Args:
+            position: The 3D position to search around.
+            radius (Optional[float]): The search radius. All vehicles if `None`.
+
+        Returns:
+            List[int]: The indices of the vehicles in index order.
+        """
+        if radius is None or radius == np.inf:
+            return list(range(len(self._vehicle_states)))
+        if self._tree is None:
+            return []
+        return sorted(self._tree.query_ball_point(position, r=radius))
+
+    def neighbors(
+        self, vehicle_state: VehicleState, radius: Optional[float] = None
+    ) -> List[VehicleState]:
+        """Get the other vehicles within the radius of the given vehicle.
+
+        Args:
+            vehicle_state (VehicleState): The vehicle to search around.
+            radius (Optional[float]): The search radius. All other vehicles if `None`.
+
+        Returns:
+            List[VehicleState]: The neighboring vehicle states in index order.
+        """
+        return [
+            self._vehicle_states[i]
+            for i in self.indices_within(vehicle_state.pose.position, radius)
+            if self._vehicle_states[i].actor_id != vehicle_state.actor_id
+        ]
+
+
 def neighborhood_vehicles_around_vehicle(
-    vehicle_state, vehicle_states, radius: Optional[float] = None
+    vehicle_state,
+    vehicle_states,
+    radius: Optional[float] = None,
+    spatial_index: Optional[VehicleSpatialIndex] = None,
 ):
-    """Determines what vehicles are within the radius (if given)."""
-    other_states = [v for v in vehicle_states if v.actor_id != vehicle_state.actor_id]
-    if radius is None:
-        return other_states
-
-    other_positions = [state.pose.position for state in other_states]
-    if not other_positions:
-        return []
-
-    # calculate euclidean distances
-    distances = cdist(
-        other_positions, [vehicle_state.pose.position], metric="euclidean"
-    ).reshape(-1)
-
-    indices = np.argwhere(distances <= radius).flatten()
-    return [other_states[i] for i in indices]
+    """Determines what vehicles are within the radius (if given).
+
+    Args:
+        spatial_index (Optional[VehicleSpatialIndex]):
+            A prebuilt index over the given vehicle states, which the caller keeps
+            consistent with them. One is built if not given.
+    """
+    if spatial_index is None:
+        spatial_index = VehicleSpatialIndex(vehicle_states)
+    else:
+        assert len(spatial_index) == len(
+            vehicle_states
+        ), "The spatial index must be built over the given vehicle states."
+    return spatial_index.neighbors(vehicle_state, radius)
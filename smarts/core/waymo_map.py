@@ -26,7 +26,7 @@ import time
 from collections import defaultdict, deque
 from copy import deepcopy
 from dataclasses import dataclass, field
-from functools import cached_property, lru_cache
+from functools import cached_property
 from pathlib import Path
 from typing import Any, Dict, Generator, List, Optional, Sequence, Set, Tuple, Union
 
@@ -38,8 +38,9 @@ from smarts.core.coordinates import BoundingBox, Heading, Point, Pose, RefLinePo
 from smarts.core.lanepoints import LanePoints, LinkedLanePoint
 from smarts.core.road_map import RoadMap, RoadMapWithCaches, Waypoint
 from smarts.core.route_cache import RouteWithCache
+from smarts.core.utils.cache import cache
 from smarts.core.utils.file import read_tfrecord_file
-from smarts.core.utils.geometry import buffered_shape
+from smarts.core.utils.geometry import ShapeIndex, buffered_shape
 from smarts.core.utils.glb import make_map_glb, make_road_line_glb
 from smarts.core.utils.math import (
     inplace_unwrap,
@@ -1124,7 +1125,7 @@ class WaymoMap(RoadMapWithCaches):
         def is_composite(self) -> bool:
             return self._is_composite
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -1222,21 +1223,21 @@ class WaymoMap(RoadMapWithCaches):
         def width_at_offset(self, lane_point_s: float) -> Tuple[float, float]:
             return self._lane_width, 1.0
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def center_at_point(self, point: Point) -> Point:
             return super().center_at_point(point)
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def center_pose_at_point(self, point: Point) -> Pose:
             return super().center_pose_at_point(point)
 
-        @lru_cache(maxsize=1024)
+        @cache(maxsize=16)
         def curvature_radius_at_offset(
             self, offset: float, lookahead: int = 5
         ) -> float:
             return super().curvature_radius_at_offset(offset, lookahead)
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_lanes_at_offset(
             self, offset: float
         ) -> List[RoadMapWithCaches.Lane]:
@@ -1264,7 +1265,7 @@ class WaymoMap(RoadMapWithCaches):
                     result.append(lane)
             return result
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             assert type(point) == Point
             if (
@@ -1278,7 +1279,7 @@ class WaymoMap(RoadMapWithCaches):
                 )
             return False
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def project_along(
             self, start_offset: float, distance: float
         ) -> Set[Tuple[RoadMapWithCaches.Lane, float]]:
@@ -1441,7 +1442,7 @@ class WaymoMap(RoadMapWithCaches):
                 }
             )
 
-        @lru_cache(maxsize=8)
+        @cache(maxsize=8)
         def contains_point(self, point: Point) -> bool:
             if (
                 self._bbox.min_pt.x <= point[0] <= self._bbox.max_pt.x
@@ -1452,7 +1453,7 @@ class WaymoMap(RoadMapWithCaches):
                         return True
             return False
 
-        @lru_cache(maxsize=16)
+        @cache(maxsize=16)
         def oncoming_roads_at_point(self, point: Point) -> List[RoadMap.Road]:
             result = []
             for lane in self.lanes:
@@ -1487,7 +1488,7 @@ class WaymoMap(RoadMapWithCaches):
                 :leftmost_edge_vertices_len
             ]
 
-        @lru_cache(maxsize=4)
+        @cache(maxsize=4)
         def shape(
             self, buffer_width: float = 0.0, default_width: Optional[float] = None
         ) -> Polygon:
@@ -1524,7 +1525,7 @@ class WaymoMap(RoadMapWithCaches):
         assert lane, f"WaymoMap got request for unknown lane_id: '{lane_id}'"
         return lane
 
-    @lru_cache(maxsize=4)
+    @cache(maxsize=4)
     def dynamic_features_near(
         self, point: Point, radius: float
     ) -> List[Tuple[RoadMap.Feature, float]]:
@@ -1566,7 +1567,7 @@ class WaymoMap(RoadMapWithCaches):
                 neighboring_lanes.append((lane, d))
         return neighboring_lanes
 
-    @lru_cache(maxsize=1024)
+    @cache(maxsize=1024)
     def nearest_lanes(
         self,
         point: Point,
@@ -1579,6 +1580,21 @@ class WaymoMap(RoadMapWithCaches):
         candidate_lanes.sort(key=lambda lane_dist_tup: lane_dist_tup[1])
         return candidate_lanes
 
+    @cached_property
+    def _lane_shape_index(self) -> ShapeIndex:
+        simple_lanes = self._simple_lanes
+        return ShapeIndex(simple_lanes, [lane.shape() for lane in simple_lanes])
+
+    def nearest_lanes_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions: bool = False,
+    ) -> List[List[Tuple[RoadMapWithCaches.Lane, float]]]:
+        if radius is None:
+            radius = max(10, 2 * self._default_lane_width)
+        return self._lane_shape_index.near_points(points, radius)
+
     def nearest_lane(
         self,
         point: Point,
@@ -1586,6 +1602,26 @@ class WaymoMap(RoadMapWithCaches):
         include_junctions: bool = False,
     ) -> Optional[RoadMapWithCaches.Lane]:
         nearest_lanes = self.nearest_lanes(point, radius, include_junctions)
+        return self._nearest_containing_lane(point, nearest_lanes)
+
+    def nearest_lane_batch(
+        self,
+        points: np.ndarray,
+        radius: Optional[Union[float, Sequence[float]]] = None,
+        include_junctions: bool = False,
+    ) -> List[Optional[RoadMapWithCaches.Lane]]:
+        points = np.asarray(points, dtype=np.float64)
+        return [
+            self._nearest_containing_lane(Point(*point.tolist()), nearest_lanes)
+            for point, nearest_lanes in zip(
+                points, self.nearest_lanes_batch(points, radius, include_junctions)
+            )
+        ]
+
+    @staticmethod
+    def _nearest_containing_lane(
+        point: Point, nearest_lanes: List[Tuple[RoadMapWithCaches.Lane, float]]
+    ) -> Optional[RoadMapWithCaches.Lane]:
         for lane, dist in nearest_lanes:
             if lane.contains_point(point):
                 # Since Waymo has lanes of varying width, a point can be closer to a lane it does not lie in
@@ -1594,7 +1630,7 @@ class WaymoMap(RoadMapWithCaches):
                 return lane
         return nearest_lanes[0][0] if nearest_lanes else None
 
-    @lru_cache(maxsize=16)
+    @cache(maxsize=16)
     def road_with_point(self, point: Point) -> Optional[RoadMap.Road]:
         radius = max(5, 2 * self._default_lane_width)
         for nl, dist in self.nearest_lanes(point, radius):
@@ -1832,7 +1868,9 @@ class WaymoMap(RoadMapWithCaches):
     @cached_property
     def _lanepoints(self):
         assert self._map_spec.lanepoint_spacing > 0
-        return LanePoints.from_waymo(self, spacing=self._map_spec.lanepoint_spacing)
+        return LanePoints.from_cache(
+            self, self._map_spec.lanepoint_spacing, LanePoints.from_waymo
+        )
 
     def waypoint_paths(
         self,
@@ -0,0 +1,126 @@
+# MIT License
+#
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import numpy as np
+
+from smarts.core.agent_interface import AgentInterface, AgentType
+from smarts.core.coordinates import Dimensions, Heading
+from smarts.core.observations import VehicleObservation
+from smarts.core.road_map import Waypoint
+from smarts.env.utils.observation_conversion import (
+    _NEIGHBOR_SHP,
+    _WAYPOINT_SHP,
+    ObservationOptions,
+    ObservationSpacesFormatter,
+    _allocate_buffers,
+    _format_neighborhood_vehicle_states,
+    _format_waypoint_paths,
+    neighborhood_vehicle_states_space_format,
+    waypoint_paths_space_format,
+)
+
+
+def _buffers(space_format):
+    return _allocate_buffers(
+        space_format(AgentInterface.from_type(AgentType.Full)).space
+    )
+
+
+def test_format_neighborhood_vehicle_states():
+    out = _buffers(neighborhood_vehicle_states_space_format)
+    out["speed"].fill(7)
+    nghb = VehicleObservation(
+        id="car",
+        position=(1.0, 2.0, 0.0),
+        bounding_box=Dimensions(length=4, width=2, height=1.5),
+        heading=Heading(0.5),
+        speed=10.0,
+        road_id="road",
+        lane_id="lane",
+        lane_index=1,
+        interest=True,
+    )
+
+    formatted = _format_neighborhood_vehicle_states([nghb], out)
+
+    assert formatted["speed"] is out["speed"]
+    assert formatted["id"] == ("car",) + ("",) * (_NEIGHBOR_SHP - 1)
+    assert np.allclose(formatted["box"][0], (4, 2, 1.5))
+    assert np.allclose(formatted["position"][0], (1, 2, 0))
+    assert formatted["interest"][0] == 1
+    assert formatted["lane_index"][0] == 1
+    # Only the received vehicles are written.
+    assert formatted["speed"][0] == np.float32(10)
+    assert np.all(formatted["speed"][1:] == 7)
+
+
+def test_format_waypoint_paths():
+    out = _buffers(waypoint_paths_space_format)
+    paths = [
+        [
+            Waypoint(
+                pos=np.array([i, j]),
+                heading=Heading(0.1),
+                lane_id=f"lane_{i}",
+                lane_width=3.2,
+                speed_limit=13.8,
+                lane_index=i,
+                lane_offset=float(j),
+            )
+            for j in range(length)
+        ]
+        for i, length in enumerate((3, 5))
+    ]
+
+    formatted = _format_waypoint_paths(paths, out)
+
+    assert len(formatted["lane_id"]) == _WAYPOINT_SHP[0]
+    assert formatted["lane_id"][1][:3] == ("lane_1",) * 3
+    assert formatted["lane_id"][1][3] == ""
+    assert np.allclose(formatted["position"][1, 2], (1, 2, 0))
+    assert np.allclose(formatted["lane_offset"][0, :3], (0, 1, 2))
+    assert np.all(formatted["lane_width"][:, 3:] == 0)
+    assert np.all(formatted["lane_width"][2:] == 0)
+
+
+def test_formatter_pads_missing_agents_with_zeros():
+    agent_interfaces = {
+        "agent_0": AgentInterface.from_type(AgentType.Full),
+        "agent_1": AgentInterface.from_type(AgentType.Laner),
+    }
+    formatter = ObservationSpacesFormatter(
+        agent_interfaces, ObservationOptions.full, reuse_buffers=True
+    )
+
+    observations = formatter.format({})
+    stacked = formatter.stacked_observations
+
+    assert set(observations) == set(agent_interfaces)
+    assert observations["agent_0"]["active"] == 0
+    assert not np.any(observations["agent_0"]["neighborhood_vehicle_states"]["box"])
+    assert observations["agent_0"]["waypoint_paths"]["lane_id"][0][0] == ""
+    assert formatter.agent_ids == ["agent_0", "agent_1"]
+    assert stacked["waypoint_paths"]["heading"].shape == (2,) + _WAYPOINT_SHP
+
+    formatter.format({})
+    assert formatter.stacked_observations["waypoint_paths"]["heading"] is (
+        stacked["waypoint_paths"]["heading"]
+    )
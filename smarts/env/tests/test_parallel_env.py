@@ -21,6 +21,7 @@
 # THE SOFTWARE.
 
 import gym
+import numpy as np
 
 gym.logger.set_level(40)
 import pytest
@@ -29,7 +30,7 @@ from smarts.core.agent import Agent
 from smarts.core.agent_interface import RGB, AgentInterface
 from smarts.core.controllers import ActionSpaceType
 from smarts.env.hiway_env import HiWayEnv
-from smarts.env.wrappers.parallel_env import ParallelEnv
+from smarts.env.wrappers.parallel_env import ParallelEnv, _SharedMemoryObservations
 from smarts.zoo.agent_spec import AgentSpec
 
 
@@ -181,3 +182,49 @@ def test_sync_async_episodes(env_constructor, single_env_actions, auto_reset):
         assert all(dones["__all__"] == True for dones in batched_dones)
     finally:
         env.close()
+
+
+def test_shared_memory_observations():
+    space = gym.spaces.Dict(
+        {
+            "Agent_1": gym.spaces.Dict(
+                {
+                    "rgb": gym.spaces.Box(0, 255, shape=(4, 4, 3), dtype=np.uint8),
+                    "speed": gym.spaces.Box(0, 1e10, shape=(), dtype=np.float32),
+                }
+            ),
+            "Agent_2": gym.spaces.Discrete(2),
+        }
+    )
+    parent = _SharedMemoryObservations(space, num_envs=2)
+    child = _SharedMemoryObservations(space, num_envs=2, name=parent.name)
+    try:
+        rgb = np.full((4, 4, 3), 7, dtype=np.uint8)
+        observation = {"Agent_1": {"rgb": rgb, "speed": np.float32(3), "id": "a"}}
+
+        skeleton = child.write(1, observation)
+        assert skeleton["Agent_1"]["id"] == "a"
+        assert not isinstance(skeleton["Agent_1"]["rgb"], np.ndarray)
+
+        view = parent.read(1, skeleton, copy=False)
+        assert set(view) == {"Agent_1"}
+        assert view["Agent_1"]["id"] == "a"
+        assert view["Agent_1"]["speed"] == 3
+        assert np.array_equal(view["Agent_1"]["rgb"], rgb)
+
+        copied = parent.read(1, skeleton, copy=True)
+        child.write(1, {"Agent_1": {"rgb": np.zeros_like(rgb)}})
+        assert not view["Agent_1"]["rgb"].any()
+        assert np.array_equal(copied["Agent_1"]["rgb"], rgb)
+    finally:
+        child.close()
+        parent.close()
+
+
+def test_shared_memory_requires_array_observations(env_constructor):
+    with pytest.raises(ValueError):
+        ParallelEnv(
+            env_constructors=[env_constructor] * 2,
+            auto_reset=True,
+            shared_memory=True,
+        )
@@ -88,65 +88,47 @@ def _format_mission(mission: Mission):
     return {"goal_position": goal_pos}
 
 
-def _format_waypoint_paths(waypoint_paths: List[List[Waypoint]]):
+def _format_waypoint_paths(
+    waypoint_paths: List[List[Waypoint]], out: Dict[str, np.ndarray]
+):
     # Truncate all paths to be of the same length
     min_len = min(map(len, waypoint_paths))
-    trunc_paths = list(map(lambda x: x[:min_len], waypoint_paths))
 
     des_shp = _WAYPOINT_SHP
-    rcv_shp = (len(trunc_paths), len(trunc_paths[0]))
-    pad_shp = [0 if des - rcv < 0 else des - rcv for des, rcv in zip(des_shp, rcv_shp)]
-
-    def extract_elem(waypoint: Waypoint):
-        return (
-            waypoint.heading,
-            waypoint.lane_id,
-            waypoint.lane_index,
-            waypoint.lane_offset,
-            waypoint.lane_width,
-            waypoint.pos,
-            waypoint.speed_limit,
-        )
-
-    paths = [
-        map(extract_elem, path[: des_shp[1]]) for path in trunc_paths[: des_shp[0]]
+    n_paths = min(len(waypoint_paths), des_shp[0])
+    n_points = min(min_len, des_shp[1])
+    waypoints = [
+        waypoint for path in waypoint_paths[:n_paths] for waypoint in path[:n_points]
     ]
-    heading, lane_id, lane_index, lane_offset, lane_width, pos, speed_limit = zip(
-        *[zip(*path) for path in paths]
-    )
 
-    heading = np.array(heading, dtype=np.float32)
     lane_id = tuple(
         tuple(
-            _format_id(l_id, _WAYPOINT_NAME_LIMIT, "waypoint lane id")
-            for l_id in s_lane_id
+            _format_id(waypoint.lane_id, _WAYPOINT_NAME_LIMIT, "waypoint lane id")
+            for waypoint in waypoints[i * n_points : (i + 1) * n_points]
         )
-        for s_lane_id in lane_id
-    )
-    lane_index = np.array(lane_index, dtype=np.int8)
-    lane_offset = np.array(lane_offset, dtype=np.float32)
-    lane_width = np.array(lane_width, dtype=np.float32)
-    pos = np.array(pos, dtype=np.float64)
-    speed_limit = np.array(speed_limit, dtype=np.float32)
+        + ("",) * (des_shp[1] - n_points)
+        for i in range(n_paths)
+    ) + tuple(("",) * des_shp[1] for _ in range(des_shp[0] - n_paths))
 
+    # The buffers are zeroed so only the received waypoints need to be written.
+    shp = (n_paths, n_points)
     # fmt: off
-    heading = np.pad(heading, ((0,pad_shp[0]),(0,pad_shp[1])), mode='constant', constant_values=0)
-    lane_id = tuple(l + ("",) * pad_shp[1] for l in lane_id) + tuple(("", ) * des_shp[1] for _ in range(pad_shp[0]))
-    lane_index = np.pad(lane_index, ((0,pad_shp[0]),(0,pad_shp[1])), mode='constant', constant_values=0)
-    lane_offset = np.pad(lane_offset, ((0,pad_shp[0]),(0,pad_shp[1])), mode='constant', constant_values=0)
-    lane_width = np.pad(lane_width, ((0,pad_shp[0]),(0,pad_shp[1])), mode='constant', constant_values=0)
-    pos = np.pad(pos, ((0,pad_shp[0]),(0,pad_shp[1]),(0,1)), mode='constant', constant_values=0)
-    speed_limit = np.pad(speed_limit, ((0,pad_shp[0]),(0,pad_shp[1])), mode='constant', constant_values=0)
+    out["heading"][:n_paths, :n_points] = np.reshape([w.heading for w in waypoints], shp)
+    out["lane_index"][:n_paths, :n_points] = np.reshape([w.lane_index for w in waypoints], shp)
+    out["lane_offset"][:n_paths, :n_points] = np.reshape([w.lane_offset for w in waypoints], shp)
+    out["lane_width"][:n_paths, :n_points] = np.reshape([w.lane_width for w in waypoints], shp)
+    out["position"][:n_paths, :n_points, :2] = np.reshape([w.pos for w in waypoints], shp + (2,))
+    out["speed_limit"][:n_paths, :n_points] = np.reshape([w.speed_limit for w in waypoints], shp)
     # fmt: on
 
     return {
-        "heading": heading,
+        "heading": out["heading"],
         "lane_id": lane_id,
-        "lane_index": lane_index,
-        "lane_offset": lane_offset,
-        "lane_width": lane_width,
-        "position": pos,
-        "speed_limit": speed_limit,
+        "lane_index": out["lane_index"],
+        "lane_offset": out["lane_offset"],
+        "lane_width": out["lane_width"],
+        "position": out["position"],
+        "speed_limit": out["speed_limit"],
     }
 
 
@@ -183,70 +165,41 @@ def _format_signals(signals: List[SignalObservation]):
 
 def _format_neighborhood_vehicle_states(
     neighborhood_vehicle_states: List[VehicleObservation],
+    out: Dict[str, np.ndarray],
 ):
     des_shp = _NEIGHBOR_SHP
+    neighborhood_vehicle_states = neighborhood_vehicle_states[:des_shp]
     rcv_shp = len(neighborhood_vehicle_states)
-    pad_shp = 0 if des_shp - rcv_shp < 0 else des_shp - rcv_shp
-
-    if rcv_shp == 0:
-        return {
-            "box": np.zeros((des_shp, 3), dtype=np.float32),
-            "heading": np.zeros((des_shp,), dtype=np.float32),
-            "id": [""] * des_shp,
-            "lane_index": np.zeros((des_shp,), dtype=np.int8),
-            "position": np.zeros((des_shp, 3), dtype=np.float64),
-            "speed": np.zeros((des_shp,), dtype=np.float32),
-            "interest": np.zeros((des_shp,), dtype=np.int8),
-        }
-
-    neighborhood_vehicle_states = [
-        (
-            nghb.bounding_box.as_lwh,
-            nghb.heading,
-            _format_id(nghb.id, _ID_NAME_LIMIT, "vehicle id"),
-            nghb.lane_index,
-            nghb.position,
-            nghb.speed,
-            nghb.interest,
-        )
-        for nghb in neighborhood_vehicle_states[:des_shp]
-    ]
-    box, heading, vehicle_id, lane_index, pos, speed, interest = zip(
-        *neighborhood_vehicle_states
-    )
-
-    box = np.array(box, dtype=np.float32)
-    heading = np.array(heading, dtype=np.float32)
-    lane_index = np.array(lane_index, dtype=np.int8)
-    pos = np.array(pos, dtype=np.float64)
-    speed = np.array(speed, dtype=np.float32)
-    interest = np.array(interest, dtype=np.int8)
 
-    # fmt: off
-    box = np.pad(box, ((0,pad_shp),(0,0)), mode='constant', constant_values=0)
-    heading = np.pad(heading, ((0,pad_shp)), mode='constant', constant_values=0)
-    vehicle_id = tuple(vehicle_id + ("",) * pad_shp)
-    lane_index = np.pad(lane_index, ((0,pad_shp)), mode='constant', constant_values=0)
-    pos = np.pad(pos, ((0,pad_shp),(0,0)), mode='constant', constant_values=0)
-    speed = np.pad(speed, ((0,pad_shp)), mode='constant', constant_values=0)
-    interest = np.pad(interest, ((0,pad_shp)), mode="constant", constant_values=False)
-    # fmt: on
+    vehicle_id = tuple(
+        _format_id(nghb.id, _ID_NAME_LIMIT, "vehicle id")
+        for nghb in neighborhood_vehicle_states
+    ) + ("",) * (des_shp - rcv_shp)
+
+    # The buffers are zeroed so only the received vehicles need to be written.
+    if rcv_shp > 0:
+        nghbs = neighborhood_vehicle_states
+        out["box"][:rcv_shp] = [nghb.bounding_box.as_lwh for nghb in nghbs]
+        out["heading"][:rcv_shp] = [nghb.heading for nghb in nghbs]
+        out["lane_index"][:rcv_shp] = [nghb.lane_index for nghb in nghbs]
+        out["position"][:rcv_shp] = [nghb.position for nghb in nghbs]
+        out["speed"][:rcv_shp] = [nghb.speed for nghb in nghbs]
+        out["interest"][:rcv_shp] = [nghb.interest for nghb in nghbs]
 
     return {
-        "box": box,
-        "heading": heading,
+        "box": out["box"],
+        "heading": out["heading"],
         "id": vehicle_id,
-        "lane_index": lane_index,
-        "position": pos,
-        "speed": speed,
-        "interest": interest,
+        "lane_index": out["lane_index"],
+        "position": out["position"],
+        "speed": out["speed"],
+        "interest": out["interest"],
     }
 
 
 def _format_lidar(
-    lidar_point_cloud: Optional[
-        Tuple[List[np.ndarray], List[bool], List[Tuple[np.ndarray, np.ndarray]]]
-    ]
+    lidar_point_cloud: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+    out: Dict[str, np.ndarray],
 ):
     # # MTA TODO: add lidar configuration like following:
     # sensor_params = self._agent_interface.lidar_point_cloud.sensor_params
@@ -255,35 +208,58 @@ def _format_lidar(
     #     / sensor_params.angle_resolution
     # )
     des_shp = _LIDAR_SHP
-    hit = np.array(lidar_point_cloud[1], dtype=np.int8)
-    point_cloud = np.array(lidar_point_cloud[0], dtype=np.float64)
-    point_cloud = np.nan_to_num(
-        point_cloud,
-        copy=False,
-        nan=np.float64(0),
-        posinf=np.float64(0),
-        neginf=np.float64(0),
-    )
-    ray_origin, ray_vector = zip(*(lidar_point_cloud[2]))
-    ray_origin = np.array(ray_origin, np.float64)
-    ray_vector = np.array(ray_vector, np.float64)
+    point_cloud, hit, rays = (np.asarray(part) for part in lidar_point_cloud)
 
     try:
         assert hit.shape == (des_shp,)
         assert point_cloud.shape == (des_shp, 3)
-        assert ray_origin.shape == (des_shp, 3)
-        assert ray_vector.shape == (des_shp, 3)
+        assert rays.shape == (des_shp, 2, 3)
     except Exception as exc:
         raise Exception("Internal Error: Mismatched lidar point cloud shape.") from exc
 
+    out["hit"][:] = hit
+    out["point_cloud"][:] = point_cloud
+    np.nan_to_num(
+        out["point_cloud"],
+        copy=False,
+        nan=np.float64(0),
+        posinf=np.float64(0),
+        neginf=np.float64(0),
+    )
+    out["ray_origin"][:] = rays[:, 0]
+    out["ray_vector"][:] = rays[:, 1]
+
+    return {
+        "hit": out["hit"],
+        "point_cloud": out["point_cloud"],
+        "ray_origin": out["ray_origin"],
+        "ray_vector": out["ray_vector"],
+    }
+
+
+def _allocate_buffers(space: gym.spaces.Dict, batch_size: Optional[int] = None):
+    """Allocates a zeroed array for each array valued subspace of the given space."""
+    batch_shp = () if batch_size is None else (batch_size,)
     return {
-        "hit": hit,
-        "point_cloud": point_cloud,
-        "ray_origin": ray_origin,
-        "ray_vector": ray_vector,
+        name: np.zeros(batch_shp + subspace.shape, dtype=subspace.dtype)
+        for name, subspace in space.spaces.items()
+        if isinstance(subspace, (gym.spaces.Box, gym.spaces.MultiBinary))
     }
 
 
+def _zero_value(space: gym.Space):
+    """Generates the zero valued instance of the given space."""
+    if isinstance(space, gym.spaces.Dict):
+        return {name: _zero_value(subspace) for name, subspace in space.spaces.items()}
+    if isinstance(space, gym.spaces.Tuple):
+        return tuple(_zero_value(subspace) for subspace in space.spaces)
+    if isinstance(space, gym.spaces.Text):
+        return ""
+    if isinstance(space, gym.spaces.Discrete):
+        return np.int64(space.start)
+    return np.zeros(space.shape, dtype=space.dtype)
+
+
 class BaseSpaceFormat:
     """Defines the base interface for an observation formatter."""
 
@@ -396,6 +372,71 @@ class StandardConfigurableSpaceFormat(BaseSpaceFormat):
         )
 
 
+class BufferedSpaceFormat(BaseSpaceFormat):
+    """A formatter that fills zeroed arrays in place instead of allocating new ones.
+    The arrays are supplied through :meth:`bind_buffers`, otherwise they are allocated
+    for every formatted observation."""
+
+    def __init__(
+        self,
+        formatting_func: Callable[[Observation, Dict[str, np.ndarray]], Dict[str, Any]],
+        active_func: Callable[[AgentInterface], bool],
+        name: str,
+        space_func: Callable[[AgentInterface], gym.spaces.Dict],
+        *,
+        _agent_interface: Optional[AgentInterface] = None,
+    ) -> None:
+        self._formatting_func = formatting_func
+        self._active_func = active_func
+        self._name = name
+        self._space_func = space_func
+        self._agent_interface = _agent_interface
+        self._buffers: Optional[Dict[str, np.ndarray]] = None
+
+    def format(self, obs: Observation):
+        """Selects and formats the given observation to get a value that matches the :attr:`space`."""
+        buffers = self._buffers
+        if buffers is None:
+            buffers = _allocate_buffers(self.space)
+        return self._formatting_func(obs, buffers)
+
+    def active(self, agent_interface: AgentInterface) -> bool:
+        """If this formatting is active and should be included in the output."""
+        return self._active_func(agent_interface)
+
+    def bind_buffers(self, buffers: Optional[Dict[str, np.ndarray]]):
+        """Sets the zeroed arrays that the next formatted observation is written to.
+
+        Args:
+            buffers (Optional[Dict[str, np.ndarray]]):
+                An array for each array valued subspace of :attr:`space`, or ``None`` to
+                allocate new arrays for each formatted observation.
+        """
+        self._buffers = buffers
+
+    @property
+    def name(self):
+        """The name that should represent this observation space in heirachy."""
+        return self._name
+
+    @cached_property
+    def space(self):
+        """The observation space this should format the smarts observation to match."""
+        assert (
+            self._agent_interface is not None
+        ), "Agent interface must be applied to call this method."
+        return self._space_func(self._agent_interface)
+
+    def __call__(self, agent_interface: AgentInterface) -> BaseSpaceFormat:
+        return type(self)(
+            self._formatting_func,
+            self._active_func,
+            self._name,
+            self._space_func,
+            _agent_interface=agent_interface,
+        )
+
+
 class StandardCompoundSpaceFormat(BaseSpaceFormat):
     """A compound formatter that defers agent interface configuration."""
 
@@ -428,6 +469,11 @@ class StandardCompoundSpaceFormat(BaseSpaceFormat):
     def space(self):
         return gym.spaces.Dict({s.name: s.space for s in self._spaces})
 
+    @property
+    def spaces(self) -> List[BaseSpaceFormat]:
+        """The active formatters that this formatter is composed of."""
+        return self._spaces
+
     def __call__(self, agent_interface: AgentInterface) -> BaseSpaceFormat:
         _spaces = [space(agent_interface) for space in self._space_generators]
         return type(self)(
@@ -667,8 +713,8 @@ class DrivableAreaGridMapSpaceFormat(Image8BSpaceFormat):
         return "drivable_area_grid_map"
 
 
-lidar_point_cloud_space_format = StandardConfigurableSpaceFormat(
-    lambda obs: _format_lidar(obs.lidar_point_cloud),
+lidar_point_cloud_space_format = BufferedSpaceFormat(
+    lambda obs, out: _format_lidar(obs.lidar_point_cloud, out),
     lambda agent_interface: bool(agent_interface.lidar_point_cloud),
     "lidar_point_cloud",
     # MTA TODO: add lidar configuration
@@ -689,11 +735,13 @@ lidar_point_cloud_space_format = StandardConfigurableSpaceFormat(
 )
 
 
-neighborhood_vehicle_states_space_format = StandardSpaceFormat(
-    lambda obs: _format_neighborhood_vehicle_states(obs.neighborhood_vehicle_states),
+neighborhood_vehicle_states_space_format = BufferedSpaceFormat(
+    lambda obs, out: _format_neighborhood_vehicle_states(
+        obs.neighborhood_vehicle_states, out
+    ),
     lambda agent_interface: bool(agent_interface.neighborhood_vehicle_states),
     "neighborhood_vehicle_states",
-    gym.spaces.Dict(
+    lambda _: gym.spaces.Dict(
         {
             "box": gym.spaces.Box(
                 low=0, high=1e10, shape=(_NEIGHBOR_SHP, 3), dtype=np.float32
@@ -754,11 +802,11 @@ class TopDownRGBSpaceFormat(Image8BSpaceFormat):
         return "top_down_rgb"
 
 
-waypoint_paths_space_format = StandardSpaceFormat(
-    lambda obs: _format_waypoint_paths(obs.waypoint_paths),
+waypoint_paths_space_format = BufferedSpaceFormat(
+    lambda obs, out: _format_waypoint_paths(obs.waypoint_paths, out),
     lambda agent_interface: bool(agent_interface.waypoint_paths),
     "waypoint_paths",
-    gym.spaces.Dict(
+    lambda _: gym.spaces.Dict(
         {
             "heading": gym.spaces.Box(
                 low=-math.pi, high=math.pi, shape=_WAYPOINT_SHP, dtype=np.float32
@@ -1083,24 +1131,64 @@ class ObservationSpacesFormatter:
 
         })
 
+    The array values of `lidar_point_cloud`, `neighborhood_vehicle_states`, and
+    `waypoint_paths` are views into one batch-major array per key, see
+    :attr:`stacked_observations`. Each call to :meth:`format` fills new arrays unless
+    `reuse_buffers` is set, in which case the same arrays are zeroed and overwritten on
+    every call and must be copied if they are kept past the next call.
+
+    Agents missing from the observations are padded with zero values when using
+    :attr:`ObservationOptions.full`.
     """
 
     def __init__(
         self,
         agent_interfaces: Dict[str, AgentInterface],
         observation_options: ObservationOptions,
+        reuse_buffers: bool = False,
     ) -> None:
         self._space_formats = {
             agent_id: observation_space_format(agent_interface)
             for agent_id, agent_interface in agent_interfaces.items()
         }
         self.observation_options = observation_options
+        self._reuse_buffers = reuse_buffers
+        self._agent_ids = list(self._space_formats.keys())
+
+        # The buffered formatters of each agent grouped by observation name.
+        self._buffered_formats: Dict[str, Dict[str, BufferedSpaceFormat]] = {}
+        for agent_id, space_format in self._space_formats.items():
+            for sub_format in space_format.spaces:
+                if isinstance(sub_format, BufferedSpaceFormat):
+                    self._buffered_formats.setdefault(sub_format.name, {})[
+                        agent_id
+                    ] = sub_format
+        self._stacked_observations: Optional[Dict[str, Dict[str, np.ndarray]]] = None
         super().__init__()
 
+    def _prepare_buffers(self):
+        if self._reuse_buffers and self._stacked_observations is not None:
+            for buffers in self._stacked_observations.values():
+                for array in buffers.values():
+                    array.fill(0)
+            return
+
+        self._stacked_observations = {}
+        for name, formats in self._buffered_formats.items():
+            space = next(iter(formats.values())).space
+            stacked = _allocate_buffers(space, batch_size=len(self._agent_ids))
+            for i, agent_id in enumerate(self._agent_ids):
+                if agent_id in formats:
+                    formats[agent_id].bind_buffers(
+                        {key: array[i] for key, array in stacked.items()}
+                    )
+            self._stacked_observations[name] = stacked
+
     def format(self, observations: Dict[str, Observation]):
         """Formats smarts observations fixed sized containers."""
         if self.observation_options == ObservationOptions.unformatted:
             return observations
+        self._prepare_buffers()
         # TODO MTA: Parallelize the conversion if possible
         active_obs = {
             agent_id: self._space_formats[agent_id].format(obs)
@@ -1110,7 +1198,7 @@ class ObservationSpacesFormatter:
         if self.observation_options == ObservationOptions.full:
             missing_ids = set(self._space_formats.keys()) - set(active_obs.keys())
             padded_obs = {
-                agent_id: space_format.space.sample()
+                agent_id: _zero_value(space_format.space)
                 for agent_id, space_format in self._space_formats.items()
                 if agent_id in missing_ids
             }
@@ -1119,6 +1207,19 @@ class ObservationSpacesFormatter:
             out_obs.update(padded_obs)
         return out_obs
 
+    @property
+    def agent_ids(self) -> List[str]:
+        """The agent order of the rows of :attr:`stacked_observations`."""
+        return self._agent_ids
+
+    @property
+    def stacked_observations(self) -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+        """The array values of the last formatted observations stacked in batch-major
+        order, e.g. `stacked_observations["lidar_point_cloud"]["hit"][i]` belongs to
+        `agent_ids[i]`. Rows of agents that were not formatted are zero. This is `None`
+        until observations have been formatted."""
+        return self._stacked_observations
+
     @cached_property
     def space(self):
         """The observation space this should format the smarts observations to match."""
@@ -21,14 +21,17 @@
 # THE SOFTWARE.
 
 import multiprocessing as mp
+import numbers
 import sys
 import traceback
 import warnings
 from enum import Enum
-from typing import Any, Callable, Dict, Sequence, Tuple
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
 
 import cloudpickle
 import gym
+import numpy as np
 
 __all__ = ["ParallelEnv"]
 
@@ -44,6 +47,118 @@ class _Message(Enum):
     RESULT = 5
     CLOSE = 6
     EXCEPTION = 7
+    SHARED_MEMORY = 8
+
+
+class _SharedMemoryMarker(Enum):
+    WRITTEN = 1
+    """Stands in for an observation value that was written to shared memory."""
+
+
+def _array_subspaces(
+    space: gym.Space, path: Tuple = ()
+) -> Iterator[Tuple[Tuple, Tuple[int, ...], np.dtype]]:
+    """Generates the path, shape, and dtype of each array valued subspace."""
+    if isinstance(space, gym.spaces.Dict):
+        for key, subspace in space.spaces.items():
+            yield from _array_subspaces(subspace, path + (key,))
+    elif isinstance(space, gym.spaces.Tuple):
+        for index, subspace in enumerate(space.spaces):
+            yield from _array_subspaces(subspace, path + (index,))
+    elif isinstance(
+        space,
+        (
+            gym.spaces.Box,
+            gym.spaces.Discrete,
+            gym.spaces.MultiBinary,
+            gym.spaces.MultiDiscrete,
+        ),
+    ):
+        yield path, tuple(space.shape), np.dtype(space.dtype)
+
+
+class _SharedMemoryObservations:
+    """A single block of shared memory holding one batch-major array for each array
+    valued subspace of an observation space. Workers write their observation arrays
+    into their row and only send the remaining values through the pipe.
+
+    Args:
+        space (gym.Space): The observation space of a single environment.
+        num_envs (int): The number of rows in each array.
+        name (Optional[str]): The name of an existing block to attach to.
+    """
+
+    _ALIGNMENT = 8
+
+    def __init__(self, space: gym.Space, num_envs: int, name: Optional[str] = None):
+        layout = []
+        size = 0
+        for path, shape, dtype in _array_subspaces(space):
+            layout.append((path, (num_envs,) + shape, dtype, size))
+            nbytes = num_envs * int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            size += -(-nbytes // self._ALIGNMENT) * self._ALIGNMENT
+        if not layout:
+            raise ValueError(
+                f"Expected an observation space with array valued subspaces to share "
+                f"observations through shared memory, but got {space}."
+            )
+
+        self._owner = name is None
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=self._owner, size=max(size, 1)
+        )
+        self._arrays: Dict[Tuple, np.ndarray] = {
+            path: np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)
+            for path, shape, dtype, offset in layout
+        }
+
+    @property
+    def name(self) -> str:
+        """The name of the shared memory block."""
+        return self._shm.name
+
+    def write(self, index: int, value: Any, path: Tuple = ()) -> Any:
+        """Writes the array values of an observation into the given row.
+
+        Returns:
+            Any: The observation with each written value replaced by a marker.
+        """
+        if isinstance(value, dict):
+            return {k: self.write(index, v, path + (k,)) for k, v in value.items()}
+        if isinstance(value, tuple):
+            return tuple(self.write(index, v, path + (i,)) for i, v in enumerate(value))
+        array = self._arrays.get(path)
+        if (
+            array is not None
+            and isinstance(value, (np.ndarray, np.generic, numbers.Number))
+            and np.shape(value) == array.shape[1:]
+        ):
+            array[index] = value
+            return _SharedMemoryMarker.WRITTEN
+        return value
+
+    def read(self, index: int, value: Any, copy: bool, path: Tuple = ()) -> Any:
+        """Restores the written values of an observation from the given row."""
+        if value is _SharedMemoryMarker.WRITTEN:
+            array = self._arrays[path][index]
+            return array.copy() if copy else array
+        if isinstance(value, dict):
+            return {k: self.read(index, v, copy, path + (k,)) for k, v in value.items()}
+        if isinstance(value, tuple):
+            return tuple(
+                self.read(index, v, copy, path + (i,)) for i, v in enumerate(value)
+            )
+        return value
+
+    def close(self):
+        """Release the shared memory block and unlink it if it was created here."""
+        if self._shm is None:
+            return
+        self._arrays.clear()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
 
 
 class ParallelEnv(object):
@@ -61,6 +176,8 @@ class ParallelEnv(object):
         env_constructors: Sequence[EnvConstructor],
         auto_reset: bool,
         seed: int = 42,
+        shared_memory: bool = False,
+        copy: bool = True,
     ):
         """The environments can be different but must use the same action and
         observation spaces.
@@ -69,10 +186,18 @@ class ParallelEnv(object):
             env_constructors (Sequence[EnvConstructor]): List of callables that create environments.
             auto_reset (bool): Automatically resets an environment when episode ends.
             seed (int, optional): Seed for the first environment. Defaults to 42.
+            shared_memory (bool, optional): If `True`, the environments write the
+                array values of their observations into shared memory laid out from
+                the observation space instead of sending them through their pipe.
+                Defaults to False.
+            copy (bool, optional): If `True` and using shared memory, observations
+                hold copies of the shared arrays. Otherwise they are views that are
+                overwritten by the next `reset` or `step`. Defaults to True.
 
         Raises:
             TypeError: If any environment constructor is not callable.
-            ValueError: If the action or observation spaces do not match.
+            ValueError: If the action or observation spaces do not match, or if
+                `shared_memory` is used with an observation space without arrays.
         """
 
         if len(env_constructors) > mp.cpu_count():
@@ -92,6 +217,8 @@ class ParallelEnv(object):
         self._num_envs = len(env_constructors)
         self._polling_period = 0.1
         self._closed = False
+        self._copy = copy
+        self._shared_memory: Optional[_SharedMemoryObservations] = None
 
         # Fork is not a thread safe method.
         forkserver_available = "forkserver" in mp.get_all_start_methods()
@@ -124,6 +251,8 @@ class ParallelEnv(object):
         self._wait_start()
         self.seed(seed)
         self._single_observation_space, self._single_action_space = self._get_spaces()
+        if shared_memory:
+            self._setup_shared_memory()
 
     @property
     def batch_size(self) -> int:
@@ -187,6 +316,30 @@ class ParallelEnv(object):
 
         return observation_space, action_space
 
+    def _setup_shared_memory(self):
+        try:
+            self._shared_memory = _SharedMemoryObservations(
+                self._single_observation_space, self._num_envs
+            )
+        except ValueError:
+            self.close()
+            raise
+        self._call(
+            _Message.SHARED_MEMORY,
+            [
+                (self._shared_memory.name, self._num_envs, index)
+                for index in range(self._num_envs)
+            ],
+        )
+
+    def _read_observations(self, observations: Sequence[Any]) -> Sequence[Any]:
+        if self._shared_memory is None:
+            return observations
+        return [
+            self._shared_memory.read(index, observation, self._copy)
+            for index, observation in enumerate(observations)
+        ]
+
     def seed(self, seed: int) -> Sequence[int]:
         """Sets unique seed for each environment.
 
@@ -209,7 +362,7 @@ class ParallelEnv(object):
         """
 
         observations = self._call(_Message.RESET, [None] * self._num_envs)
-        return observations
+        return self._read_observations(observations)
 
     def step(
         self, actions: Sequence[Dict[str, Any]]
@@ -230,7 +383,7 @@ class ParallelEnv(object):
         """
         result = self._call(_Message.STEP, actions)
         observations, rewards, dones, infos = zip(*result)
-        return (observations, rewards, dones, infos)
+        return (self._read_observations(observations), rewards, dones, infos)
 
     def close(self, terminate=False):
         """Sends a close message to all external processes.
@@ -257,6 +410,9 @@ class ParallelEnv(object):
             if process.is_alive():
                 process.join()
 
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory = None
         self._closed = True
 
     def __del__(self):
@@ -285,6 +441,13 @@ def _worker(
     """
     env = cloudpickle.loads(env_constructor)()
     pipe.send((_Message.RESULT, None))
+    shared_observations: Optional[_SharedMemoryObservations] = None
+    index = 0
+
+    def share(observation):
+        if shared_observations is None:
+            return observation
+        return shared_observations.write(index, observation)
 
     try:
         while True:
@@ -297,16 +460,22 @@ def _worker(
             elif message == _Message.ACCESS:
                 result = getattr(env, payload, None)
                 pipe.send((_Message.RESULT, result))
+            elif message == _Message.SHARED_MEMORY:
+                name, num_envs, index = payload
+                shared_observations = _SharedMemoryObservations(
+                    env.observation_space, num_envs, name=name
+                )
+                pipe.send((_Message.RESULT, None))
             elif message == _Message.RESET:
                 observation = env.reset()
-                pipe.send((_Message.RESULT, observation))
+                pipe.send((_Message.RESULT, share(observation)))
             elif message == _Message.STEP:
                 observation, reward, done, info = env.step(payload)
                 if done["__all__"] and auto_reset:
                     # Final observation can be obtained from `info` as follows:
                     # `final_obs = info[agent_id]["env_obs"]`
                     observation = env.reset()
-                pipe.send((_Message.RESULT, (observation, reward, done, info)))
+                pipe.send((_Message.RESULT, (share(observation), reward, done, info)))
             elif message == _Message.CLOSE:
                 break
             else:
@@ -322,5 +491,7 @@ def _worker(
         payload = (mp.current_process().name, stacktrace)
         pipe.send((_Message.EXCEPTION, payload))
     finally:
+        if shared_observations is not None:
+            shared_observations.close()
         env.close()
         pipe.close()
@@ -27,20 +27,34 @@ import os
 import sqlite3
 import sys
 from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Callable, Deque, Dict, Generator, Iterable, Optional
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import numpy as np
+from scipy.signal import lfilter, lfiltic
 
+from smarts.core.columnar_traffic_history import ColumnarTrafficHistoryBackend
 from smarts.core.coordinates import BoundingBox, Point
 from smarts.core.signal_provider import SignalLightState
+from smarts.core.traffic_history import SqliteTrafficHistoryBackend, TrafficHistory
 from smarts.core.utils.file import read_tfrecord_file
-from smarts.core.utils.math import (
-    circular_mean,
-    constrain_angle,
-    min_angles_difference_signed,
-    vec_to_radians,
-)
+from smarts.core.utils.math import constrain_angle
 from smarts.sstudio import types
 from smarts.waymo.waymo_open_dataset.protos import scenario_pb2
 from smarts.waymo.waymo_open_dataset.protos.map_pb2 import TrafficSignalLaneState
@@ -48,6 +62,185 @@ from smarts.waymo.waymo_utils import WaymoDatasetError
 
 METERS_PER_FOOT = 0.3048
 DEFAULT_LANE_WIDTH = 3.7  # a typical US highway lane is 12ft ~= 3.7m wide
+_INSERT_BATCH_SIZE = 50000
+_PROCESS_BATCH_ROWS = 20000
+
+Row = Dict[str, Any]
+
+
+def _smooth_positions(
+    positions: np.ndarray, window_before: int, window_after: int
+) -> np.ndarray:
+    """Smooth the positions of a trajectory with a moving average. Each position is
+    averaged with the already smoothed positions before it and the original positions
+    after it. Windows that run past the ends of the trajectory repeat the first
+    smoothed or last original position.
+
+    Args:
+        positions (np.ndarray): The `(n, 2)` positions of the trajectory.
+        window_before (int): The number of smoothed positions before each position.
+        window_after (int): The number of positions after each position.
+    """
+    n = len(positions)
+    width = 1 + window_before + window_after
+    after_indices = np.minimum(
+        np.arange(n)[:, np.newaxis] + np.arange(1, window_after + 1), n - 1
+    )
+    inputs = positions + positions[after_indices].sum(axis=1)
+
+    smoothed = np.empty_like(positions, dtype=np.float64)
+    if n == 0:
+        return smoothed
+    smoothed[0] = (inputs[0] + window_before * positions[0]) / width
+    # Until the window before is full it is padded with the first smoothed position
+    for i in range(1, min(n, window_before)):
+        smoothed[i] = (
+            inputs[i]
+            + smoothed[i - 1 :: -1].sum(axis=0)
+            + (window_before - i) * smoothed[0]
+        ) / width
+    if n > window_before:
+        # Afterwards this is a recursive (IIR) filter over the smoothed positions
+        b, a = [1 / width], [1] + [-1 / width] * window_before
+        for axis in range(positions.shape[1]):
+            zi = lfiltic(b, a, smoothed[window_before - 1 :: -1, axis])
+            smoothed[window_before:, axis], _ = lfilter(
+                b, a, inputs[window_before:, axis], zi=zi
+            )
+    return smoothed
+
+
+def _cal_speeds(positions: np.ndarray, dt: float) -> np.ndarray:
+    """The speed of each position of a trajectory towards the next position, `nan` for
+    the last position and positions next to a `nan` position."""
+    speeds = np.full(len(positions), np.nan)
+    speeds[:-1] = np.linalg.norm(np.diff(positions, axis=0), axis=1) / dt
+    return speeds
+
+
+class _HeadingInference(NamedTuple):
+    """Parameters of :func:`_infer_headings`."""
+
+    window_before: int
+    window_after: int
+    dt: float
+    min_speed: Optional[float]
+    max_angular_velocity: Optional[float]
+
+
+def _infer_headings(
+    positions: np.ndarray, speeds: np.ndarray, params: _HeadingInference
+) -> np.ndarray:
+    """Infer the heading of each position of a trajectory from the circular mean of the
+    directions between the positions in a window around it.
+
+    Directions between positions that are `nan`, identical or slower than the minimum
+    speed are replaced by the last usable direction in the window. A direction may turn
+    at most the maximum angular velocity away from the last usable direction in the
+    window.
+
+    Returns:
+        np.ndarray:
+            The headings with +y = 0 rad, not normalized. Positions without a usable
+            direction in their window repeat the heading before them or are `nan` at the
+            start of the trajectory.
+    """
+    n = len(positions)
+    headings = np.full(n, np.nan)
+    if n < 2:
+        return headings
+
+    deltas = np.diff(positions, axis=0)
+    distances = np.linalg.norm(deltas, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        directions = deltas / distances[:, np.newaxis]
+        usable = ~np.isnan(deltas).any(axis=1) & (distances != 0.0)
+        if params.min_speed is not None:
+            usable &= (distances / params.dt >= params.min_speed) & ~(
+                speeds[:-1] < params.min_speed
+            )
+    # +y = 0 rad
+    direction_headings = np.mod(
+        np.arctan2(directions[:, 1], directions[:, 0]) - 0.5 * np.pi, 2 * np.pi
+    )
+
+    # Walk the windows of all positions at once, one direction offset at a time.
+    rows = np.arange(n)
+    found = np.zeros(n, dtype=bool)
+    prev_direction = np.zeros((n, 2))
+    prev_heading = np.zeros(n)
+    direction_sum = np.zeros((n, 2))
+    for offset in range(-params.window_before, params.window_after):
+        segments = rows + offset
+        in_window = (segments >= 0) & (segments < n - 1)
+        segments = np.clip(segments, 0, n - 2)
+        is_usable = in_window & usable[segments]
+
+        repeated = in_window & ~is_usable & found
+        direction_sum[repeated] += prev_direction[repeated]
+
+        direction = directions[segments]
+        heading = direction_headings[segments]
+        if params.max_angular_velocity:
+            angular_velocity = (
+                np.mod(heading - prev_heading + np.pi, 2 * np.pi) - np.pi
+            ) / params.dt
+            limited = (
+                is_usable
+                & found
+                & (np.abs(angular_velocity) > params.max_angular_velocity)
+            )
+            # The limited heading is rotated a quarter turn as it has always been.
+            heading = np.where(
+                limited,
+                prev_heading
+                + np.sign(angular_velocity) * params.max_angular_velocity * params.dt
+                + 0.5 * np.pi,
+                heading,
+            )
+            direction = np.where(
+                limited[:, np.newaxis],
+                np.stack((np.cos(heading), np.sin(heading)), axis=1),
+                direction,
+            )
+
+        direction_sum[is_usable] += direction[is_usable]
+        prev_direction[is_usable] = direction[is_usable]
+        prev_heading[is_usable] = heading[is_usable]
+        found |= is_usable
+
+    headings[found] = (
+        np.arctan2(direction_sum[found, 1], direction_sum[found, 0]) - 0.5 * np.pi
+    )
+    last_found = np.maximum.accumulate(np.where(found, rows, -1))
+    return np.where(last_found >= 0, headings[np.maximum(last_found, 0)], np.nan)
+
+
+def _interaction_trajectory(
+    positions: np.ndarray, velocities: np.ndarray, params: _HeadingInference
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The speeds and headings of an INTERACTION trajectory."""
+    # Speeds are calculated from positions (instead of vx, vy) since the dataset speeds
+    # are "instantaneous" and so don't match with dPos/dt, which can affect some models.
+    speeds = _cal_speeds(positions, params.dt)
+    unknown = np.isnan(speeds)
+    speeds[unknown] = np.linalg.norm(velocities[unknown], axis=1)
+    return speeds, _infer_headings(positions, speeds, params)
+
+
+def _ngsim_trajectory(
+    positions: np.ndarray, speeds: np.ndarray, params: _HeadingInference
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The smoothed positions and headings of an NGSIM trajectory."""
+    # TAI: make this window size a parameter too?
+    positions = _smooth_positions(positions, 7, 7)
+    return positions, _infer_headings(positions, speeds, params)
+
+
+def _transform_trajectories(
+    transform_fn: Callable[..., Any], trajectories: Sequence[Tuple]
+) -> List[Any]:
+    return [transform_fn(*args) for args in trajectories]
 
 
 class _TrajectoryDataset:
@@ -63,74 +256,78 @@ class _TrajectoryDataset:
         self._swap_xy = dataset_spec.get("swap_xy", False)
         # most trajectory datasets have .1s time delta (i.e., were collected at 10 Hz)
         self._dt_sec = 0.1
+        workers = dataset_spec.get("import_workers")
+        self._workers = (os.cpu_count() or 1) if workers is None else workers
 
-    class _WindowedReader:
-        """Iterates over the rows in file using a sliding window that keeps track of
-        both a number of rows before the current row and a number of rows after.
-        These "windows" are passed to a row transformation function on each step.
-        For example, if window_before = 4 and window_after = 3, for a 9-row
-        file, the windows associated with each row are:
-            row 1, before = [], after = [2, 3, 4]
-            row 2, before = [1], after = [3, 4, 5]
-            row 3, before = [2, 1], after = [4, 5, 6]
-            row 4, before = [3, 2, 1], after = [5, 6, 7]
-            row 5, before = [4, 3, 2, 1], after = [6, 7, 8]
-            row 6, before = [5, 4, 3, 2], after = [7, 8, 9]
-            row 7, before = [6, 5, 4, 3], after = [8, 9]
-            row 8, before = [7, 6, 5, 4], after = [9]
-            row 9, before = [8, 7, 6, 5], after = []
-        Windows are cleared whenever the value in the (optional) `group_col` column changes.
-        This was designed to be nestable by making the `row_gen` parameter support an iterator over another _WindowedReader.
+    def _process_trajectories(
+        self,
+        rows: Iterable[Row],
+        transform_fn: Callable[..., Any],
+        inputs_fn: Callable[[List[Row]], Tuple],
+    ) -> Generator[Tuple[List[Row], Any], None, None]:
+        """Groups the rows by vehicle and applies `transform_fn` to the inputs that
+        `inputs_fn` extracts from the rows of each vehicle's trajectory. Trajectories
+        are transformed in batches by a pool of `import_workers` processes and are
+        yielded in input order together with their result.
         """
-
-        Row = Dict[str, Any]
-
-        def __init__(
-            self,
-            row_gen: Iterable[Row],
-            transform_fn: Callable[[Row, Deque[Row], Deque[Row]], None],
-            window_before: int = 0,
-            window_after: int = 0,
-            group_col: Optional[str] = None,
-        ):
-            self._row_gen = row_gen
-            self._transform_fn = transform_fn
-            self._before_width = window_before
-            self._after_width = window_after
-            self._group_col = group_col
-
-        def __iter__(self) -> Generator[Row, None, None]:
-            after_win = deque(maxlen=self._after_width)
-            before_win = deque(maxlen=self._before_width)
-            cur_row = None
-            prev_group = None
-            for row in self._row_gen:
-                if self._group_col and row[self._group_col] != prev_group:
-                    while after_win:
-                        if cur_row:
-                            before_win.appendleft(cur_row)
-                        cur_row = after_win.popleft()
-                        self._transform_fn(cur_row, before_win, after_win)
-                        yield cur_row
-                    before_win.clear()
-                    cur_row = None
-                if self._group_col:
-                    prev_group = row[self._group_col]
-                if len(after_win) < self._after_width:
-                    after_win.append(row)
+        # XXX: assumes all timesteps for a vehicle are grouped together in the file and are in sorted temporal order
+        trajectories = (
+            list(trajectory)
+            for _, trajectory in groupby(rows, key=itemgetter("vehicle_id"))
+        )
+        if not self._workers:
+            for trajectory in trajectories:
+                yield trajectory, transform_fn(*inputs_fn(trajectory))
+            return
+
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            pending: Deque[Tuple[List[List[Row]], Future]] = deque()
+            batch, batch_rows = [], 0
+
+            def submit():
+                inputs = [inputs_fn(trajectory) for trajectory in batch]
+                future = executor.submit(_transform_trajectories, transform_fn, inputs)
+                pending.append((batch, future))
+
+            for trajectory in trajectories:
+                batch.append(trajectory)
+                batch_rows += len(trajectory)
+                if batch_rows < _PROCESS_BATCH_ROWS:
                     continue
-                if cur_row:
-                    before_win.appendleft(cur_row)
-                cur_row = after_win.popleft() if after_win else row
-                after_win.append(row)
-                self._transform_fn(cur_row, before_win, after_win)
-                yield cur_row
-            while after_win:
-                if cur_row:
-                    before_win.appendleft(cur_row)
-                cur_row = after_win.popleft()
-                self._transform_fn(cur_row, before_win, after_win)
-                yield cur_row
+                submit()
+                batch, batch_rows = [], 0
+                # Bound the number of rows held in memory
+                while len(pending) > 2 * self._workers:
+                    done_batch, future = pending.popleft()
+                    yield from zip(done_batch, future.result())
+            if batch:
+                submit()
+            while pending:
+                done_batch, future = pending.popleft()
+                yield from zip(done_batch, future.result())
+
+    def _fill_headings(
+        self, headings: np.ndarray, initial_heading: Callable[[], float]
+    ) -> np.ndarray:
+        """Fill the headings that could not be inferred at the start of a trajectory
+        with the last heading of the previous trajectory and normalize them."""
+        if np.isnan(headings[0]):
+            if self._prev_heading is None:
+                # TAI:  backfill from the first "real" heading (second pass)
+                self._prev_heading = initial_heading()
+            headings[np.isnan(headings)] = self._prev_heading
+        self._prev_heading = headings[-1]
+        return np.mod(headings, 2 * np.pi)
+
+    def _heading_inference(self) -> _HeadingInference:
+        heading_window = self._dataset_spec.get("heading_inference_window", 2)
+        return _HeadingInference(
+            window_before=int((heading_window / 2) + (heading_window % 2) - 1),
+            window_after=int(heading_window / 2),
+            dt=self._dt_sec,
+            min_speed=self._heading_min_speed,
+            max_angular_velocity=self._max_angular_velocity,
+        )
 
     @property
     def scale(self) -> float:
@@ -227,6 +424,9 @@ class _TrajectoryDataset:
                 (3 is millisecond precision)
         """
         dbconxn = sqlite3.connect(self._output)
+        # The output is written from scratch so there is nothing to recover on failure
+        dbconxn.execute("PRAGMA synchronous = OFF")
+        dbconxn.execute("PRAGMA journal_mode = MEMORY")
 
         self._log.debug("creating tables...")
         self._create_tables(dbconxn)
@@ -239,22 +439,26 @@ class _TrajectoryDataset:
         dbconxn.commit()
         iscur.close()
 
-        # TAI:  can use executemany() and batch insert rows together if this turns out to be too slow...
         insert_vehicle_sql = "INSERT INTO Vehicle VALUES (?, ?, ?, ?, ?, ?)"
         insert_traj_sql = "INSERT INTO Trajectory VALUES (?, ?, ?, ?, ?, ?, ?)"
         insert_traffic_light_sql = (
             "INSERT INTO TrafficLightState VALUES (?, ?, ?, ?, ?)"
         )
         vehicle_ids = set()
+        vehicle_rows, traj_rows = [], []
         itcur = dbconxn.cursor()
 
+        def insert_rows():
+            itcur.executemany(insert_vehicle_sql, vehicle_rows)
+            itcur.executemany(insert_traj_sql, traj_rows)
+            vehicle_rows.clear()
+            traj_rows.clear()
+
         x_offset = self._dataset_spec.get("x_offset", 0.0)
         y_offset = self._dataset_spec.get("y_offset", 0.0)
         for row in self.rows:
             vid = int(self.column_val_in_row(row, "vehicle_id"))
             if vid not in vehicle_ids:
-                ivcur = dbconxn.cursor()
-
                 # These are not available in all datasets
                 height = self.column_val_in_row(row, "height")
                 is_ego = self.column_val_in_row(row, "is_ego_vehicle")
@@ -267,9 +471,7 @@ class _TrajectoryDataset:
                     float(height) * self.scale if height else None,
                     int(is_ego) if is_ego else 0,
                 )
-                ivcur.execute(insert_vehicle_sql, veh_args)
-                ivcur.close()
-                dbconxn.commit()
+                vehicle_rows.append(veh_args)
                 vehicle_ids.add(vid)
             traj_args = (
                 vid,
@@ -288,12 +490,15 @@ class _TrajectoryDataset:
             )
             # Ignore datapoints with NaNs
             if not any(a is not None and np.isnan(a) for a in traj_args):
-                itcur.execute(insert_traj_sql, traj_args)
+                traj_rows.append(traj_args)
+                if len(traj_rows) >= _INSERT_BATCH_SIZE:
+                    insert_rows()
+        insert_rows()
 
         # Insert traffic light states if available
         try:
-            for row in self.traffic_light_rows:
-                tls_args = (
+            tls_rows = (
+                (
                     round(
                         float(self.column_val_in_row(row, "sim_time")) / 1000,
                         time_precision,
@@ -305,7 +510,9 @@ class _TrajectoryDataset:
                     * self.scale,
                     float(self.column_val_in_row(row, "lane")),
                 )
-                itcur.execute(insert_traffic_light_sql, tls_args)
+                for row in self.traffic_light_rows
+            )
+            itcur.executemany(insert_traffic_light_sql, tls_rows)
         except NotImplementedError:
             pass
 
@@ -323,8 +530,6 @@ class _TrajectoryDataset:
 
         self._log.debug("creating indices..")
         icur = dbconxn.cursor()
-        icur.execute("CREATE INDEX Trajectory_Time ON Trajectory (sim_time)")
-        icur.execute("CREATE INDEX Trajectory_Vehicle ON Trajectory (vehicle_id)")
         icur.execute("CREATE INDEX Vehicle_Type ON Vehicle (type)")
         icur.execute(
             "CREATE INDEX TrafficLightState_SimTime ON TrafficLightState (sim_time)"
@@ -332,7 +537,20 @@ class _TrajectoryDataset:
         dbconxn.commit()
         icur.close()
 
+        # The trajectory indices and the vehicle summary are added by the upgrade to
+        # the current schema version.
+        self._log.debug("summarizing vehicles..")
+        TrafficHistory.upgrade_schema(dbconxn)
+
         dbconxn.close()
+
+        if self._dataset_spec.get("columnar_store"):
+            self._log.debug("writing columnar store..")
+            columnar_output = f"{self._output}.columnar"
+            ColumnarTrafficHistoryBackend.write(
+                SqliteTrafficHistoryBackend(self._output), columnar_output
+            )
+            os.replace(columnar_output, self._output)
         self._log.debug("output done")
 
 
@@ -344,8 +562,8 @@ class Interaction(_TrajectoryDataset):
         assert not self._flip_y
         self._max_angular_velocity = dataset_spec.get("max_angular_velocity", None)
         self._heading_min_speed = dataset_spec.get("heading_inference_min_speed", 2.2)
+        self._default_heading = dataset_spec.get("default_heading", 3.0 * math.pi / 2.0)
         self._prev_heading = None
-        self._next_row = None
 
     def check_dataset_spec(self, dataset_spec: Dict[str, Any]):
         super().check_dataset_spec(dataset_spec)
@@ -367,7 +585,7 @@ class Interaction(_TrajectoryDataset):
         self._log.warning(f"unknown agent_type:  {agent_type}.")
         return 0
 
-    def _row_gen(self) -> Generator[_TrajectoryDataset._WindowedReader.Row, None, None]:
+    def _row_gen(self) -> Generator[Row, None, None]:
         x_margin = self._dataset_spec.get("x_margin_px", 0) / self.scale
         y_margin = self._dataset_spec.get("y_margin_px", 0) / self.scale
         with open(self._path, newline="") as csvfile:
@@ -402,125 +620,39 @@ class Interaction(_TrajectoryDataset):
 
                 yield row
 
-    def _cal_speed(
-        self,
-        row: _TrajectoryDataset._WindowedReader.Row,
-        before_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-        after_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-    ):
-        row["speed"] = np.linalg.norm((row["vx"], row["vy"]))
-        if after_win:
-            c = np.array((row["position_x"], row["position_y"]))
-            n = np.array((after_win[0]["position_x"], after_win[0]["position_y"]))
-            if not any(np.isnan(c)) and not any(np.isnan(n)):
-                # XXX: could try to divide by sim_time delta here instead of assuming it's fixed
-                row["speed"] = np.linalg.norm(n - c) / self._dt_sec
-
-    def _infer_heading(
-        self,
-        row: _TrajectoryDataset._WindowedReader.Row,
-        before_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-        after_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-    ):
-        window = [np.array((r["position_x"], r["position_y"])) for r in before_win]
-        window.reverse()
-        window += [np.array((row["position_x"], row["position_y"]))]
-        window += [np.array((r["position_x"], r["position_y"])) for r in after_win]
-        speeds = (
-            [r["speed"] for r in before_win]
-            + [row["speed"]]
-            + [r["speed"] for r in after_win]
-        )
-        vecs = []
-        prev_vhat = None
-        prev_inst_heading = None
-        for w in range(len(window) - 1):
-            c = window[w]
-            n = window[w + 1]
-            if any(np.isnan(c)) or any(np.isnan(n)):
-                if prev_vhat is not None:
-                    vecs.append(prev_vhat)
-                continue
-            s = np.linalg.norm(n - c)
-            if s == 0.0 or (
-                self._heading_min_speed is not None
-                and (
-                    (s / self._dt_sec) < self._heading_min_speed
-                    or speeds[w] < self._heading_min_speed
-                )
-            ):
-                if prev_vhat is not None:
-                    vecs.append(prev_vhat)
-                continue
-            vhat = (n - c) / s
-            inst_heading = vec_to_radians(vhat)
-            if prev_inst_heading is not None:
-                if self._max_angular_velocity:
-                    # XXX: could try to divide by sim_time delta here instead of assuming it's fixed
-                    angular_velocity = (
-                        min_angles_difference_signed(inst_heading, prev_inst_heading)
-                        / self._dt_sec
-                    )
-                    if abs(angular_velocity) > self._max_angular_velocity:
-                        inst_heading = (
-                            prev_inst_heading
-                            + np.sign(angular_velocity)
-                            * self._max_angular_velocity
-                            * self._dt_sec
-                        )
-                        inst_heading += 0.5 * math.pi
-                        vhat = np.array(
-                            (math.cos(inst_heading), math.sin(inst_heading))
-                        )
-            vecs.append(vhat)
-            prev_vhat = vhat
-            prev_inst_heading = inst_heading
-        if vecs:
-            new_heading = circular_mean(vecs)
-        elif self._prev_heading is not None:
-            new_heading = self._prev_heading
-        elif "psi_rad" in row:
-            new_heading = float(row["psi_rad"]) - 0.5 * math.pi
-        else:
-            new_heading = self._default_heading
-        self._prev_heading = new_heading
-        row["heading_rad"] = new_heading % (2 * math.pi)
-
     @property
     def rows(self) -> Generator[Dict, None, None]:
         self._log.debug("transforming Interaction data...")
 
-        # first calculate speeds based on positions (instead of vx, vy)
-        # since dataset speeds are "instantaneous"and so don't match with dPos/dt, which can affect some models.
-        speeds_gen = _TrajectoryDataset._WindowedReader(
-            self._row_gen(), self._cal_speed, 0, 1, "vehicle_id"
-        )
-
-        # now infer heading with rolling window...
-        heading_window = self._dataset_spec.get("heading_inference_window", 2)
-        heading_before_win = int((heading_window / 2) + (heading_window % 2) - 1)
-        heading_after_win = int(heading_window / 2)
-        headings_gen = _TrajectoryDataset._WindowedReader(
-            speeds_gen,
-            self._infer_heading,
-            heading_before_win,
-            heading_after_win,
-            "vehicle_id",
-        )
-
         map_bbox = self._dataset_spec.get("_map_bbox")
-
-        # note: iterating over outer generator iterates over all nested generators too...
-        # XXX: assumes all timesteps for a vehicle are grouped together in the file and are in sorted temporal order
-        for row in headings_gen:
-            if map_bbox and not map_bbox.contains(
-                Point(self.scale * row["position_x"], self.scale * row["position_y"])
-            ):
-                self._log.info(
-                    f"skipping row for vehicle {row['vehicle_id']} with position off of map"
-                )
-                continue
-            yield row
+        trajectories = self._process_trajectories(
+            self._row_gen(),
+            partial(_interaction_trajectory, params=self._heading_inference()),
+            lambda rows: (
+                np.array([(r["position_x"], r["position_y"]) for r in rows]),
+                np.array([(r["vx"], r["vy"]) for r in rows]),
+            ),
+        )
+        for rows, (speeds, headings) in trajectories:
+            headings = self._fill_headings(
+                headings,
+                lambda: float(rows[0]["psi_rad"]) - 0.5 * math.pi
+                if "psi_rad" in rows[0]
+                else self._default_heading,
+            )
+            for row, speed, heading in zip(rows, speeds.tolist(), headings.tolist()):
+                row["speed"] = speed
+                row["heading_rad"] = heading
+                if map_bbox and not map_bbox.contains(
+                    Point(
+                        self.scale * row["position_x"], self.scale * row["position_y"]
+                    )
+                ):
+                    self._log.info(
+                        f"skipping row for vehicle {row['vehicle_id']} with position off of map"
+                    )
+                    continue
+                yield row
 
     def column_val_in_row(self, row, col_name: str) -> Any:
         return row.get(col_name)
@@ -531,7 +663,6 @@ class NGSIM(_TrajectoryDataset):
 
     def __init__(self, dataset_spec: Dict[str, Any], output: str):
         super().__init__(dataset_spec, output)
-        # self._prev_heading = 3 * math.pi / 2
         self._prev_heading = None
         self._default_heading = dataset_spec.get("default_heading", 3.0 * math.pi / 2.0)
         self._max_angular_velocity = dataset_spec.get("max_angular_velocity", None)
@@ -585,123 +716,7 @@ class NGSIM(_TrajectoryDataset):
             self._columns
         ), f"unexpected number of columns/fields ({num_cols}) in {self._path}"
 
-    def _smooth_positions(
-        self,
-        row: _TrajectoryDataset._WindowedReader.Row,
-        before_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-        after_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-    ):
-        pos_width = 1 + before_win.maxlen + after_win.maxlen
-        sumwin = (
-            lambda d, key: sum(
-                d[r][key] if r < len(d) else d[-1][key] for r in range(d.maxlen)
-            )
-            if d
-            else row[key] * d.maxlen
-        )
-        row["position_x"] += sumwin(before_win, "position_x") + sumwin(
-            after_win, "position_x"
-        )
-        row["position_x"] /= pos_width
-        row["position_y"] += sumwin(before_win, "position_y") + sumwin(
-            after_win, "position_y"
-        )
-        row["position_y"] /= pos_width
-
-    def _infer_heading(
-        self,
-        row: _TrajectoryDataset._WindowedReader.Row,
-        before_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-        after_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-    ):
-        window = [np.array((r["position_x"], r["position_y"])) for r in before_win]
-        window.reverse()
-        window += [np.array((row["position_x"], row["position_y"]))]
-        window += [np.array((r["position_x"], r["position_y"])) for r in after_win]
-        speeds = (
-            [r["speed"] for r in before_win]
-            + [row["speed"]]
-            + [r["speed"] for r in after_win]
-        )
-        vecs = []
-        prev_vhat = None
-        prev_inst_heading = None
-        for w in range(len(window) - 1):
-            c = window[w]
-            n = window[w + 1]
-            if any(np.isnan(c)) or any(np.isnan(n)):
-                if prev_vhat is not None:
-                    vecs.append(prev_vhat)
-                continue
-            s = np.linalg.norm(n - c)
-            if s == 0.0 or (
-                self._heading_min_speed is not None
-                and (
-                    (s / self._dt_sec) < self._heading_min_speed
-                    or speeds[w] < self._heading_min_speed
-                )
-            ):
-                if prev_vhat is not None:
-                    vecs.append(prev_vhat)
-                continue
-            vhat = (n - c) / s
-            inst_heading = vec_to_radians(vhat)
-            if prev_inst_heading is not None:
-                if self._max_angular_velocity:
-                    # XXX: could try to divide by sim_time delta here instead of assuming it's fixed
-                    angular_velocity = (
-                        min_angles_difference_signed(inst_heading, prev_inst_heading)
-                        / self._dt_sec
-                    )
-                    if abs(angular_velocity) > self._max_angular_velocity:
-                        inst_heading = (
-                            prev_inst_heading
-                            + np.sign(angular_velocity)
-                            * self._max_angular_velocity
-                            * self._dt_sec
-                        )
-                        inst_heading += 0.5 * math.pi
-                        vhat = np.array(
-                            (math.cos(inst_heading), math.sin(inst_heading))
-                        )
-            vecs.append(vhat)
-            prev_vhat = vhat
-            prev_inst_heading = inst_heading
-        if vecs:
-            new_heading = circular_mean(vecs)
-        elif self._prev_heading is None:
-            # TAI:  backfill from the first "real" heading (second pass)
-            new_heading = self._default_heading
-        else:
-            new_heading = self._prev_heading
-        self._prev_heading = new_heading
-        row["heading_rad"] = new_heading % (2 * math.pi)
-
-        # now since SMARTS' positions are the vehicle centerpoints, but NGSIM's are at the front
-        # we must adjust the vehicle position to its centerpoint based on its inferred heading angle (+y = 0 rad)
-        adj_heading = row["heading_rad"] + 0.5 * math.pi
-        half_len = 0.5 * row["length"]
-        # XXX: need to use a different key heree since changing position_x or position_y would probably
-        # XXX: affect a row that's still in the before window of a nested generator (smooth_positions).
-        row["adj_position_x"] = row["position_x"] - half_len * np.cos(adj_heading)
-        row["adj_position_y"] = row["position_y"] - half_len * np.sin(adj_heading)
-
-    def _cal_speed(
-        self,
-        row: _TrajectoryDataset._WindowedReader.Row,
-        before_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-        after_win: Deque[_TrajectoryDataset._WindowedReader.Row],
-    ):
-        row["speed_discrete"] = None
-        if not after_win:
-            return row
-        c = np.array((row["adj_position_x"], row["adj_position_y"]))
-        n = np.array((after_win[0]["adj_position_x"], after_win[0]["adj_position_y"]))
-        if not any(np.isnan(c)) and not any(np.isnan(n)):
-            # XXX: could try to divide by sim_time delta here instead of assuming it's fixed
-            row["speed_discrete"] = np.linalg.norm(n - c) / self._dt_sec
-
-    def _row_gen(self) -> Generator[_TrajectoryDataset._WindowedReader.Row, None, None]:
+    def _row_gen(self) -> Generator[Row, None, None]:
         x_margin = self._dataset_spec.get("x_margin_px", 0) / self.scale
         y_margin = self._dataset_spec.get("y_margin_px", 0) / self.scale
         with open(self._path, newline="") as infile:
@@ -733,47 +748,55 @@ class NGSIM(_TrajectoryDataset):
     def rows(self) -> Generator[Dict, None, None]:
         self._log.debug("transforming NGSIM data...")
 
-        # smooth positions using a moving average...
-        # TAI: make this window size a parameter too?
-        posns_gen = _TrajectoryDataset._WindowedReader(
-            self._row_gen(), self._smooth_positions, 7, 7, "vehicle_id"
-        )
-
-        # infer heading with rolling window on previously-smoothed positions...
-        heading_window = self._dataset_spec.get("heading_inference_window", 2)
-        heading_before_win = int((heading_window / 2) + (heading_window % 2) - 1)
-        heading_after_win = int(heading_window / 2)
-        headings_gen = _TrajectoryDataset._WindowedReader(
-            posns_gen,
-            self._infer_heading,
-            heading_before_win,
-            heading_after_win,
-            "vehicle_id",
-        )
-
-        # finally calculate speeds based on these smoothed and centered positions...
-        # (This also overcomes problem that NGSIM speeds are "instantaneous"
-        # and so don't match with dPos/dt, which can affect some models.)
-        speeds_gen = _TrajectoryDataset._WindowedReader(
-            headings_gen, self._cal_speed, 0, 1, "vehicle_id"
-        )
-
+        # positions are smoothed using a moving average and headings are inferred
+        # with a rolling window on the smoothed positions
         map_bbox = self._dataset_spec.get("_map_bbox")
+        trajectories = self._process_trajectories(
+            self._row_gen(),
+            partial(_ngsim_trajectory, params=self._heading_inference()),
+            lambda rows: (
+                np.array([(r["position_x"], r["position_y"]) for r in rows]),
+                np.array([r["speed"] for r in rows]),
+            ),
+        )
+        for rows, (positions, headings) in trajectories:
+            headings = self._fill_headings(headings, lambda: self._default_heading)
+
+            # now since SMARTS' positions are the vehicle centerpoints, but NGSIM's are at the front
+            # we must adjust the vehicle position to its centerpoint based on its inferred heading angle (+y = 0 rad)
+            adj_headings = headings + 0.5 * math.pi
+            half_lens = 0.5 * np.array([r["length"] for r in rows])
+            adj_positions = positions - half_lens[:, np.newaxis] * np.stack(
+                (np.cos(adj_headings), np.sin(adj_headings)), axis=1
+            )
 
-        # note: iterating over outer generator iterates over all nested generators too...
-        # XXX: assumes all timesteps for a vehicle are grouped together in the file and are in sorted temporal order
-        for row in speeds_gen:
-            if map_bbox and not map_bbox.contains(
-                Point(
-                    self.scale * row["adj_position_x"],
-                    self.scale * row["adj_position_y"],
-                )
+            # finally calculate speeds based on these smoothed and centered positions...
+            # (This also overcomes problem that NGSIM speeds are "instantaneous"
+            # and so don't match with dPos/dt, which can affect some models.)
+            speeds = _cal_speeds(adj_positions, self._dt_sec)
+
+            for row, position, heading, adj_position, speed in zip(
+                rows,
+                positions.tolist(),
+                headings.tolist(),
+                adj_positions.tolist(),
+                speeds.tolist(),
             ):
-                self._log.info(
-                    f"skipping row for vehicle {row['vehicle_id']} with position off of map"
-                )
-                continue
-            yield row
+                row["position_x"], row["position_y"] = position
+                row["heading_rad"] = heading
+                row["adj_position_x"], row["adj_position_y"] = adj_position
+                row["speed_discrete"] = None if math.isnan(speed) else speed
+                if map_bbox and not map_bbox.contains(
+                    Point(
+                        self.scale * row["adj_position_x"],
+                        self.scale * row["adj_position_y"],
+                    )
+                ):
+                    self._log.info(
+                        f"skipping row for vehicle {row['vehicle_id']} with position off of map"
+                    )
+                    continue
+                yield row
 
     def column_val_in_row(self, row, col_name: str) -> Any:
         if col_name == "speed":
@@ -1121,6 +1144,16 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--x_offset", help="X offset of map", type=float)
     parser.add_argument("--y_offset", help="Y offset of map", type=float)
+    parser.add_argument(
+        "--columnar",
+        help="Write a memory mapped columnar store instead of a SQLite database",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="Number of processes used to transform trajectories (0 for none)",
+        type=int,
+    )
     parser.add_argument(
         "--force",
         "-f",
@@ -1165,6 +1198,12 @@ if __name__ == "__main__":
     if args.y_offset:
         dataset_spec["y_offset"] = args.y_offset
 
+    if args.workers is not None:
+        dataset_spec["import_workers"] = args.workers
+
+    if args.columnar:
+        dataset_spec["columnar_store"] = True
+
     source = dataset_spec.get("source_type", "NGSIM")
     if source == "NGSIM":
         dataset = NGSIM(dataset_spec, args.output)
@@ -0,0 +1,87 @@
+# MIT License
+#
+# Copyright (C) 2023. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+import sqlite3
+
+import numpy as np
+import pytest
+
+from smarts.sstudio.genhistories import Interaction, _smooth_positions
+
+
+def _smooth_positions_by_row(positions, window_before, window_after):
+    smoothed = []
+    for i, position in enumerate(positions):
+        before = smoothed[::-1][:window_before]
+        before += [before[-1] if before else position] * (window_before - len(before))
+        after = list(positions[i + 1 : i + 1 + window_after])
+        after += [after[-1] if after else position] * (window_after - len(after))
+        smoothed.append(
+            (position + sum(before) + sum(after)) / (1 + window_before + window_after)
+        )
+    return np.array(smoothed)
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 8, 30])
+def test_smooth_positions(n):
+    positions = np.random.default_rng(n).uniform(0, 100, (n, 2))
+    assert np.allclose(
+        _smooth_positions(positions, 7, 7), _smooth_positions_by_row(positions, 7, 7)
+    )
+
+
+@pytest.fixture
+def interaction_csv(tmp_path):
+    path = tmp_path / "interaction.csv"
+    with open(path, "w") as f:
+        f.write("track_id,frame_id,timestamp_ms,agent_type,x,y,vx,vy,psi_rad\n")
+        for vehicle_id in range(1, 6):
+            for frame in range(20):
+                # vehicles drive along +x at 10 m/s
+                x, y = frame * 1.0, vehicle_id * 4.0
+                f.write(f"{vehicle_id},{frame},{frame * 100},car,{x},{y},10,0,0\n")
+    return path
+
+
+def _import_trajectories(input_path, output, workers):
+    spec = {
+        "name": "interaction",
+        "source_type": "INTERACTION",
+        "input_path": str(input_path),
+        "heading_inference_window": 5,
+        "import_workers": workers,
+    }
+    Interaction(spec, str(output)).create_output()
+    with sqlite3.connect(output) as dbconxn:
+        return dbconxn.execute(
+            "SELECT * FROM Trajectory ORDER BY vehicle_id, sim_time"
+        ).fetchall()
+
+
+def test_import_interaction(interaction_csv, tmp_path):
+    rows = _import_trajectories(interaction_csv, tmp_path / "serial.shf", 0)
+    assert len(rows) == 5 * 20
+    for _, _, _, _, heading, speed, _ in rows:
+        assert math.isclose(heading, 1.5 * math.pi)
+        assert math.isclose(speed, 10)
+
+    assert _import_trajectories(interaction_csv, tmp_path / "pooled.shf", 2) == rows
@@ -69,3 +69,7 @@ class TrafficHistoryDataset:
     """When inferring headings from positions, each vehicle's angular velocity will be limited to be at most this amount (in rad/sec) to prevent lateral-coordinate noise in the dataset from causing near-instantaneous heading changes."""
     default_heading: float = 1.5 * math.pi
     """A heading in radians to be used by default for vehicles if the headings are not present in the dataset and cannot be inferred from position changes (such as on the first time step)."""
+    columnar_store: bool = False
+    """If True, the imported history is written as a memory mapped columnar trajectory store that the processes replaying it share, instead of a SQLite database."""
+    import_workers: Optional[int] = None
+    """The number of processes used to smooth positions and infer headings and speeds when importing NGSIM and INTERACTION datasets.  Use 0 to do this in the importing process.  Defaults to the number of CPUs if not specified."""